@@ -1,18 +1,37 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from ai_desk_agents import ai_desk
+from fastapi.responses import Response
+from ai_desk_agents import ai_desk, source_health, writer_parse_report, load_desk_state, save_desk_state
+from ai_desk_scheduler import poll_scheduler
+from ai_desk_retention import pin_store
+from ai_desk_store import edition_store, EditionUnavailable
+from ai_desk_stories import story_clusters
+from ai_desk_views import VIEWS, parse_fields, edition_views
+import ai_desk_cpu as cpu
+import ai_desk_metrics as metrics
+import asyncio
 import json
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the feed-parsing worker processes before the first request needs them
+    await asyncio.to_thread(cpu.warm_up)
+    yield
+    cpu.shutdown()
+
+
 app = FastAPI(
     title="AI Desk News API",
     description="API for generating AI news using multi-agent system",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -30,36 +49,112 @@ async def root():
     return {"message": "Welcome to AI Desk News API v2.0. Visit /news to generate news."}
 
 
+async def _generate_edition(deadline_ms: int | None) -> dict:
+    """
+    Run the pipeline once and shape the result as a stored edition. Runs in
+    the edition leader only, so it continues from the desk state the previous
+    leader (in whichever worker) saved, and saves its own for the next.
+    """
+    logger.info("Starting AI Desk news generation...")
+    await load_desk_state()
+    status = {}
+    try:
+        articles = await ai_desk(deadline_ms=deadline_ms, status=status)
+    finally:
+        await save_desk_state()
+
+    # Ensure each article has timestamp
+    now_iso = datetime.now(timezone.utc).isoformat()
+    for article in articles:
+        if "timestamp" not in article:
+            article["timestamp"] = now_iso
+        if "published" not in article:
+            article["published"] = now_iso
+
+    logger.info(f"Generated {len(articles)} articles in {status['elapsed_ms']}ms (partial={status['partial']})")
+    return {"articles": articles, "partial": status["partial"], "sources": status["sources"],
+            "stories": status.get("stories", [])}
+
+
 @app.get("/news")
-async def get_news():
+async def get_news(deadline_ms: int | None = Query(None, gt=0, description="Overall time budget for the edition"),
+                   view: str = Query("full", description=f"Article projection: {' or '.join(VIEWS)}"),
+                   fields: str | None = Query(None, description="Comma-separated article keys to return")):
     """
     Trigger the AI Desk agents to fetch and generate news.
-    Returns an array of news articles.
+    Returns an array of news articles, flagged as partial when the
+    deadline cut the edition short, and the story threads they belong to.
+    `view=summary` leaves out the article bodies and `fields=` keeps only
+    the listed keys. Only one request across all workers generates at a
+    time; concurrent requests share its edition.
     """
+    if view not in VIEWS:
+        raise HTTPException(status_code=422, detail=f"view must be one of: {', '.join(VIEWS)}")
+    try:
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
     try:
-        logger.info("Starting AI Desk news generation...")
-        articles = await ai_desk()
-        
-        # Ensure each article has timestamp
-        now_iso = datetime.now(timezone.utc).isoformat()
-        for article in articles:
-            if "timestamp" not in article:
-                article["timestamp"] = now_iso
-            if "published" not in article:
-                article["published"] = now_iso
-        
-        logger.info(f"Generated {len(articles)} articles")
-        return {"articles": articles}
-            
+        with metrics.http_request_seconds.time(endpoint="/news"):
+            edition = await edition_store.get_or_generate(
+                lambda: _generate_edition(deadline_ms),
+                wait_s=deadline_ms / 1000 if deadline_ms else None,
+            )
+            body = edition_views.cached(edition, view, selected)
+            if body is None:
+                body = await asyncio.to_thread(edition_views.response, edition, view, selected)
+        return Response(content=body, media_type="application/json")
+
+    except EditionUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         logger.error(f"Error generating news: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/articles/{article_id}")
+async def get_article(article_id: str):
+    """One article of the latest edition with its full content, by id or slug."""
+    edition = await asyncio.to_thread(edition_store.read)
+    article = edition_views.article(edition, article_id) if edition else None
+    if article is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return article
+
+
+@app.put("/articles/{article_id}/pin")
+async def pin_article(article_id: str):
+    """Keep an article (e.g. a bookmarked or hero item) through retention eviction."""
+    await asyncio.to_thread(pin_store.pin, article_id)
+    return {"article_id": article_id, "pinned": True}
+
+
+@app.delete("/articles/{article_id}/pin")
+async def unpin_article(article_id: str):
+    """Let a pinned article be evicted again."""
+    await asyncio.to_thread(pin_store.unpin, article_id)
+    return {"article_id": article_id, "pinned": False}
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "writer": writer_parse_report(),
+        "sources": source_health(),
+        "edition": await asyncio.to_thread(edition_store.status),
+        "polling": poll_scheduler.snapshot(),
+        "stories": story_clusters.snapshot(),
+    }
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Pipeline metrics in Prometheus text format."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 if __name__ == "__main__":
@@ -1,25 +1,54 @@
 import os
+import copy
 import uuid
+import pickle
+import tempfile
 import hashlib
+import inspect
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from dotenv import load_dotenv
-from agents import Agent, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, function_tool
+from agents import Agent, AgentOutputSchema, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, function_tool
 from agents.run import RunConfig
+from agents.exceptions import ModelBehaviorError
 import asyncio
 import json
 import re
+import time
+import random
+import weakref
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque, OrderedDict
+from functools import partial
+from typing import Callable, NamedTuple
 
 from googleapiclient.discovery import build
-import feedparser
-import wikipedia
 import httpx
-
-# Set language to English
-wikipedia.set_lang("en")
+import openai
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from ai_desk_articles import Article
+import ai_desk_cpu as cpu
+from ai_desk_cpu import clean_text
+import ai_desk_metrics as metrics
+from ai_desk_resolver import url_resolver, is_redirect_link
+from ai_desk_retention import RetentionPolicy, pin_store
+from ai_desk_scheduler import poll_scheduler
+from ai_desk_similarity import SimilarityIndex, SIMILARITY_THRESHOLD, cosine
+from ai_desk_sources import SourceConfig, load_sources
+from ai_desk_stories import story_clusters
+from ai_desk_store import EDITION_STORE_DIR
+import ai_desk_tracing as tracing
+from ai_desk_tracing import logger
 
 # Load .env file
 load_dotenv()
 
+# Queue-backed structured logging (and span export when AI_DESK_TRACE_FILE is set)
+tracing.configure_logging()
+
 # Get API keys
 groq_api_key = os.getenv("GROQ_API_KEY")
 openai_api_key = os.getenv("OPENAI_API_KEY")
@@ -29,10 +58,12 @@ unsplash_access_key = os.getenv("UNSPLASH_ACCESS_KEY", "")
 if not groq_api_key:
     raise ValueError("GROQ_API_KEY is not set. Please ensure it is defined in your .env file.")
 
-# Initialize Groq OpenAI-compatible client
+# Initialize Groq OpenAI-compatible client (GROQ_BASE_URL can point at a local stand-in).
+# Retries are left to run_writer, so one Writer attempt is one HTTP request.
 external_client = AsyncOpenAI(
     api_key=groq_api_key,
-    base_url="https://api.groq.com/openai/v1",
+    base_url=os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1"),
+    max_retries=0,
 )
 
 # Define the model
@@ -45,7 +76,7 @@ model = OpenAIChatCompletionsModel(
 config = RunConfig(
     model=model,
     model_provider=external_client,
-    tracing_disabled=True
+    tracing_disabled=not tracing.tracing_enabled()
 )
 
 # ================================================================================
@@ -55,11 +86,33 @@ config = RunConfig(
 class ArticleCache:
     """
     Semantic deduplication cache for articles.
-    Merges articles with similar titles/topics.
+    Merges articles about the same story, by shared source URL or by TF-IDF
+    similarity of title, description and summary. Articles are kept as
+    compact Article records and turned back into dicts by get_all().
+    Articles stay across editions until evict() drops them under the
+    retention policy.
     """
-    def __init__(self):
-        self.articles = {}  # key: normalized_title -> article dict
+    def __init__(self, retention: RetentionPolicy = None):
+        self.articles = {}  # key: normalized_title -> Article
+        self._by_url = {}  # canonical source URL -> key of the article citing it
+        self.index = SimilarityIndex()
+        self.retention = retention or RetentionPolicy()
+        self._seen = OrderedDict()  # key -> last time a source carried the article, least recent first
+        self._sizes = {}  # key -> serialized bytes, None until measured
+        self._bytes = 0
+        self._lock = threading.RLock()  # compaction runs in a background thread
         
+    def __getstate__(self) -> dict:
+        """Picklable state (shared between workers), without the lock."""
+        with self._lock:
+            state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
     def _normalize_title(self, title: str) -> str:
         """Normalize title for comparison."""
         # Remove special chars, lowercase, remove common words
@@ -69,73 +122,191 @@ class ArticleCache:
         words = [w for w in title.split() if w not in stop_words]
         return ' '.join(sorted(words))
     
-    def _similarity(self, title1: str, title2: str) -> float:
-        """Calculate Jaccard similarity between two titles."""
-        set1 = set(self._normalize_title(title1).split())
-        set2 = set(self._normalize_title(title2).split())
-        if not set1 or not set2:
-            return 0.0
-        intersection = set1 & set2
-        union = set1 | set2
-        return len(intersection) / len(union)
-    
-    def find_similar(self, title: str, threshold: float = 0.5) -> str | None:
+    @staticmethod
+    def _fields(article: Article) -> tuple:
+        """Text the similarity engine compares: title, description and the opening paragraph."""
+        summary = next((section.paragraphs[0] for section in article.content if section.paragraphs), "")
+        return article.meta_title, article.meta_description, summary
+
+    def find_similar(self, title: str, threshold: float = None) -> str | None:
         """Find existing article with similar title."""
-        for key, article in self.articles.items():
-            if self._similarity(title, article.get('meta_title', '')) >= threshold:
-                return key
-        return None
+        [(key, _)] = self.index.best_matches([self.index.vectorize((title,))], threshold)
+        return key
     
-    def add_or_merge(self, article: dict) -> dict:
+    def find_by_url(self, article: Article) -> str | None:
+        """Key of a cached article that cites one of this article's source URLs."""
+        for link in article.source_links:
+            if link.url and link.key in self._by_url:
+                return self._by_url[link.key]
+        return None
+
+    def _index_urls(self, key: str, article: Article):
+        for link in article.source_links:
+            if link.url:
+                self._by_url.setdefault(link.key, key)
+
+    def _touch(self, key: str):
+        self._seen[key] = time.time()
+        self._seen.move_to_end(key)
+        self._bytes -= self._sizes.get(key) or 0
+        self._sizes[key] = None
+
+    def _merge(self, key: str, article: Article) -> Article:
+        """Merge links and images by canonical URL and tags by name, keeping first-seen order."""
+        existing = self.articles[key]
+        existing.source_links = _merge_unique(existing.source_links, article.source_links, _link_key)
+        existing.video_links = _merge_unique(existing.video_links, article.video_links, _link_key)
+        existing.images = _merge_unique(existing.images, article.images, _link_key)
+        existing.tags = _merge_unique(existing.tags, article.tags)
+        # Duplicates from two story threads mean the threads cover one story
+        story_ids = [(record.extra or {}).get("story_id") for record in (existing, article)]
+        if all(story_ids) and story_ids[0] != story_ids[1]:
+            combined = story_clusters.combine(*story_ids)
+            if combined:
+                existing.extra["story_id"] = combined
+        self._index_urls(key, article)
+        self._touch(key)
+        metrics.dedup_results.inc(result="merged")
+        return existing
+
+    def _insert(self, article: Article) -> str:
+        """Store a new article, collapsing links that differ only in tracking parameters and the like."""
+        key = base = self._normalize_title(article.meta_title)
+        suffix = 1
+        while key in self.articles:
+            suffix += 1
+            key = f"{base}#{suffix}"
+        article.source_links = _merge_unique((), article.source_links, _link_key)
+        article.video_links = _merge_unique((), article.video_links, _link_key)
+        article.images = _merge_unique((), article.images, _link_key)
+        article.id = str(uuid.uuid4())
+        article.timestamp = datetime.now(timezone.utc).isoformat()
+        if article.published is None:
+            article.published = article.timestamp
+        self.articles[key] = article
+        self._index_urls(key, article)
+        self.index.add(key, self._fields(article))
+        self._touch(key)
+        metrics.dedup_results.inc(result="added")
+        return key
+
+    def add_or_merge(self, article: dict | Article) -> Article:
         """Add new article or merge with existing similar one."""
-        title = article.get('meta_title', '')
-        existing_key = self.find_similar(title)
-        
-        if existing_key:
-            # Merge with existing article
-            existing = self.articles[existing_key]
-            
-            # Merge source_links
-            existing_sources = existing.get('source_links', [])
-            new_sources = article.get('source_links', [])
-            merged_sources = existing_sources + [s for s in new_sources if s not in existing_sources]
-            existing['source_links'] = merged_sources
-            
-            # Merge video_links
-            existing_videos = existing.get('video_links', [])
-            new_videos = article.get('video_links', [])
-            merged_videos = existing_videos + [v for v in new_videos if v not in existing_videos]
-            existing['video_links'] = merged_videos
-            
-            # Merge images
-            existing_images = existing.get('images', [])
-            new_images = article.get('images', [])
-            merged_images = existing_images + [i for i in new_images if i not in existing_images]
-            existing['images'] = merged_images
-            
-            # Merge tags
-            existing_tags = set(existing.get('tags', []))
-            new_tags = set(article.get('tags', []))
-            existing['tags'] = list(existing_tags | new_tags)
-            
-            return existing
-        else:
-            # Add new article
-            key = self._normalize_title(title)
-            article['id'] = str(uuid.uuid4())
-            article['timestamp'] = datetime.now(timezone.utc).isoformat()
-            if 'published' not in article:
-                article['published'] = article['timestamp']
-            self.articles[key] = article
-            return article
+        return self.add_batch([article])[0]
+
+    def add_batch(self, articles: list, threshold: float = None) -> list:
+        """
+        Add or merge several articles, returning the cached Article each one
+        ended up in. Articles citing a source URL already in the cache are
+        merged directly; the rest are scored against the whole cache in one
+        vectorized product, and against earlier articles of the same batch.
+        """
+        threshold = SIMILARITY_THRESHOLD if threshold is None else threshold
+        records = [article if isinstance(article, Article) else Article.from_dict(article) for article in articles]
+        with self._lock:
+            return self._add_records(records, threshold)
+
+    def _add_records(self, records: list, threshold: float) -> list:
+        url_keys = [self.find_by_url(record) for record in records]
+        pending = [pos for pos, key in enumerate(url_keys) if key is None]
+        vectors = {pos: self.index.vectorize(self._fields(records[pos])) for pos in pending}
+        matches = dict(zip(pending, self.index.best_matches([vectors[pos] for pos in pending], threshold)))
+
+        results, added = [], []
+        for pos, record in enumerate(records):
+            # Earlier articles of the batch may have brought in a URL this one cites
+            key = url_keys[pos] or (self.find_by_url(record) if pos else None)
+            if key:
+                metrics.dedup_results.inc(result="url_match")
+            elif pos in matches:
+                key = matches[pos][0] or next(
+                    (other for other, vector in added if cosine(vector, vectors[pos]) >= threshold), None)
+            if key:
+                results.append(self._merge(key, record))
+            else:
+                key = self._insert(record)
+                if pos in vectors:
+                    added.append((key, vectors[pos]))
+                results.append(record)
+        return results
     
     def get_all(self) -> list:
-        """Get all articles as a list."""
-        return list(self.articles.values())
+        """Get all articles as a list of dicts."""
+        with self._lock:
+            return [article.to_dict() for article in self.articles.values()]
+
+    def remove(self, key: str):
+        """Drop an article and its index entries."""
+        with self._lock:
+            article = self.articles.pop(key, None)
+            if article is None:
+                return
+            for link in article.source_links:
+                if link.url and self._by_url.get(link.key) == key:
+                    del self._by_url[link.key]
+            self.index.remove(key)
+            self._seen.pop(key, None)
+            self._bytes -= self._sizes.pop(key, None) or 0
+
+    def evict(self, pinned=None, now: float = None) -> list:
+        """
+        Apply the retention policy, sparing articles whose id is pinned (the
+        shared pin store by default). Returns the keys of evicted articles.
+        """
+        pinned = pin_store.ids() if pinned is None else pinned
+        with self._lock:
+            for key, size in self._sizes.items():
+                if size is None:
+                    self._sizes[key] = size = len(json.dumps(self.articles[key].to_dict()))
+                    self._bytes += size
+            pinned_keys = {key for key, article in self.articles.items() if article.id in pinned}
+            evicted = self.retention.evictions(((key, seen, self._sizes[key]) for key, seen in self._seen.items()),
+                                               self._bytes, pinned_keys, now)
+            for key in evicted:
+                self.remove(key)
+        if evicted:
+            metrics.articles_evicted.inc(len(evicted))
+        metrics.article_store.set(len(self.articles), kind="articles")
+        metrics.article_store.set(self._bytes, kind="bytes")
+        return evicted
+
+    def needs_compaction(self) -> bool:
+        return self.index.removed_ratio >= self.retention.compact_ratio
+
+    def compact(self):
+        """Release what evicted articles left behind in the index and the (never shrinking) dicts."""
+        with self._lock, tracing.span("compact", removed_ratio=round(self.index.removed_ratio, 3)):
+            self.index.compact()
+            self.articles = dict(self.articles)
+            self._by_url = dict(self._by_url)
+            self._sizes = dict(self._sizes)
     
     def clear(self):
         """Clear the cache."""
-        self.articles = {}
+        with self._lock:
+            self.articles = {}
+            self._by_url = {}
+            self.index.clear()
+            self._seen = OrderedDict()
+            self._sizes = {}
+            self._bytes = 0
+
+
+def _link_key(link) -> str:
+    return link.key
+
+
+def _merge_unique(existing: tuple, new: tuple, key=None) -> tuple:
+    """
+    `existing` followed by the items of `new` whose key it does not contain
+    yet, in one pass over each. Without `key` the items themselves are compared.
+    """
+    if key is None:
+        return tuple(dict.fromkeys(existing + new))
+    merged = {}
+    for item in existing + new:
+        merged.setdefault(key(item), item)
+    return tuple(merged.values())
 
 
 # Global cache instance
@@ -149,20 +320,16 @@ article_cache = ArticleCache()
 # Initialize YouTube client
 youtube_client = build("youtube", "v3", developerKey=google_api_key) if google_api_key else None
 
-@function_tool
-def fetch_youtube_videos():
-    """
-    Fetches the latest AI-related videos from YouTube.
-    Returns a list of videos with title, link, description, and published date.
-    """
+def _fetch_youtube(query: str, max_items: int = 5):
+    """Latest videos for a search query, newest first."""
     if not youtube_client:
         return {"error": "YouTube API not configured"}
     
     request = youtube_client.search().list(
         part="snippet",
-        q="AI news",
+        q=query,
         type="video",
-        maxResults=5,
+        maxResults=max_items,
         order="date"
     )
     response = request.execute()
@@ -179,31 +346,62 @@ def fetch_youtube_videos():
 
     return videos
 
+
+@function_tool
+def fetch_youtube_videos():
+    """
+    Fetches the latest AI-related videos from YouTube.
+    Returns a list of videos with title, link, description, and published date.
+    """
+    return _fetch_youtube("AI news")
+
 # Non-decorated wrapper for direct calling
-def _fetch_youtube_videos():
-    if not youtube_client:
-        return {"error": "YouTube API not configured"}
-    
-    request = youtube_client.search().list(
-        part="snippet",
-        q="AI news",
-        type="video",
-        maxResults=5,
-        order="date"
-    )
-    response = request.execute()
+def _fetch_youtube_videos(max_items: int = 5):
+    return _fetch_youtube("AI news", max_items)
 
-    videos = []
-    for item in response['items']:
-        videos.append({
-            "title": item['snippet']['title'],
-            "link": f"https://www.youtube.com/watch?v={item['id']['videoId']}",
-            "description": item['snippet']['description'],
-            "published": item['snippet']['publishedAt'],
-            "thumbnail": item['snippet']['thumbnails']['high']['url']
-        })
 
-    return videos
+# RSS feeds are downloaded here and parsed in the CPU process pool
+FORBES_FEED_URL = "https://www.forbes.com/ai/feed2/"
+GOOGLE_NEWS_FEED_URL = "https://news.google.com/rss/search?q=AI&hl=en-US&gl=US&ceid=US:en"
+FEED_TIMEOUT_S = float(os.getenv("FEED_TIMEOUT_S", "15"))
+FEED_HEADERS = {"User-Agent": "AI-Desk/0.1 (https://github.com/tanzeela1078-cyber/AI-DESK)"}
+
+
+# Download granularity for the streaming parser
+FEED_CHUNK_BYTES = 16 * 1024
+
+
+def _fetch_feed(feed_url: str, max_items: int = 10) -> list | dict:
+    """
+    Stream a feed and parse it as it arrives, closing the connection once
+    `max_items` entries are read. Feeds the fast parser rejects are read in
+    full and parsed by feedparser in the CPU process pool.
+    """
+    parser = cpu.FeedStreamParser(max_items)
+    received = bytearray()
+    try:
+        with httpx.stream("GET", feed_url, headers=FEED_HEADERS, timeout=FEED_TIMEOUT_S,
+                          follow_redirects=True) as response:
+            response.raise_for_status()
+            chunks = response.iter_bytes(FEED_CHUNK_BYTES)
+            for chunk in chunks:
+                received += chunk
+                if parser.feed(chunk):
+                    break
+            else:
+                parser.close()
+            if parser.failed:
+                for chunk in chunks:
+                    received += chunk
+    except httpx.HTTPError as e:
+        return {"error": f"Feed request failed: {e}"}
+
+    if not parser.failed:
+        metrics.feed_parses.inc(parser="stream")
+        return parser.records
+    logger.debug("Falling back to feedparser for %s", feed_url)
+    metrics.feed_parses.inc(parser="feedparser")
+    return cpu.run_cpu(cpu.parse_feed, bytes(received), max_items)
 
 
 @function_tool
@@ -212,33 +410,11 @@ def fetch_forbes_ai_news():
     Fetches the latest AI news articles from Forbes RSS feed.
     Returns a list of articles with title, link, description, and published date.
     """
-    feed_url = "https://www.forbes.com/ai/feed2/"
-    feed = feedparser.parse(feed_url)
-
-    articles = []
-    for entry in feed.entries[:10]:
-        articles.append({
-            "title": entry.title,
-            "link": entry.link,
-            "summary": entry.summary,
-            "published": entry.published
-        })
-    return articles
+    return _fetch_feed(FORBES_FEED_URL)
 
 # Non-decorated wrapper
-def _fetch_forbes_ai_news():
-    feed_url = "https://www.forbes.com/ai/feed2/"
-    feed = feedparser.parse(feed_url)
-
-    articles = []
-    for entry in feed.entries[:10]:
-        articles.append({
-            "title": entry.title,
-            "link": entry.link,
-            "summary": entry.summary,
-            "published": entry.published
-        })
-    return articles
+def _fetch_forbes_ai_news(max_items: int = 10):
+    return _fetch_feed(FORBES_FEED_URL, max_items)
 
 
 
@@ -248,34 +424,35 @@ def fetch_google_ai_news():
     Fetches latest AI news articles from Google News RSS feed.
     Returns a list of articles with title, link, summary, and published date.
     """
-    feed_url = "https://news.google.com/rss/search?q=AI&hl=en-US&gl=US&ceid=US:en"
-    feed = feedparser.parse(feed_url)
-
-    articles = []
-    for entry in feed.entries[:10]:
-        articles.append({
-            "title": entry.title,
-            "link": entry.link,
-            "summary": entry.summary,
-            "published": entry.published
-        })
-    return articles
+    return _fetch_feed(GOOGLE_NEWS_FEED_URL)
 
 # Non-decorated wrapper
-def _fetch_google_ai_news():
-    feed_url = "https://news.google.com/rss/search?q=AI&hl=en-US&gl=US&ceid=US:en"
-    feed = feedparser.parse(feed_url)
-
-    articles = []
-    for entry in feed.entries[:10]:
-        articles.append({
-            "title": entry.title,
-            "link": entry.link,
-            "summary": entry.summary,
-            "published": entry.published
-        })
-    return articles
+def _fetch_google_ai_news(max_items: int = 10):
+    return _fetch_feed(GOOGLE_NEWS_FEED_URL, max_items)
+
+
+
+# Wikipedia is fetched straight from the MediaWiki API: a tiny revision check
+# first, and the intro extract plus lead thumbnail in one request only when
+# the page has actually changed since the last run.
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+WIKIPEDIA_TOPIC = "Artificial intelligence"
+WIKIPEDIA_THUMB_SIZE = int(os.getenv("WIKIPEDIA_THUMB_SIZE", "800"))
+WIKIPEDIA_HEADERS = {"User-Agent": "AI-Desk/0.1 (https://github.com/tanzeela1078-cyber/AI-DESK)"}
+
+# Last fetched snapshot per topic, keyed by topic -> result dict
+_wikipedia_cache = {}
+
 
+def _wikipedia_query(**params) -> dict:
+    """Run a MediaWiki query and return its first page."""
+    params.update({"action": "query", "format": "json", "formatversion": 2, "redirects": 1})
+    response = httpx.get(WIKIPEDIA_API_URL, params=params, headers=WIKIPEDIA_HEADERS, timeout=10)
+    response.raise_for_status()
+    pages = response.json().get("query", {}).get("pages", [])
+    if not pages or pages[0].get("missing"):
+        raise LookupError(f"Wikipedia page not found: {params.get('titles')}")
+    return pages[0]
 
 
 @function_tool
@@ -283,50 +460,46 @@ def fetch_wikipedia_ai_content() -> dict:
     """
     Fetch AI-related content from Wikipedia and return summary, title, URL, and images.
     """
-    topic = "Artificial intelligence"
-    try:
-        page = wikipedia.page(topic)
-        result = {
-            "title": page.title,
-            "summary": page.summary,
-            "url": page.url,
-            "images": page.images[:3]
-        }
-        return result
-    except wikipedia.DisambiguationError as e:
-        page = wikipedia.page(e.options[0])
-        result = {
-            "title": page.title,
-            "summary": page.summary,
-            "url": page.url,
-            "images": page.images[:3]
-        }
-        return result
-    except Exception as ex:
-        return {"error": str(ex)}
+    return _fetch_wikipedia_ai_content()
 
 # Non-decorated wrapper
 def _fetch_wikipedia_ai_content() -> dict:
-    topic = "Artificial intelligence"
+    return _fetch_wikipedia(WIKIPEDIA_TOPIC)
+
+
+def _fetch_wikipedia(topic: str) -> dict:
+    """Intro, URL and lead image of a Wikipedia page, refetched only when its revision changes."""
+    cached = _wikipedia_cache.get(topic)
     try:
-        page = wikipedia.page(topic)
-        result = {
-            "title": page.title,
-            "summary": page.summary,
-            "url": page.url,
-            "images": page.images[:3]
-        }
-        return result
-    except wikipedia.DisambiguationError as e:
-        page = wikipedia.page(e.options[0])
+        info = _wikipedia_query(titles=topic, prop="info")
+        revision_id = info["lastrevid"]
+        if cached and cached["revision_id"] == revision_id:
+            metrics.cache_requests.inc(cache="wikipedia", result="hit")
+            return copy.deepcopy(cached)
+        metrics.cache_requests.inc(cache="wikipedia", result="miss")
+
+        page = _wikipedia_query(
+            titles=topic,
+            prop="extracts|pageimages|info",
+            exintro=1,
+            explaintext=1,
+            piprop="thumbnail",
+            pithumbsize=WIKIPEDIA_THUMB_SIZE,
+            inprop="url",
+        )
+        thumbnail = page.get("thumbnail", {}).get("source")
         result = {
-            "title": page.title,
-            "summary": page.summary,
-            "url": page.url,
-            "images": page.images[:3]
+            "title": page["title"],
+            "summary": page.get("extract", ""),
+            "url": page.get("fullurl", ""),
+            "images": [thumbnail] if thumbnail else [],
+            "revision_id": page.get("lastrevid", revision_id),
+            "cache_key": f"wikipedia:{page['pageid']}:{page.get('lastrevid', revision_id)}",
         }
-        return result
+        _wikipedia_cache[topic] = result
+        return copy.deepcopy(result)
     except Exception as ex:
+        # Reported like any other fetch error, so the source's breaker sees it and serves the last articles
         return {"error": str(ex)}
 
 
@@ -388,6 +561,132 @@ def generate_image_for_topic(prompt: str) -> dict:
         return {"error": str(e)}
 
 
+# ================================================================================
+#                           WRITER OUTPUT SCHEMA
+# ================================================================================
+
+class SourceLinkOut(BaseModel):
+    title: str = ""
+    url: str
+    source: str = ""
+
+
+class VideoLinkOut(BaseModel):
+    title: str = ""
+    url: str
+    source: str = ""
+    published: str = ""
+
+
+class ContentSectionOut(BaseModel):
+    heading: str = ""
+    paragraphs: list[str] = Field(default_factory=list)
+
+    @field_validator("paragraphs", mode="before")
+    @classmethod
+    def _wrap_single_paragraph(cls, value):
+        return [value] if isinstance(value, str) else value
+
+
+class WriterArticle(BaseModel):
+    """Typed shape of one Writer article, used for validation and structured output."""
+    meta_title: str = Field(min_length=1)
+    meta_description: str = ""
+    meta_image_prompt: str = ""
+    alt_text: str = ""
+    slug: str = ""
+    tags: list[str] = Field(default_factory=list)
+    content: list[ContentSectionOut] = Field(default_factory=list)
+    source_links: list[SourceLinkOut] = Field(default_factory=list)
+    video_links: list[VideoLinkOut] = Field(default_factory=list)
+
+
+# Ask the model for schema-constrained output (needs a Groq model that supports json_schema)
+WRITER_STRUCTURED_OUTPUT = os.getenv("WRITER_STRUCTURED_OUTPUT", "0") == "1"
+# Extra Writer calls allowed for an item whose reply could not be parsed
+WRITER_PARSE_RETRIES = int(os.getenv("WRITER_PARSE_RETRIES", "1"))
+
+# Running totals of Writer parsing outcomes, see writer_parse_report()
+writer_parse_stats = {
+    "replies": 0,
+    "parse_failures": 0,
+    "salvaged": 0,
+    "retries": 0,
+    "wasted_seconds": 0.0,
+}
+
+
+def repair_json(text: str):
+    """
+    Decode the first JSON value in `text`, repairing truncation if needed.
+    Unterminated strings are closed, the dangling tail after the last complete
+    member is cut, and open brackets are closed. Returns None if nothing
+    can be salvaged.
+    """
+    starts = [i for i in (text.find('{'), text.find('[')) if i >= 0]
+    if not starts:
+        return None
+    text = text[min(starts):]
+    try:
+        return json.JSONDecoder().raw_decode(text)[0]
+    except json.JSONDecodeError:
+        pass
+
+    closers = {'{': '}', '[': ']'}
+    stack = []
+    cut_points = []  # (position, open brackets at that position)
+    in_string = escaped = False
+    for pos, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in closers:
+            stack.append(closers[char])
+        elif char in '}]':
+            if not stack:
+                break
+            stack.pop()
+            cut_points.append((pos + 1, list(stack)))
+        elif char == ',':
+            cut_points.append((pos, list(stack)))
+
+    candidates = [(text.rstrip() + ('"' if in_string else ''), stack)]
+    candidates += reversed(cut_points[-50:])
+    for end, open_brackets in candidates:
+        body = end if isinstance(end, str) else text[:end]
+        body = re.sub(r'[,:\s]+$', '', body)
+        try:
+            return json.loads(body + ''.join(reversed(open_brackets)))
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def _validate_article(data) -> dict | None:
+    """Validate a decoded Writer article against the schema; None if invalid."""
+    if isinstance(data, BaseModel):
+        data = data.model_dump()
+    try:
+        return WriterArticle.model_validate(data).model_dump()
+    except ValidationError:
+        return None
+
+
+def writer_parse_report() -> dict:
+    """Parse-failure rate and the Writer time spent on replies that were thrown away."""
+    replies = writer_parse_stats["replies"]
+    return {
+        **writer_parse_stats,
+        "parse_failure_rate": writer_parse_stats["parse_failures"] / replies if replies else 0.0,
+    }
+
+
 # ================================================================================
 #                                   AGENTS
 # ================================================================================
@@ -424,6 +723,9 @@ Output ONLY valid JSON, no markdown code blocks.
     model=model
 )
 
+# Writer variant that asks the model for schema-constrained JSON
+structured_writer = writer.clone(output_type=AgentOutputSchema(WriterArticle, strict_json_schema=False))
+
 # Image Agent
 image_agent = Agent(
     name="ImageAgent",
@@ -527,115 +829,879 @@ Return a JSON object with:
 
 
 # ================================================================================
-#                              ORCHESTRATION
+#                           WRITER INPUT PREPROCESSING
 # ================================================================================
 
-async def process_source_to_article(source_name: str, fetch_function, max_items: int = 3) -> list:
+# Upper bound on the estimated tokens of an item's summary in a Writer prompt
+WRITER_INPUT_TOKEN_BUDGET = int(os.getenv("WRITER_INPUT_TOKEN_BUDGET", "300"))
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
     """
-    Fetch news from a source, then pass each result to Writer agent to create articles.
-    Returns list of formatted articles.
+    Cheap local token estimate: one token per word or punctuation mark.
+    Close enough to BPE counts on English news copy for budgeting.
     """
-    articles = []
-    
-    try:
-        # Step 1: Directly call the fetch function
-        print(f"[{source_name}] Fetching news...")
-        raw_data = fetch_function()
-        
-        # Handle different return types
-        if isinstance(raw_data, dict):
-            if "error" in raw_data:
-                print(f"[{source_name}] Error: {raw_data['error']}")
-                return []
-            news_items = [raw_data]
-        elif isinstance(raw_data, list):
-            news_items = raw_data[:max_items]
-        else:
-            print(f"[{source_name}] Unexpected data type: {type(raw_data)}")
-            return []
-        
-        print(f"[{source_name}] Processing {len(news_items)} items...")
-        
-        # Step 2: For each news item, call Writer agent
-        for idx, item in enumerate(news_items, 1):
-            writer_prompt = f"""
+    return len(_TOKEN_RE.findall(text))
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Cut text after `budget` estimated tokens, on a word boundary."""
+    if budget <= 0:
+        return ""
+    for count, match in enumerate(_TOKEN_RE.finditer(text), 1):
+        if count > budget:
+            return text[:match.start()].rstrip() + "…"
+    return text
+
+
+def build_writer_prompt(source_name: str, item: dict, token_budget: int = None) -> str:
+    """Build the Writer prompt for one news item from cleaned, budgeted fields."""
+    if token_budget is None:
+        token_budget = WRITER_INPUT_TOKEN_BUDGET
+    title = clean_text(item.get('title', '')) or 'AI News'
+    summary = truncate_to_tokens(clean_text(item.get('summary', item.get('description', ''))), token_budget)
+
+    writer_prompt = f"""
 Create a news article from this {source_name} content:
 
-Title: {item.get('title', 'AI News')}
-Summary: {item.get('summary', item.get('description', ''))}
+Title: {title}
+Summary: {summary}
 Source URL: {item.get('url', item.get('link', ''))}
 Published: {item.get('published', '')}
 
 Include this in source_links with source="{source_name}".
 """
-            if item.get('link') and 'youtube.com' in item.get('link', ''):
-                writer_prompt += f"\nVideo URL: {item.get('link')}\nInclude this in video_links."
-            
+    if item.get('link') and 'youtube.com' in item.get('link', ''):
+        writer_prompt += f"\nVideo URL: {item.get('link')}\nInclude this in video_links."
+    return writer_prompt
+
+
+# ================================================================================
+#                            GLOBAL CONCURRENCY LIMITS
+# ================================================================================
+
+# Caps shared by every source, so fanning out to hundreds of feeds does not
+# open hundreds of connections or Writer calls at once
+SOURCE_FETCH_CONCURRENCY = int(os.getenv("SOURCE_FETCH_CONCURRENCY", "16"))
+WRITER_CONCURRENCY = int(os.getenv("WRITER_CONCURRENCY", "8"))
+
+_limiters = weakref.WeakKeyDictionary()  # event loop -> {name: Semaphore}
+# Blocking fetchers get their own threads; the default executor stops at 32
+_fetch_executor = ThreadPoolExecutor(max_workers=SOURCE_FETCH_CONCURRENCY, thread_name_prefix="ai-desk-fetch")
+
+
+def _limiter(name: str, size: int) -> asyncio.Semaphore:
+    """Semaphore `name` of the running event loop (asyncio primitives are bound to one loop)."""
+    per_loop = _limiters.setdefault(asyncio.get_running_loop(), {})
+    if name not in per_loop:
+        per_loop[name] = asyncio.Semaphore(size)
+    return per_loop[name]
+
+
+async def _run_fetch(fetch_function, *args, **kwargs):
+    """Run a blocking fetcher on the fetch threads, keeping the caller's context (log fields)."""
+    call = partial(contextvars.copy_context().run, fetch_function, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_fetch_executor, call)
+
+
+# ================================================================================
+#                        WRITER CALLS (timeouts, retries, hedging)
+# ================================================================================
+
+# Deadline for a single Writer call, including a hedged duplicate
+WRITER_TIMEOUT_S = float(os.getenv("WRITER_TIMEOUT_S", "30"))
+# Extra attempts after a retryable error, with jittered exponential backoff
+WRITER_MAX_RETRIES = int(os.getenv("WRITER_MAX_RETRIES", "2"))
+WRITER_BACKOFF_BASE_S = float(os.getenv("WRITER_BACKOFF_BASE_S", "0.5"))
+WRITER_BACKOFF_MAX_S = float(os.getenv("WRITER_BACKOFF_MAX_S", "8"))
+# Fire a duplicate request when the first is slower than the recent p95
+WRITER_HEDGE = os.getenv("WRITER_HEDGE", "0") == "1"
+WRITER_HEDGE_MIN_SAMPLES = 20
+WRITER_HEDGE_DEFAULT_DELAY_S = float(os.getenv("WRITER_HEDGE_DELAY_S", "10"))
+
+# Recent successful Writer latencies, used for the hedge delay
+_writer_latencies = deque(maxlen=200)
+writer_call_stats = {"calls": 0, "retries": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0}
+
+_RETRYABLE_ERRORS = (
+    TimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+def _hedge_delay() -> float:
+    """p95 of recent Writer latencies, or the configured default until enough samples exist."""
+    if len(_writer_latencies) < WRITER_HEDGE_MIN_SAMPLES:
+        return WRITER_HEDGE_DEFAULT_DELAY_S
+    ordered = sorted(_writer_latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Seconds a rate-limited response asks the client to wait (Retry-After / retry-after-ms)."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+async def _run_hedge(agent, prompt: str):
+    """The duplicate request, holding its own Writer permit."""
+    async with _limiter("writer", WRITER_CONCURRENCY):
+        return await Runner.run(agent, prompt, run_config=config)
+
+
+async def _run_hedged(agent, prompt: str):
+    """
+    Run the Writer, adding a duplicate request after the hedge delay; first
+    success wins. The duplicate counts against WRITER_CONCURRENCY like any
+    other call and is skipped when no permit is free.
+    """
+    primary = asyncio.ensure_future(Runner.run(agent, prompt, run_config=config))
+    pending = {primary}
+    try:
+        if WRITER_HEDGE:
+            done, pending = await asyncio.wait(pending, timeout=_hedge_delay())
+            if done:
+                return primary.result()
+            if not _limiter("writer", WRITER_CONCURRENCY).locked():
+                writer_call_stats["hedges"] += 1
+                pending.add(asyncio.ensure_future(_run_hedge(agent, prompt)))
+
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        writer_call_stats["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def run_writer(agent, prompt: str):
+    """
+    Run a Writer call under a per-call deadline, retrying retryable errors
+    (timeouts, connection errors, rate limits, 5xx) with full-jitter backoff.
+    A rate limit waits at least its Retry-After, and is not retried when
+    that is longer than WRITER_BACKOFF_MAX_S.
+    """
+    for attempt in range(WRITER_MAX_RETRIES + 1):
+        writer_call_stats["calls"] += 1
+        try:
+            async with _limiter("writer", WRITER_CONCURRENCY):
+                started = time.perf_counter()
+                with metrics.in_flight.track(kind="writer_calls"), tracing.span("writer_call", attempt=attempt):
+                    result = await asyncio.wait_for(_run_hedged(agent, prompt), WRITER_TIMEOUT_S)
+                _writer_latencies.append(time.perf_counter() - started)
+            return result
+        except _RETRYABLE_ERRORS as e:
+            if isinstance(e, TimeoutError):
+                writer_call_stats["timeouts"] += 1
+            if attempt == WRITER_MAX_RETRIES:
+                raise
+            delay = random.uniform(0, min(WRITER_BACKOFF_MAX_S, WRITER_BACKOFF_BASE_S * 2 ** attempt))
+            retry_after = _retry_after(e) if isinstance(e, openai.RateLimitError) else None
+            if retry_after is not None:
+                if retry_after > WRITER_BACKOFF_MAX_S:
+                    raise
+                delay = max(delay, retry_after)
+            writer_call_stats["retries"] += 1
+            logger.warning("Writer call failed (%s), retrying in %.1fs", type(e).__name__, delay)
+            await asyncio.sleep(delay)
+
+
+# ================================================================================
+#                         SOURCE CIRCUIT BREAKERS
+# ================================================================================
+
+SOURCE_BREAKER_FAILURE_RATE = float(os.getenv("SOURCE_BREAKER_FAILURE_RATE", "0.5"))
+SOURCE_BREAKER_WINDOW = int(os.getenv("SOURCE_BREAKER_WINDOW", "10"))
+SOURCE_BREAKER_MIN_CALLS = int(os.getenv("SOURCE_BREAKER_MIN_CALLS", "3"))
+SOURCE_BREAKER_SLOW_S = float(os.getenv("SOURCE_BREAKER_SLOW_S", "10"))
+SOURCE_BREAKER_COOLDOWN_S = float(os.getenv("SOURCE_BREAKER_COOLDOWN_S", "120"))
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker for one source adapter.
+    Opens when the share of failed or slow fetches in the rolling window
+    reaches the failure threshold; after the cooldown a single trial fetch
+    is let through (half-open) and its outcome closes or re-opens it.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_rate: float = None, window: int = None, min_calls: int = None,
+                 slow_call_s: float = None, cooldown_s: float = None):
+        self.name = name
+        self.failure_rate = SOURCE_BREAKER_FAILURE_RATE if failure_rate is None else failure_rate
+        self.min_calls = SOURCE_BREAKER_MIN_CALLS if min_calls is None else min_calls
+        self.slow_call_s = SOURCE_BREAKER_SLOW_S if slow_call_s is None else slow_call_s
+        self.cooldown_s = SOURCE_BREAKER_COOLDOWN_S if cooldown_s is None else cooldown_s
+        self.outcomes = deque(maxlen=SOURCE_BREAKER_WINDOW if window is None else window)  # True = bad call
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+        self.last_latency_s = None
+        self.last_error = None
+
+    def allow(self) -> bool:
+        """Whether a fetch may go ahead now."""
+        now = time.monotonic()
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and now - self.opened_at < self.cooldown_s:
+            return False
+        # Half-open: one trial at a time (a trial lost to cancellation expires after the cooldown)
+        if self.state == self.HALF_OPEN and now - self.trial_started < self.cooldown_s:
+            return False
+        self.state = self.HALF_OPEN
+        self.trial_started = now
+        return True
+
+    def record_success(self, latency_s: float):
+        self.last_latency_s = latency_s
+        if latency_s > self.slow_call_s:
+            self.record_failure(f"slow fetch ({latency_s:.1f}s)")
+            return
+        self.outcomes.append(False)
+        if self.state == self.HALF_OPEN:
+            self.state = self.CLOSED
+            self.outcomes.clear()
+
+    def record_failure(self, error: str = None):
+        self.last_error = error
+        self.outcomes.append(True)
+        bad = sum(self.outcomes)
+        if self.state == self.HALF_OPEN or (
+            len(self.outcomes) >= self.min_calls and bad / len(self.outcomes) >= self.failure_rate
+        ):
+            if self.state != self.OPEN:
+                logger.warning("Circuit opened: %s", error, extra={"source": self.name})
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "failure_rate": round(sum(self.outcomes) / len(self.outcomes), 2) if self.outcomes else 0.0,
+            "calls": len(self.outcomes),
+            "last_latency_s": round(self.last_latency_s, 3) if self.last_latency_s is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+# Breaker per source name, and the last articles each source produced
+source_breakers = {}
+_last_good_articles = {}
+
+
+def get_breaker(source_name: str) -> CircuitBreaker:
+    if source_name not in source_breakers:
+        source_breakers[source_name] = CircuitBreaker(source_name)
+    return source_breakers[source_name]
+
+
+def source_health() -> dict:
+    """Breaker state per source, for /health."""
+    return {name: breaker.snapshot() for name, breaker in source_breakers.items()}
+
+
+# ================================================================================
+#                              ORCHESTRATION
+# ================================================================================
+
+# Writer output for items that carry a stable `cache_key` (e.g. a Wikipedia
+# revision), so unchanged source content never pays for another LLM call.
+WRITTEN_ARTICLE_CACHE_SIZE = 256
+_written_articles = {}
+
+
+def _remember_article(cache_key: str, article: dict):
+    """Store a Writer article for reuse, evicting the oldest beyond the cap."""
+    _written_articles[cache_key] = copy.deepcopy(article)
+    while len(_written_articles) > WRITTEN_ARTICLE_CACHE_SIZE:
+        del _written_articles[next(iter(_written_articles))]
+
+
+# Items sent to the Writer per request; 1 keeps the one-call-per-item mode
+WRITER_BATCH_SIZE = int(os.getenv("WRITER_BATCH_SIZE", "1"))
+
+
+def _parse_writer_output(output) -> tuple:
+    """
+    Decode Writer output into an article dict or list of them.
+    Returns (value, salvaged) where value is None if nothing could be decoded.
+    """
+    if isinstance(output, BaseModel):
+        return output.model_dump(), False
+    text = output.strip()
+    if text.startswith("```"):
+        text = re.sub(r'^```\w*\n?', '', text)
+        text = re.sub(r'\n?```$', '', text)
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        repaired = repair_json(text)
+        return repaired, repaired is not None
+
+
+def _attach_images(article: dict, item: dict, source_name: str):
+    """Add the source item's image directly (skip Image Agent for now to avoid errors)."""
+    images = []
+    if item.get('thumbnail'):
+        images.append({"url": item['thumbnail'], "alt": article.get('meta_title', ''), "source": source_name, "generated": False})
+    elif item.get('images'):
+        for img_url in item.get('images', [])[:1]:
+            images.append({"url": img_url, "alt": article.get('meta_title', ''), "source": source_name, "generated": False})
+    article['images'] = images
+
+
+def _merge_into_story(story, source_name: str, item: dict) -> dict:
+    """The story's article with the item added as a source link (video and image too), without a Writer call."""
+    article = copy.deepcopy(story.article)
+    title = clean_text(item.get('title', ''))
+    url = item.get('url', item.get('link', ''))
+    article.setdefault('source_links', []).append({"title": title, "url": url, "source": source_name})
+    if 'youtube.com' in url:
+        article.setdefault('video_links', []).append(
+            {"title": title, "url": url, "source": source_name, "published": item.get('published', '')})
+    added = {"meta_title": article.get('meta_title', '')}
+    _attach_images(added, item, source_name)
+    article['images'] = article.get('images', []) + added['images']
+    story_clusters.assign(source_name, item, article, merged=True, story=story)
+    metrics.story_items.inc(source=source_name, result="merged")
+    return article
+
+
+def _record_writer_usage(source_name: str, writer_result, prompt: str):
+    """Count Writer tokens, falling back to the local estimate if the provider reports none."""
+    usage = getattr(getattr(writer_result, "context_wrapper", None), "usage", None)
+    input_tokens, output_tokens = (getattr(usage, field, 0) for field in ("input_tokens", "output_tokens"))
+    if not isinstance(input_tokens, int) or not input_tokens:
+        input_tokens = estimate_tokens(prompt)
+    if not isinstance(output_tokens, int) or not output_tokens:
+        output = writer_result.final_output
+        output_tokens = estimate_tokens(output) if isinstance(output, str) else 0
+    metrics.writer_tokens.inc(input_tokens, source=source_name, direction="input")
+    metrics.writer_tokens.inc(output_tokens, source=source_name, direction="output")
+
+
+async def _write_article(source_name: str, item: dict) -> dict | None:
+    """
+    Run the Writer on a single item. A reply that cannot be parsed or validated
+    is retried on its own, up to WRITER_PARSE_RETRIES times. Returns None if it fails.
+    """
+    writer_prompt = build_writer_prompt(source_name, item)
+    logger.info("Writing article, input tokens: ~%d", estimate_tokens(writer_prompt))
+    agent = structured_writer if WRITER_STRUCTURED_OUTPUT else writer
+    prompt = writer_prompt
+
+    for attempt in range(WRITER_PARSE_RETRIES + 1):
+        if attempt:
+            writer_parse_stats["retries"] += 1
+        started = time.perf_counter()
+        try:
+            with metrics.stage_seconds.time(source=source_name, stage="writer"):
+                writer_result = await run_writer(agent, prompt)
+            _record_writer_usage(source_name, writer_result, prompt)
+            writer_parse_stats["replies"] += 1
+            with metrics.stage_seconds.time(source=source_name, stage="parse"):
+                data, salvaged = _parse_writer_output(writer_result.final_output)
+                article = _validate_article(data)
+            if article is not None:
+                if salvaged:
+                    writer_parse_stats["salvaged"] += 1
+                    logger.info("Salvaged malformed Writer JSON")
+                return article
+            error = "reply is not a valid article"
+        except ModelBehaviorError as e:
+            writer_parse_stats["replies"] += 1
+            error = str(e)
+        except Exception as e:
+            logger.error("Writer error: %s", e)
+            return None
+
+        writer_parse_stats["parse_failures"] += 1
+        writer_parse_stats["wasted_seconds"] += time.perf_counter() - started
+        logger.warning("Writer parse error (attempt %d): %s", attempt + 1, error)
+        prompt = writer_prompt + "\nYour previous reply could not be parsed. Output ONLY one complete JSON object."
+    return None
+
+
+async def _write_batch(source_name: str, items: list) -> list:
+    """
+    Run the Writer once for several items, expecting a JSON array with one
+    article per item in the same order. Entries that are missing or invalid
+    come back as None so only those items are retried one by one.
+    """
+    sections = [f"### Item {idx}\n{build_writer_prompt(source_name, item).strip()}"
+                for idx, item in enumerate(items, 1)]
+    batch_prompt = (
+        f"Write one article for EACH of the {len(items)} items below.\n"
+        f"Return a JSON array of exactly {len(items)} article objects, in item order.\n\n"
+        + "\n\n".join(sections)
+    )
+    logger.info("Writing batch of %d, input tokens: ~%d", len(items), estimate_tokens(batch_prompt))
+    started = time.perf_counter()
+    try:
+        with metrics.stage_seconds.time(source=source_name, stage="writer"):
+            writer_result = await run_writer(writer, batch_prompt)
+    except Exception as e:
+        logger.error("Batch Writer error, falling back to per-item calls: %s", e)
+        return [None] * len(items)
+
+    _record_writer_usage(source_name, writer_result, batch_prompt)
+    writer_parse_stats["replies"] += 1
+    with metrics.stage_seconds.time(source=source_name, stage="parse"):
+        batch, salvaged = _parse_writer_output(writer_result.final_output)
+        if not isinstance(batch, list):
+            batch = []
+        written = [_validate_article(data) for data in batch[:len(items)]]
+    written += [None] * (len(items) - len(written))
+
+    if None in written:
+        writer_parse_stats["parse_failures"] += 1
+        writer_parse_stats["wasted_seconds"] += (time.perf_counter() - started) * written.count(None) / len(items)
+        logger.warning("Batch returned %d/%d valid articles", len(items) - written.count(None), len(items))
+    elif salvaged:
+        writer_parse_stats["salvaged"] += 1
+    return written
+
+
+def _accepts_max_items(fetch_function) -> bool:
+    """Fetchers that take `max_items` read only what the edition uses."""
+    try:
+        return "max_items" in inspect.signature(fetch_function).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+async def process_source_to_article(source_name: str, fetch_function, max_items: int = 3, batch_size: int = None,
+                                    collected: list = None, concurrency: int = 1,
+                                    poll_interval_s: float = None) -> list:
+    """
+    Fetch news from a source, then pass each result to Writer agent to create articles.
+    With batch_size > 1, several items share one Writer call; with
+    concurrency > 1, that many Writer calls of this source run in parallel.
+    With poll_interval_s the source is polled by the adaptive scheduler:
+    until it is due again, its last articles are served without fetching.
+    Articles are appended to `collected` as soon as they are ready, so a
+    caller that cancels this coroutine keeps everything finished so far.
+    Returns list of formatted articles.
+    """
+    if batch_size is None:
+        batch_size = WRITER_BATCH_SIZE
+    batch_size = max(1, batch_size)
+    articles = [] if collected is None else collected
+
+    with tracing.bind(source=source_name), tracing.span("source", max_items=max_items):
+        try:
+            # Step 1: Skip sources polled recently enough for their publish rate. Checked
+            # before the breaker, so a half-open trial is only taken by a fetch that happens.
+            scheduled = poll_interval_s is not None
+            if scheduled:
+                poll_scheduler.register(source_name, poll_interval_s)
+                if not poll_scheduler.is_due(source_name) and source_name in _last_good_articles:
+                    stale = copy.deepcopy(_last_good_articles[source_name])
+                    logger.info("Not due for polling, serving %d cached articles", len(stale))
+                    metrics.source_polls.inc(source=source_name, result="skipped")
+                    articles.extend(stale)
+                    return articles
+
+            # Skip sources whose circuit is open, serving their last good articles
+            breaker = get_breaker(source_name)
+            if not breaker.allow():
+                stale = copy.deepcopy(_last_good_articles.get(source_name, []))
+                logger.info("Circuit open, serving %d cached articles", len(stale))
+                articles.extend(stale)
+                return articles
+
+            # Step 2: Call the (blocking) fetch function off the event loop
+            logger.info("Fetching news...")
             try:
-                print(f"[{source_name}] Writing article {idx}/{len(news_items)}...")
-                writer_result = await Runner.run(writer, writer_prompt, run_config=config)
-                article_json = writer_result.final_output.strip()
-                
-                # Clean and parse
-                if article_json.startswith("```"):
-                    article_json = re.sub(r'^```\w*\n?', '', article_json)
-                    article_json = re.sub(r'\n?```$', '', article_json)
-                
-                article = json.loads(article_json)
-                
-                # Add images directly (skip Image Agent for now to avoid errors)
-                images = []
-                if item.get('thumbnail'):
-                    images.append({"url": item['thumbnail'], "alt": article.get('meta_title', ''), "source": source_name, "generated": False})
-                elif item.get('images'):
-                    for img_url in item.get('images', [])[:1]:
-                        images.append({"url": img_url, "alt": article.get('meta_title', ''), "source": source_name, "generated": False})
-                
-                article['images'] = images
-                articles.append(article)
-                print(f"[{source_name}] ✓ Article created: {article.get('meta_title', '')[:50]}...")
-                
+                async with _limiter("fetch", SOURCE_FETCH_CONCURRENCY):
+                    # Timed from here so waiting for a fetch slot is not blamed on the source
+                    started = time.perf_counter()
+                    with tracing.span("fetch"):
+                        if _accepts_max_items(fetch_function):
+                            raw_data = await _run_fetch(fetch_function, max_items=max_items)
+                        else:
+                            raw_data = await _run_fetch(fetch_function)
             except Exception as e:
-                print(f"[{source_name}] Writer error: {e}")
-                continue
-                
-    except Exception as e:
-        print(f"[{source_name}] Agent error: {e}")
-    
+                breaker.record_failure(str(e))
+                if scheduled:
+                    poll_scheduler.record_failure(source_name)
+                    metrics.source_polls.inc(source=source_name, result="error")
+                raise
+
+            metrics.stage_seconds.observe(time.perf_counter() - started, source=source_name, stage="fetch")
+            if isinstance(raw_data, dict) and "error" in raw_data:
+                breaker.record_failure(str(raw_data["error"]))
+            elif isinstance(raw_data, (dict, list)):
+                breaker.record_success(time.perf_counter() - started)
+            else:
+                breaker.record_failure(f"unexpected data type {type(raw_data).__name__}")
+
+            # Handle different return types
+            if isinstance(raw_data, dict):
+                if "error" in raw_data:
+                    logger.error("Error: %s", raw_data['error'])
+                    if scheduled:
+                        poll_scheduler.record_failure(source_name)
+                        metrics.source_polls.inc(source=source_name, result="error")
+                    return articles
+                news_items = [raw_data]
+            elif isinstance(raw_data, list):
+                news_items = raw_data[:max_items]
+            else:
+                logger.error("Unexpected data type: %s", type(raw_data))
+                return articles
+
+            # Replace news.google.com redirect links with the publisher URLs
+            redirects = sum(1 for item in news_items if is_redirect_link(item.get('link', '')))
+            if redirects:
+                with tracing.span("resolve", links=redirects):
+                    resolved = await url_resolver.resolve_items(news_items)
+                logger.info("Resolved %d/%d redirect links", resolved, redirects)
+
+            logger.info("Processing %d items...", len(news_items))
+
+            if scheduled:
+                # Key feed items by identity, so items seen in an earlier poll reuse their article
+                for item in news_items:
+                    item.setdefault('cache_key', f"{source_name}:{tracing.item_id_for(item)}")
+                interval = poll_scheduler.record_poll(source_name, news_items, lambda item: item['cache_key'])
+                metrics.source_polls.inc(source=source_name, result="polled")
+                logger.info("Next poll in %.0fs", interval)
+
+            # Step 3: Reuse articles for unchanged items, queue the rest for the Writer
+            pending = []
+            for idx, item in enumerate(news_items, 1):
+                cache_key = item.get('cache_key')
+                if cache_key:
+                    metrics.cache_requests.inc(cache="writer_article", result="hit" if cache_key in _written_articles else "miss")
+                if cache_key and cache_key in _written_articles:
+                    articles.append(copy.deepcopy(_written_articles[cache_key]))
+                    logger.info("✓ Reused article %d/%d (unchanged source)", idx, len(news_items))
+                    continue
+                # A new publisher on a story already written only adds a source link
+                story = story_clusters.merge_target(item)
+                if story is not None:
+                    article = _merge_into_story(story, source_name, item)
+                    if cache_key:
+                        _remember_article(cache_key, article)
+                    articles.append(article)
+                    logger.info("✓ Merged item %d/%d into story: %s...", idx, len(news_items), story.title[:50])
+                    continue
+                pending.append(item)
+
+            # Step 4: Call Writer agent per batch, falling back to one call per item
+            async def write_chunk(chunk: list):
+                if len(chunk) > 1:
+                    with tracing.span("write_batch", items=len(chunk)):
+                        written = await _write_batch(source_name, chunk)
+                else:
+                    written = [None]
+                for pos, item in enumerate(chunk):
+                    if written[pos] is None:
+                        with tracing.bind(item_id=tracing.item_id_for(item)), tracing.span("write_article"):
+                            written[pos] = await _write_article(source_name, item)
+
+                for item, article in zip(chunk, written):
+                    if article is None:
+                        continue
+                    _attach_images(article, item, source_name)
+                    story = story_clusters.assign(source_name, item, article)
+                    metrics.story_items.inc(source=source_name, result="joined" if story.size > 1 else "new")
+                    if item.get('cache_key'):
+                        _remember_article(item['cache_key'], article)
+                    articles.append(article)
+                    logger.info("✓ Article created: %s...", article.get('meta_title', '')[:50])
+
+            chunks = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+            if concurrency > 1:
+                slots = asyncio.Semaphore(concurrency)
+
+                async def write_limited(chunk: list):
+                    async with slots:
+                        await write_chunk(chunk)
+
+                await asyncio.gather(*(write_limited(chunk) for chunk in chunks))
+            else:
+                for chunk in chunks:
+                    await write_chunk(chunk)
+
+            if articles:
+                _last_good_articles[source_name] = copy.deepcopy(articles)
+
+        except Exception as e:
+            logger.error("Agent error: %s", e)
+
     return articles
 
 
-async def ai_desk():
+# ================================================================================
+#                               SOURCE REGISTRY
+# ================================================================================
+
+# Source type in sources.json -> fetch function for one configured source
+SOURCE_ADAPTERS = {
+    "rss": lambda source: partial(_fetch_feed, source.url),
+    "youtube": lambda source: partial(_fetch_youtube, source.query),
+    "wikipedia": lambda source: partial(_fetch_wikipedia, source.topic),
+}
+
+
+class EditionSource(NamedTuple):
+    """A source as the edition runs it. Plain (name, fetch, max_items) tuples work too."""
+    name: str
+    fetch: Callable
+    max_items: int
+    priority: int = 100
+    concurrency: int = 1
+    poll_interval_s: float = 900
+
+
+def build_edition_sources(configs: list[SourceConfig]) -> list[EditionSource]:
+    """Enabled sources with their adapters, highest priority (lowest number) first."""
+    return [
+        EditionSource(source.name, SOURCE_ADAPTERS[source.type](source), source.max_items,
+                      source.priority, source.concurrency, source.poll_interval_s)
+        for source in sorted(configs, key=lambda source: source.priority)
+        if source.enabled
+    ]
+
+
+EDITION_SOURCES = build_edition_sources(load_sources())
+
+
+async def ai_desk(deadline_ms: int = None, status: dict = None):
     """
     Main orchestration function.
     Fetches news from all sources, creates articles via Writer, deduplicates.
+    With `deadline_ms`, Writer work still running when the budget expires is
+    cancelled and the edition is built from whatever finished. If a `status`
+    dict is passed it is filled with `partial`, `elapsed_ms` and a per-source
+    `sources` breakdown.
     Returns array of articles.
     """
-    # Clear cache for fresh run
-    article_cache.clear()
-    print("Starting AI Desk news generation...")
+    with metrics.in_flight.track(kind="editions"), tracing.bind(run_id=tracing.new_run_id()):
+        with tracing.span("edition", deadline_ms=deadline_ms):
+            return await _run_edition(deadline_ms, status)
+
+
+# Index compaction runs here between editions, off the request path
+_compaction_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-desk-compact")
+_compaction = None
+
+
+async def _finish_compaction():
+    """Wait for the previous edition's compaction before touching the cache again."""
+    global _compaction
+    if _compaction is not None:
+        future, _compaction = _compaction, None
+        await asyncio.wrap_future(future)
+
+
+async def _run_edition(deadline_ms: int, status: dict) -> list:
+    global _compaction
+    # Articles carry over from earlier editions, within the retention limits
+    await _finish_compaction()
+    logger.info("Starting AI Desk news generation...")
+    started = time.perf_counter()
     
     # Run all source fetchers concurrently
-    tasks = [
-        process_source_to_article("YouTube", _fetch_youtube_videos, max_items=2),
-        process_source_to_article("Google", _fetch_google_ai_news, max_items=3),
-        process_source_to_article("Forbes", _fetch_forbes_ai_news, max_items=2),
-        process_source_to_article("Wikipedia", _fetch_wikipedia_ai_content, max_items=1),
-    ]
+    collected = {source[0]: [] for source in EDITION_SOURCES}
+    tasks = {}
+    for source in EDITION_SOURCES:
+        name, fetch_function, max_items = source[:3]
+        tasks[name] = asyncio.ensure_future(process_source_to_article(
+            name, fetch_function, max_items=max_items, collected=collected[name],
+            concurrency=getattr(source, "concurrency", 1),
+            poll_interval_s=getattr(source, "poll_interval_s", None),
+        ))
     
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    timeout = deadline_ms / 1000 if deadline_ms else None
+    _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning("Deadline of %dms reached, cancelling %d source(s)", deadline_ms, len(pending))
+        await asyncio.gather(*pending, return_exceptions=True)
     
     # Process results and deduplicate
-    for result in results:
-        if isinstance(result, Exception):
-            print(f"Task error: {result}")
-            continue
-        if isinstance(result, list):
-            for article in result:
-                article_cache.add_or_merge(article)
+    sources = {}
+    for name, task in tasks.items():
+        if task in pending:
+            state = "timeout"
+        elif task.exception() is not None:
+            logger.error("Task error: %s", task.exception(), extra={"source": name})
+            state = "error"
+        else:
+            state = "ok" if collected[name] else "empty"
+        sources[name] = {"status": state, "articles": len(collected[name])}
+        with metrics.stage_seconds.time(source=name, stage="merge"), tracing.bind(source=name), tracing.span("merge"):
+            article_cache.add_batch(collected[name])
+
+    report = writer_parse_report()
+    logger.info("Writer replies: %d, parse failure rate: %.0f%%, salvaged: %d, wasted: %.1fs",
+                report['replies'], report['parse_failure_rate'] * 100, report['salvaged'], report['wasted_seconds'])
+
+    elapsed = time.perf_counter() - started
+    metrics.stage_seconds.observe(elapsed, source="all", stage="edition")
+    if status is not None:
+        status.update({
+            "partial": bool(pending),
+            "elapsed_ms": round(elapsed * 1000),
+            "sources": sources,
+        })
     
+    evicted = article_cache.evict()
+    if evicted:
+        logger.info("Evicted %d articles, %d kept", len(evicted), len(article_cache.articles))
+    articles = article_cache.get_all()
+    if article_cache.needs_compaction():
+        _compaction = _compaction_executor.submit(article_cache.compact)
+    for article in articles:
+        if article.get("story_id"):
+            article["story_id"] = story_clusters.resolve(article["story_id"])
+    if status is not None:
+        status["stories"] = story_clusters.threads({article.get("story_id") for article in articles})
+
     # Return all articles
-    return article_cache.get_all()
+    return articles
+
+
+# ================================================================================
+#                    DESK STATE SHARED BETWEEN WORKERS
+# ================================================================================
+
+# What the edition leader hands to the next one: retained articles, story threads,
+# poll schedule and the Writer/source reuse caches
+DESK_STATE_FILE = os.getenv("DESK_STATE_FILE", os.path.join(EDITION_STORE_DIR, "desk_state.pickle"))
+_DESK_STATE_VERSION = 1
+
+
+class DeskState:
+    """
+    The pipeline state that carries over between editions, saved by the
+    worker that generated the last edition and loaded by the next leader
+    when another worker wrote it since, so under `--workers N` every edition
+    continues the same article store, story threads and poll schedule.
+    The file is a pickle, so it is only read when this user owns it and
+    nobody else can write it or its directory.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = DESK_STATE_FILE if path is None else path
+        self._signature = None  # file this process last wrote or loaded
+
+    @staticmethod
+    def _signature_of(stat) -> tuple:
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _trusted(self, stat) -> bool:
+        directory = os.stat(os.path.dirname(self.path) or ".")
+        return all(entry.st_uid == os.getuid() and not entry.st_mode & 0o022 for entry in (stat, directory))
+
+    def save(self):
+        """Write this process's state (between editions: the leader holds the edition lock)."""
+        if not self.path:
+            return
+        state = pickle.dumps({
+            "version": _DESK_STATE_VERSION,
+            "articles": article_cache,
+            "stories": story_clusters,
+            "polling": poll_scheduler,
+            "written": _written_articles,
+            "last_good": _last_good_articles,
+            "wikipedia": _wikipedia_cache,
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".desk-", suffix=".pickle", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(state)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._signature = self._signature_of(os.stat(self.path))
+
+    def load(self) -> bool:
+        """Adopt the saved state if another process wrote it since. Returns True if it was loaded."""
+        if not self.path:
+            return False
+        try:
+            stat = os.stat(self.path)
+            if self._signature_of(stat) == self._signature:
+                return False
+            if not self._trusted(stat):
+                logger.warning("Ignoring desk state %s: not owned by this user or writable by others", self.path)
+                return False
+            with open(self.path, "rb") as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning("Unreadable desk state, keeping this worker's own: %s", e)
+            return False
+        if state.get("version") != _DESK_STATE_VERSION:
+            return False
+        for target, loaded in ((article_cache, state["articles"]), (story_clusters, state["stories"]),
+                               (poll_scheduler, state["polling"])):
+            with target._lock:
+                target.__dict__.update(loaded.__getstate__())
+        for target, loaded in ((_written_articles, state["written"]), (_last_good_articles, state["last_good"]),
+                               (_wikipedia_cache, state["wikipedia"])):
+            target.clear()
+            target.update(loaded)
+        self._signature = self._signature_of(stat)
+        logger.info("Loaded desk state: %d articles, %d stories", len(article_cache.articles), len(story_clusters))
+        return True
+
+
+desk_state = DeskState()
+
+
+async def load_desk_state() -> bool:
+    """Before an edition: continue from the last leader's state."""
+    await _finish_compaction()
+    return await asyncio.to_thread(desk_state.load)
+
+
+async def save_desk_state():
+    """After an edition: hand the state to the next leader (a pending compaction is finished first)."""
+    await _finish_compaction()
+    try:
+        await asyncio.to_thread(desk_state.save)
+    except (OSError, pickle.PicklingError) as e:
+        logger.warning("Could not save desk state: %s", e)
 
 
 # Run the AI Desk
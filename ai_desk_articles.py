@@ -0,0 +1,149 @@
+"""
+Compact in-memory representation of articles.
+
+The Writer's JSON (a dict of lists of dicts) is converted once, when an
+article enters the ArticleCache, into slotted dataclasses: no per-instance
+__dict__, tuples instead of lists for fields that are never appended to,
+and interned strings for the values that repeat across thousands of
+articles (source names, tags). `to_dict()` turns an article back into the
+existing JSON shape at the API boundary.
+"""
+import sys
+from dataclasses import dataclass, field
+
+from ai_desk_urls import canonical_url
+
+_intern = sys.intern
+
+# Keys of the Writer's article JSON, in output order
+ARTICLE_FIELDS = ("meta_title", "meta_description", "meta_image_prompt", "alt_text", "slug")
+
+
+def _text(value) -> str:
+    return value if isinstance(value, str) else ("" if value is None else str(value))
+
+
+@dataclass(slots=True, frozen=True)
+class Link:
+    """A source or video link. `published` is only set (and only emitted) for videos."""
+    url: str
+    title: str = ""
+    source: str = ""
+    published: str | None = None
+    _key: str | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def key(self) -> str:
+        """Merge key: the canonical URL (the title for links without one), computed once."""
+        if self._key is None:
+            object.__setattr__(self, "_key", canonical_url(self.url) if self.url else self.title)
+        return self._key
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Link":
+        published = data.get("published")
+        return cls(_text(data.get("url")), _text(data.get("title")), _intern(_text(data.get("source"))),
+                   None if published is None else _text(published))
+
+    def to_dict(self) -> dict:
+        data = {"title": self.title, "url": self.url, "source": self.source}
+        if self.published is not None:
+            data["published"] = self.published
+        return data
+
+
+@dataclass(slots=True, frozen=True)
+class Image:
+    url: str
+    alt: str = ""
+    source: str = ""
+    generated: bool = False
+    _key: str | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def key(self) -> str:
+        if self._key is None:
+            object.__setattr__(self, "_key", canonical_url(self.url))
+        return self._key
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Image":
+        return cls(_text(data.get("url")), _text(data.get("alt")), _intern(_text(data.get("source"))),
+                   bool(data.get("generated", False)))
+
+    def to_dict(self) -> dict:
+        return {"url": self.url, "alt": self.alt, "source": self.source, "generated": self.generated}
+
+
+@dataclass(slots=True, frozen=True)
+class Section:
+    heading: str
+    paragraphs: tuple
+
+    @classmethod
+    def from_dict(cls, data) -> "Section":
+        if isinstance(data, str):
+            return cls("", (data,))
+        paragraphs = data.get("paragraphs", ())
+        if isinstance(paragraphs, str):
+            paragraphs = (paragraphs,)
+        return cls(_text(data.get("heading")), tuple(_text(p) for p in paragraphs))
+
+    def to_dict(self) -> dict:
+        return {"heading": self.heading, "paragraphs": list(self.paragraphs)}
+
+
+@dataclass(slots=True)
+class Article:
+    """
+    One article as the cache keeps it. Links, images and tags are tuples
+    that merging replaces rather than mutates; `extra` holds any keys the
+    Writer schema does not know, so nothing is lost on the way back out.
+    """
+    meta_title: str = ""
+    meta_description: str = ""
+    meta_image_prompt: str = ""
+    alt_text: str = ""
+    slug: str = ""
+    tags: tuple = ()
+    content: tuple = ()
+    source_links: tuple = ()
+    video_links: tuple = ()
+    images: tuple = ()
+    id: str | None = None
+    timestamp: str | None = None
+    published: str | None = None
+    extra: dict | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Article":
+        known = {*ARTICLE_FIELDS, "tags", "content", "source_links", "video_links", "images",
+                 "id", "timestamp", "published"}
+        extra = {key: value for key, value in data.items() if key not in known}
+        return cls(
+            *(_text(data.get(name)) for name in ARTICLE_FIELDS),
+            tags=tuple(_intern(_text(tag)) for tag in data.get("tags") or ()),
+            content=tuple(Section.from_dict(section) for section in data.get("content") or ()),
+            source_links=tuple(Link.from_dict(link) for link in data.get("source_links") or () if isinstance(link, dict)),
+            video_links=tuple(Link.from_dict(link) for link in data.get("video_links") or () if isinstance(link, dict)),
+            images=tuple(Image.from_dict(image) for image in data.get("images") or () if isinstance(image, dict)),
+            id=data.get("id"),
+            timestamp=data.get("timestamp"),
+            published=data.get("published"),
+            extra=extra or None,
+        )
+
+    def to_dict(self) -> dict:
+        """The article in the API's JSON shape."""
+        data = {name: getattr(self, name) for name in ARTICLE_FIELDS}
+        data["tags"] = list(self.tags)
+        data["content"] = [section.to_dict() for section in self.content]
+        data["source_links"] = [link.to_dict() for link in self.source_links]
+        data["video_links"] = [link.to_dict() for link in self.video_links]
+        data["images"] = [image.to_dict() for image in self.images]
+        if self.extra:
+            data.update(self.extra)
+        for name in ("id", "timestamp", "published"):
+            if getattr(self, name) is not None:
+                data[name] = getattr(self, name)
+        return data
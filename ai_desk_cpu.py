@@ -0,0 +1,243 @@
+"""
+CPU-bound pipeline stages and the process pool they run in.
+
+Feed parsing (feedparser sanitizes HTML and parses dates in pure Python)
+and HTML cleanup hold the GIL, so in a thread they still slow down the
+event loop that serves the API. They run in a pool of worker processes
+instead: raw feed bytes go in, compact records of plain strings come back.
+This module is imported by the workers, so it stays free of the agents SDK
+and of pipeline state.
+"""
+import os
+import re
+import html
+import atexit
+import asyncio
+import threading
+import multiprocessing
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import feedparser
+
+# Worker processes for CPU-bound stages; 0 runs them in the calling thread
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", "2"))
+
+_BLOCK_TAG_RE = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def clean_text(text: str) -> str:
+    """Strip HTML markup and entities and collapse whitespace."""
+    if not text:
+        return ""
+    text = _BLOCK_TAG_RE.sub(' ', text)
+    text = _TAG_RE.sub(' ', text)
+    text = html.unescape(text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def parse_feed(data: bytes, max_items: int = 10) -> list:
+    """Parse RSS/Atom bytes into at most `max_items` records with cleaned text fields."""
+    feed = feedparser.parse(data)
+    records = []
+    for entry in feed.entries[:max_items]:
+        records.append({
+            "title": clean_text(entry.get("title", "")),
+            "link": entry.get("link", ""),
+            "summary": clean_text(entry.get("summary", "")),
+            "published": entry.get("published", ""),
+        })
+    return records
+
+
+# ================================================================================
+#                              STREAMING FEED PARSER
+# ================================================================================
+
+def _local(tag: str) -> str:
+    """Tag name without its XML namespace."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _child_text(element, *names) -> str:
+    """Text of the first direct child named like the earliest name that has text."""
+    texts = {}
+    for child in element:
+        name = _local(child.tag)
+        if name in names and name not in texts and child.text and child.text.strip():
+            texts[name] = child.text
+    return next((texts[name] for name in names if name in texts), "")
+
+
+def _entry_link(element) -> str:
+    """RSS <link>text</link>, or the Atom alternate <link href=...>."""
+    fallback = ""
+    for child in element:
+        if _local(child.tag) != "link":
+            continue
+        if child.text and child.text.strip():
+            return child.text.strip()
+        href = child.get("href", "")
+        if child.get("rel", "alternate") == "alternate" and href:
+            return href
+        fallback = fallback or href
+    return fallback
+
+
+class FeedStreamParser:
+    """
+    Incremental RSS/Atom parser for well-formed feeds. Bytes are fed as they
+    arrive and parsing stops as soon as `max_items` entries are complete, so
+    the rest of the feed is neither downloaded nor parsed. `failed` is set
+    when the input is not well-formed XML or not RSS/Atom; the caller then
+    falls back to feedparser.
+    """
+
+    ENTRY_TAGS = ("item", "entry")
+
+    def __init__(self, max_items: int = 10):
+        self.max_items = max_items
+        self.records = []
+        self.done = False
+        self.failed = False
+        self._parser = ElementTree.XMLPullParser(events=("start", "end"))
+        self._root = None
+
+    def _record(self, element) -> dict:
+        return {
+            "title": clean_text(_child_text(element, "title")),
+            "link": _entry_link(element),
+            "summary": clean_text(_child_text(element, "description", "summary", "content")),
+            "published": _child_text(element, "pubDate", "published", "updated", "date").strip(),
+        }
+
+    def _drain(self):
+        for event, element in self._parser.read_events():
+            tag = _local(element.tag)
+            if event == "start":
+                if self._root is None:
+                    self._root = tag
+                    if tag not in ("rss", "feed", "RDF"):
+                        self.failed = True
+                        return
+                continue
+            if tag in self.ENTRY_TAGS:
+                self.records.append(self._record(element))
+                element.clear()
+                if len(self.records) >= self.max_items:
+                    self.done = True
+                    return
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parse another chunk; True once the caller can stop (done or failed)."""
+        if self.done or self.failed:
+            return True
+        try:
+            self._parser.feed(chunk)
+            self._drain()
+        except ElementTree.ParseError:
+            self.failed = True
+        return self.done or self.failed
+
+    def close(self):
+        """End of input: a feed with fewer entries than `max_items` is done here."""
+        if self.done or self.failed:
+            return
+        try:
+            self._parser.close()
+            self._drain()
+        except ElementTree.ParseError:
+            self.failed = True
+            return
+        self.failed = self._root is None
+        self.done = not self.failed
+
+
+def parse_feed_streaming(data: bytes, max_items: int = 10, chunk_size: int = 16 * 1024) -> list | None:
+    """Fast path over bytes already in memory; None when feedparser is needed."""
+    parser = FeedStreamParser(max_items)
+    for start in range(0, len(data), chunk_size):
+        if parser.feed(data[start:start + chunk_size]):
+            break
+    else:
+        parser.close()
+    return None if parser.failed else parser.records
+
+
+# ================================================================================
+#                                  PROCESS POOL
+# ================================================================================
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    if CPU_POOL_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that already runs threads is unsafe
+            _pool = ProcessPoolExecutor(max_workers=CPU_POOL_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def run_cpu(func, *args):
+    """
+    Run `func(*args)` in the process pool and wait for the result. For use
+    from worker threads (e.g. fetchers under asyncio.to_thread), never on
+    the event loop. A pool whose worker died is replaced and the call is
+    run in this thread once.
+    """
+    pool = _get_pool()
+    if pool is None:
+        return func(*args)
+    try:
+        return pool.submit(func, *args).result()
+    except BrokenProcessPool:
+        _reset_pool()
+        return func(*args)
+
+
+async def run_cpu_async(func, *args):
+    """`run_cpu` for coroutines: awaits the pool without blocking the loop."""
+    pool = _get_pool()
+    if pool is None:
+        return await asyncio.to_thread(func, *args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        _reset_pool()
+        return await asyncio.to_thread(func, *args)
+
+
+def warm_up():
+    """Start every worker now, so the first feed parse does not pay for process start-up."""
+    pool = _get_pool()
+    if pool is not None:
+        for future in [pool.submit(os.getpid) for _ in range(CPU_POOL_WORKERS)]:
+            future.result()
+
+
+def shutdown():
+    """Stop the worker processes (also done at interpreter exit)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+atexit.register(shutdown)
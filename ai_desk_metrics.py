@@ -0,0 +1,200 @@
+"""
+Lightweight Prometheus-style metrics for the AI Desk pipeline.
+Counters, gauges and histograms are plain dicts keyed by label values and
+rendered in the Prometheus text exposition format by `render()`.
+"""
+import time
+import threading
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from a cache hit up to a slow LLM call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+_registry = []
+_lock = threading.Lock()
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.values = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(self.label_names, key)} {value}"
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the wrapped block as in flight."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with _lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][idx] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def get(self, **labels) -> dict:
+        return self.values.get(self._key(labels), {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the wrapped block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        for key, series in sorted(self.values.items()):
+            labels = _format_labels(self.label_names, key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                bucket = _format_labels(self.label_names, key, f'le="{bound}"')
+                yield f"{self.name}_bucket{bucket} {cumulative}"
+            bucket = _format_labels(self.label_names, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{bucket} {series['count']}"
+            yield f"{self.name}_sum{labels} {series['sum']}"
+            yield f"{self.name}_count{labels} {series['count']}"
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text format."""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# ================================================================================
+#                               PIPELINE METRICS
+# ================================================================================
+
+stage_seconds = Histogram(
+    "ai_desk_stage_seconds",
+    "Latency of pipeline stages (fetch, writer, parse, merge, edition) per source.",
+    ("source", "stage"),
+)
+writer_tokens = Counter(
+    "ai_desk_writer_tokens_total",
+    "Tokens used by Writer calls, by source and direction (input/output).",
+    ("source", "direction"),
+)
+cache_requests = Counter(
+    "ai_desk_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss).",
+    ("cache", "result"),
+)
+dedup_results = Counter(
+    "ai_desk_dedup_total",
+    "ArticleCache.add_or_merge outcomes (added/merged, url_match when merged on a shared source URL).",
+    ("result",),
+)
+feed_parses = Counter(
+    "ai_desk_feed_parses_total",
+    "Feeds parsed by the streaming fast path or the feedparser fallback.",
+    ("parser",),
+)
+source_polls = Counter(
+    "ai_desk_source_polls_total",
+    "Scheduled source polls by result (polled/skipped/error).",
+    ("source", "result"),
+)
+story_items = Counter(
+    "ai_desk_story_items_total",
+    "Items assigned to story threads (new/joined when written, merged when only a source link was added).",
+    ("source", "result"),
+)
+articles_evicted = Counter(
+    "ai_desk_articles_evicted_total",
+    "Articles dropped from the article store by the retention policy.",
+)
+article_store = Gauge(
+    "ai_desk_article_store",
+    "Articles kept across editions and their serialized size (articles/bytes).",
+    ("kind",),
+)
+in_flight = Gauge(
+    "ai_desk_in_flight",
+    "Work currently in progress (editions, writer_calls).",
+    ("kind",),
+)
+http_request_seconds = Histogram(
+    "ai_desk_http_request_seconds",
+    "Latency of API requests by endpoint.",
+    ("endpoint",),
+)
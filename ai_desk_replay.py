@@ -0,0 +1,421 @@
+"""
+Offline record/replay harness for the AI Desk pipeline.
+
+Replays Google News, Forbes, YouTube, Wikipedia and Unsplash from fixture
+files, answers Google News redirect links locally, and serves Writer calls
+from a local OpenAI-compatible stand-in server, so `ai_desk()` runs
+deterministically with no network. Every upstream can be given simulated
+latency and an injected failure rate.
+
+    with replay_session(latency={"llm": 0.5}, errors={"forbes": 0.2}):
+        articles = asyncio.run(ai_desk())
+
+    python ai_desk_replay.py serve --port 8765   # then GROQ_BASE_URL=http://127.0.0.1:8765/v1
+    python ai_desk_replay.py record              # refresh source fixtures from live services
+"""
+import os
+import re
+import json
+import time
+import random
+import socket
+import asyncio
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager, ExitStack
+from dataclasses import dataclass, field
+from unittest.mock import patch
+
+# The pipeline refuses to import without a key; replay never sends it anywhere
+os.environ.setdefault("GROQ_API_KEY", "replay")
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from agents import AsyncOpenAI, OpenAIChatCompletionsModel
+from agents.run import RunConfig
+
+import ai_desk_agents
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "replay")
+
+# URL fragment -> (upstream name, fixture file)
+FEED_FIXTURES = {
+    "news.google.com": ("google", "google_news.xml"),
+    "forbes.com": ("forbes", "forbes.xml"),
+}
+UPSTREAMS = ("google", "forbes", "youtube", "wikipedia", "unsplash", "redirect", "llm")
+# Where replayed Google News redirect links lead
+REDIRECT_TARGET = "https://news.example.com/replay/"
+
+
+class InjectedFailure(ConnectionError):
+    """Raised by a fake upstream when the error injection fires."""
+
+
+@dataclass
+class ReplayConfig:
+    """
+    `latency` maps an upstream name to seconds, or to a (low, high) range for
+    jitter; `errors` maps it to the probability that a call fails. With
+    `record=True`, Writer prompts missing from the fixtures are forwarded to
+    the real API and saved.
+    """
+    fixtures_dir: str = FIXTURES_DIR
+    latency: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    seed: int = 0
+    record: bool = False
+    upstream_base_url: str = "https://api.groq.com/openai/v1"
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+        self.calls = {name: 0 for name in UPSTREAMS}
+
+    def fixture(self, *parts) -> str:
+        return os.path.join(self.fixtures_dir, *parts)
+
+    def delay(self, upstream: str) -> float:
+        latency = self.latency.get(upstream, 0.0)
+        if isinstance(latency, (tuple, list)):
+            with self._lock:
+                return self._rng.uniform(*latency)
+        return latency
+
+    def should_fail(self, upstream: str) -> bool:
+        rate = self.errors.get(upstream, 0.0)
+        with self._lock:
+            self.calls[upstream] = self.calls.get(upstream, 0) + 1
+            return rate > 0 and self._rng.random() < rate
+
+    def simulate(self, upstream: str):
+        """Blocking latency and error injection for the synchronous source fakes."""
+        delay = self.delay(upstream)
+        if delay:
+            time.sleep(delay)
+        if self.should_fail(upstream):
+            raise InjectedFailure(f"injected {upstream} failure")
+
+
+def _load_json(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ================================================================================
+#                               SOURCE FAKES
+# ================================================================================
+
+class FakeYouTubeClient:
+    """Minimal `youtube.search().list(...).execute()` chain backed by a fixture."""
+
+    def __init__(self, config: ReplayConfig):
+        self.config = config
+
+    def search(self):
+        return self
+
+    def list(self, maxResults: int = 5, **kwargs):
+        self._max_results = maxResults
+        return self
+
+    def execute(self):
+        self.config.simulate("youtube")
+        response = _load_json(self.config.fixture("youtube_search.json"))
+        response["items"] = response["items"][:self._max_results]
+        return response
+
+
+class FakeHttpx:
+    """Stands in for the `httpx` module, answering feeds, Wikipedia and Unsplash from fixtures."""
+
+    def __init__(self, config: ReplayConfig):
+        self.config = config
+
+    @contextmanager
+    def stream(self, method: str, url: str, params: dict = None, **kwargs):
+        yield self.get(url, params=params)
+
+    def get(self, url: str, params: dict = None, **kwargs) -> httpx.Response:
+        request = httpx.Request("GET", url, params=params)
+        for fragment, (upstream, fixture) in FEED_FIXTURES.items():
+            if fragment in url:
+                self.config.simulate(upstream)
+                with open(self.config.fixture(fixture), "rb") as f:
+                    return httpx.Response(200, content=f.read(), request=request,
+                                          headers={"content-type": "application/rss+xml"})
+        if "wikipedia.org" in url:
+            self.config.simulate("wikipedia")
+            fixture = "wikipedia_page.json" if "extracts" in (params or {}).get("prop", "") else "wikipedia_info.json"
+        elif "api.unsplash.com" in url:
+            self.config.simulate("unsplash")
+            fixture = "unsplash_search.json"
+        else:
+            raise InjectedFailure(f"no replay fixture for {url}")
+        return httpx.Response(200, json=_load_json(self.config.fixture(fixture)), request=request)
+
+    def __getattr__(self, name):
+        return getattr(httpx, name)
+
+
+def redirect_transport(config: ReplayConfig) -> httpx.MockTransport:
+    """Answers Google News article links with a redirect to a stable publisher URL per article."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "news.google.com":
+            delay = config.delay("redirect")
+            if delay:
+                await asyncio.sleep(delay)
+            if config.should_fail("redirect"):
+                raise httpx.ConnectError("injected redirect failure", request=request)
+            article_id = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+            return httpx.Response(302, headers={"location": REDIRECT_TARGET + article_id}, request=request)
+        return httpx.Response(200, request=request)
+
+    return httpx.MockTransport(handler)
+
+
+# ================================================================================
+#                         OPENAI-COMPATIBLE STAND-IN
+# ================================================================================
+
+def request_key(body: dict) -> str:
+    """Recording key for a chat completion request: model plus messages."""
+    payload = json.dumps({"model": body.get("model"), "messages": body.get("messages")}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _field(text: str, name: str) -> str:
+    match = re.search(rf'^{name}:\s*(.*)$', text, re.MULTILINE)
+    return match.group(1).strip() if match else ""
+
+
+def _synthesize_article(text: str) -> dict:
+    """Deterministic Writer-shaped article built from the fields of one item prompt."""
+    title = _field(text, "Title") or "AI News"
+    url = _field(text, "Source URL")
+    source_match = re.search(r'source="([^"]+)"', text)
+    source = source_match.group(1) if source_match else "News"
+    meta_title = title if len(title) <= 60 else title[:60].rsplit(" ", 1)[0]
+    summary = _field(text, "Summary") or title
+    article = {
+        "meta_title": meta_title,
+        "meta_description": f"{meta_title}: what happened, why it matters and the key details behind this AI story."[:160],
+        "meta_image_prompt": f"Editorial illustration of {meta_title}",
+        "alt_text": meta_title,
+        "slug": re.sub(r'[^a-z0-9]+', '-', meta_title.lower()).strip('-'),
+        "tags": ["AI", "News", source],
+        "content": [
+            {"heading": "What happened", "paragraphs": [summary]},
+            {"heading": "Why it matters", "paragraphs": [f"{meta_title} is the latest sign of how fast AI is moving."]},
+            {"heading": "Key details", "paragraphs": [f"Reported by {source}."]},
+            {"heading": "Conclusion", "paragraphs": ["More details are expected as the story develops."]},
+        ],
+        "source_links": [{"title": title, "url": url, "source": source}],
+        "video_links": [],
+    }
+    video_url = _field(text, "Video URL")
+    if video_url:
+        article["video_links"].append({"title": title, "url": video_url, "source": source,
+                                       "published": _field(text, "Published")})
+    return article
+
+
+def synthesize_reply(messages: list) -> str:
+    """Writer reply for a prompt with no recording: one article, or an array for batches."""
+    prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    if isinstance(prompt, list):
+        prompt = " ".join(part.get("text", "") for part in prompt if isinstance(part, dict))
+    sections = re.split(r'^### Item \d+\s*$', prompt, flags=re.MULTILINE)
+    if len(sections) > 1:
+        return json.dumps([_synthesize_article(section) for section in sections[1:]])
+    return json.dumps(_synthesize_article(prompt))
+
+
+def _completion(body: dict, content: str) -> dict:
+    prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+    completion_tokens = len(content.split())
+    return {
+        "id": f"replay-{request_key(body)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "replay"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+def create_llm_app(config: ReplayConfig) -> FastAPI:
+    """OpenAI-compatible `/v1/chat/completions` serving recordings or synthesized replies."""
+    app = FastAPI(title="AI Desk replay LLM")
+    recordings = config.fixture("llm")
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        delay = config.delay("llm")
+        if delay:
+            await asyncio.sleep(delay)
+        if config.should_fail("llm"):
+            return JSONResponse({"error": {"message": "injected llm failure", "type": "server_error"}}, status_code=503)
+
+        path = os.path.join(recordings, f"{request_key(body)}.json")
+        if os.path.exists(path):
+            return JSONResponse(_load_json(path))
+        if config.record:
+            async with httpx.AsyncClient(timeout=120) as client:
+                upstream = await client.post(
+                    f"{config.upstream_base_url}/chat/completions",
+                    json=body,
+                    headers={"Authorization": request.headers.get("authorization", "")},
+                )
+            if upstream.status_code == 200:
+                os.makedirs(recordings, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(upstream.json(), f, indent=2)
+            return JSONResponse(upstream.json(), status_code=upstream.status_code)
+        return JSONResponse(_completion(body, synthesize_reply(body.get("messages", []))))
+
+    return app
+
+
+class LLMStandIn:
+    """Runs the stand-in app with uvicorn on a background thread."""
+
+    def __init__(self, config: ReplayConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "LLMStandIn":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(create_llm_app(self.config), log_level="warning", lifespan="off"))
+        self.thread = threading.Thread(target=self.server.run, kwargs={"sockets": [sock]}, daemon=True)
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("replay LLM server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.should_exit = True
+            self.thread.join(timeout=5)
+
+
+# ================================================================================
+#                                  SESSIONS
+# ================================================================================
+
+def reset_pipeline_state():
+    """Forget everything the pipeline remembers between editions."""
+    ai_desk_agents.article_cache.clear()
+    ai_desk_agents._wikipedia_cache.clear()
+    ai_desk_agents._written_articles.clear()
+    ai_desk_agents._last_good_articles.clear()
+    ai_desk_agents.source_breakers.clear()
+    ai_desk_agents.poll_scheduler.reset()
+    ai_desk_agents.url_resolver.clear()
+    ai_desk_agents.story_clusters.reset()
+
+
+@contextmanager
+def replay_session(config: ReplayConfig = None, reset_state: bool = True, **overrides):
+    """
+    Run the pipeline against fixtures and the local Writer stand-in.
+    Yields the ReplayConfig, whose `calls` counts hits per upstream.
+    """
+    config = config or ReplayConfig(**overrides)
+    if reset_state:
+        reset_pipeline_state()
+    server = LLMStandIn(config).start()
+    client = AsyncOpenAI(api_key="replay", base_url=server.base_url, max_retries=0)
+    model = OpenAIChatCompletionsModel(model=ai_desk_agents.model.model, openai_client=client)
+    run_config = RunConfig(model=model, tracing_disabled=ai_desk_agents.config.tracing_disabled)
+    try:
+        with ExitStack() as stack:
+            stack.enter_context(patch.object(ai_desk_agents, "config", run_config))
+            stack.enter_context(patch.object(ai_desk_agents, "httpx", FakeHttpx(config)))
+            stack.enter_context(patch.object(ai_desk_agents, "youtube_client", FakeYouTubeClient(config)))
+            stack.enter_context(patch.object(ai_desk_agents.url_resolver, "transport", redirect_transport(config)))
+            stack.enter_context(patch.object(ai_desk_agents.url_resolver, "path", ""))
+            yield config
+    finally:
+        server.stop()
+
+
+def record_sources(fixtures_dir: str = FIXTURES_DIR):
+    """Fetch every source once from the live services and save the raw responses as fixtures."""
+    os.makedirs(fixtures_dir, exist_ok=True)
+    for url, (upstream, fixture) in {
+        ai_desk_agents.GOOGLE_NEWS_FEED_URL: FEED_FIXTURES["news.google.com"],
+        ai_desk_agents.FORBES_FEED_URL: FEED_FIXTURES["forbes.com"],
+    }.items():
+        response = httpx.get(url, headers=ai_desk_agents.FEED_HEADERS, follow_redirects=True, timeout=30)
+        response.raise_for_status()
+        with open(os.path.join(fixtures_dir, fixture), "wb") as f:
+            f.write(response.content)
+        print(f"Recorded {upstream} -> {fixture}")
+
+    topic = ai_desk_agents.WIKIPEDIA_TOPIC
+    for fixture, params in {
+        "wikipedia_info.json": {"titles": topic, "prop": "info"},
+        "wikipedia_page.json": {"titles": topic, "prop": "extracts|pageimages|info", "exintro": 1,
+                                "explaintext": 1, "piprop": "thumbnail",
+                                "pithumbsize": ai_desk_agents.WIKIPEDIA_THUMB_SIZE, "inprop": "url"},
+    }.items():
+        params.update({"action": "query", "format": "json", "formatversion": 2, "redirects": 1})
+        response = httpx.get(ai_desk_agents.WIKIPEDIA_API_URL, params=params,
+                             headers=ai_desk_agents.WIKIPEDIA_HEADERS, timeout=30)
+        response.raise_for_status()
+        with open(os.path.join(fixtures_dir, fixture), "w", encoding="utf-8") as f:
+            json.dump(response.json(), f, indent=2)
+        print(f"Recorded wikipedia -> {fixture}")
+
+    if ai_desk_agents.youtube_client:
+        response = ai_desk_agents.youtube_client.search().list(
+            part="snippet", q="AI news", type="video", maxResults=5, order="date"
+        ).execute()
+        with open(os.path.join(fixtures_dir, "youtube_search.json"), "w", encoding="utf-8") as f:
+            json.dump(response, f, indent=2)
+        print("Recorded youtube -> youtube_search.json")
+
+
+def _parse_rates(pairs: list) -> dict:
+    """['llm=0.5', 'forbes=0.1'] -> {'llm': 0.5, 'forbes': 0.1}"""
+    return {name: float(value) for name, value in (pair.split("=", 1) for pair in pairs or [])}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI Desk offline record/replay harness")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the OpenAI-compatible Writer stand-in")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency", nargs="*", help="upstream=seconds, e.g. llm=0.8")
+    serve.add_argument("--errors", nargs="*", help="upstream=rate, e.g. llm=0.1")
+    serve.add_argument("--record", action="store_true", help="forward unknown prompts to Groq and save them")
+    record = sub.add_parser("record", help="refresh source fixtures from the live services")
+    record.add_argument("--fixtures", default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        replay_config = ReplayConfig(latency=_parse_rates(args.latency), errors=_parse_rates(args.errors),
+                                     record=args.record)
+        uvicorn.run(create_llm_app(replay_config), host="127.0.0.1", port=args.port)
+    else:
+        record_sources(args.fixtures)
@@ -0,0 +1,241 @@
+"""
+Resolution of Google News redirect links to publisher URLs.
+
+Google News feed items link to news.google.com/rss/articles/<id> rather
+than to the publisher. Links are resolved concurrently on the event loop,
+under a limit: first by decoding the publisher URL embedded in older
+article IDs, otherwise by following the HTTP redirects (headers only, no
+body download). Results are kept in a JSON file next to the edition store
+so they survive restarts and are shared by all workers; a failed lookup is
+remembered for RESOLVER_NEGATIVE_TTL_S so a dead link is not retried on
+every poll. Unresolved links are left as they are.
+
+What resolves:
+- older IDs (`CBMi…`) whose protobuf carries the publisher URL are decoded
+  locally, without a request;
+- links that answer with an HTTP redirect off news.google.com are followed.
+What does not: current IDs carry an opaque `AU_yqL…` token instead of the
+URL, and news.google.com answers them with a 200 page that redirects in
+JavaScript. They are recognized and left alone without a request; any
+other link whose final URL is still on news.google.com counts as failed.
+"""
+import os
+import re
+import json
+import time
+import base64
+import asyncio
+import tempfile
+import threading
+from urllib.parse import urlsplit
+
+import httpx
+
+import ai_desk_metrics as metrics
+from ai_desk_store import EDITION_STORE_DIR
+from ai_desk_tracing import logger
+
+# Lookups in flight at once
+RESOLVER_CONCURRENCY = int(os.getenv("RESOLVER_CONCURRENCY", "8"))
+RESOLVER_TIMEOUT_S = float(os.getenv("RESOLVER_TIMEOUT_S", "5"))
+# How long a failed lookup is remembered before it is tried again
+RESOLVER_NEGATIVE_TTL_S = float(os.getenv("RESOLVER_NEGATIVE_TTL_S", "3600"))
+RESOLVER_CACHE_FILE = os.getenv("RESOLVER_CACHE_FILE", os.path.join(EDITION_STORE_DIR, "resolved_urls.json"))
+# Entries kept in the cache file, oldest dropped first
+RESOLVER_CACHE_SIZE = int(os.getenv("RESOLVER_CACHE_SIZE", "20000"))
+
+GOOGLE_NEWS_HOST = "news.google.com"
+_ARTICLE_PATH_RE = re.compile(r'^(?:/__i/rss/rd)?(?:/rss)?/articles/([\w-]+)')
+_EMBEDDED_URL_RE = re.compile(rb'https?://[\x21-\x7e]+')
+# Prefix of the token current article IDs carry instead of the publisher URL
+_OPAQUE_TOKEN = b"AU_yqL"
+
+
+def is_redirect_link(url: str) -> bool:
+    """True for news.google.com article links that hide the publisher URL."""
+    try:
+        parts = urlsplit(url or "")
+    except ValueError:
+        return False
+    return parts.hostname == GOOGLE_NEWS_HOST and bool(_ARTICLE_PATH_RE.match(parts.path))
+
+
+def decode_google_news_url(url: str) -> str | None:
+    """The publisher URL embedded in an article ID, if the ID still carries one."""
+    match = _ARTICLE_PATH_RE.match(urlsplit(url).path)
+    if not match:
+        return None
+    article_id = match.group(1)
+    try:
+        raw = base64.urlsafe_b64decode(article_id + "=" * (-len(article_id) % 4))
+    except ValueError:
+        return None
+    found = _EMBEDDED_URL_RE.search(raw)
+    if not found:
+        return None
+    # The ID is a protobuf: the URL is preceded by its varint length, and more fields may follow it
+    start, length = found.start(), None
+    if start >= 2 and raw[start - 2] & 0x80 and not raw[start - 1] & 0x80:
+        length = (raw[start - 2] & 0x7f) | (raw[start - 1] << 7)
+    elif start >= 1 and not raw[start - 1] & 0x80:
+        length = raw[start - 1]
+    if length and length <= len(found.group(0)):
+        return found.group(0)[:length].decode("ascii")
+    return found.group(0).decode("ascii")
+
+
+def is_opaque_article_id(url: str) -> bool:
+    """True for current article IDs, which hold a token only news.google.com's own JavaScript can turn into a URL."""
+    match = _ARTICLE_PATH_RE.match(urlsplit(url).path)
+    if not match:
+        return False
+    article_id = match.group(1)
+    try:
+        raw = base64.urlsafe_b64decode(article_id + "=" * (-len(article_id) % 4))
+    except ValueError:
+        return False
+    return _OPAQUE_TOKEN in raw and not _EMBEDDED_URL_RE.search(raw)
+
+
+class RedirectResolver:
+    """Concurrent redirect resolution with a persistent URL -> publisher URL cache."""
+
+    def __init__(self, path: str | None = None, concurrency: int = None, timeout_s: float = None,
+                 negative_ttl_s: float = None, max_entries: int = None, transport=None):
+        self.path = RESOLVER_CACHE_FILE if path is None else path
+        self.concurrency = RESOLVER_CONCURRENCY if concurrency is None else concurrency
+        self.timeout_s = RESOLVER_TIMEOUT_S if timeout_s is None else timeout_s
+        self.negative_ttl_s = RESOLVER_NEGATIVE_TTL_S if negative_ttl_s is None else negative_ttl_s
+        self.max_entries = RESOLVER_CACHE_SIZE if max_entries is None else max_entries
+        self.transport = transport  # httpx transport override (replay, tests)
+        self._entries = None  # url -> [resolved url or None, resolved_at]
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            entries = {}
+            if self.path:
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        entries = json.load(f)
+                except FileNotFoundError:
+                    pass
+                except (OSError, ValueError) as e:
+                    logger.warning("Unreadable resolver cache, starting empty: %s", e)
+            self._entries = entries
+        return self._entries
+
+    def save(self, entries: dict = None) -> dict | None:
+        """
+        Atomically write the cache file (merged with what other workers wrote
+        meanwhile) and return what was written. Callers off the event loop pass
+        a copy of the entries taken on the loop, which keeps adding to them.
+        """
+        if not self.path or self._entries is None:
+            return None
+        entries = dict(self._entries) if entries is None else entries
+        with self._lock:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    on_disk = json.load(f)
+            except (OSError, ValueError):
+                on_disk = {}
+            merged = {**on_disk, **entries}
+            if len(merged) > self.max_entries:
+                merged = dict(sorted(merged.items(), key=lambda entry: entry[1][1])[-self.max_entries:])
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".resolved-", suffix=".json", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(merged, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        return merged
+
+    def cached(self, url: str, now: float = None) -> tuple:
+        """(hit, resolved url or None). Failed lookups count as hits until their TTL runs out."""
+        entry = self._load().get(url)
+        if entry is None:
+            return False, None
+        resolved, resolved_at = entry
+        if resolved is None and (time.time() if now is None else now) - resolved_at > self.negative_ttl_s:
+            return False, None
+        return True, resolved
+
+    async def _follow(self, client: httpx.AsyncClient, url: str) -> str | None:
+        decoded = decode_google_news_url(url)
+        if decoded:
+            return decoded
+        try:
+            async with client.stream("GET", url) as response:
+                final = str(response.url)
+                ok = response.status_code < 400
+        except (httpx.HTTPError, ConnectionError) as e:
+            logger.info("Could not resolve %s: %s", url, e)
+            return None
+        if not ok or is_redirect_link(final) or urlsplit(final).hostname == GOOGLE_NEWS_HOST:
+            return None
+        return final
+
+    async def resolve_many(self, urls) -> dict:
+        """Map each redirect link in `urls` to its publisher URL (links that did not resolve are left out)."""
+        resolved, pending = {}, []
+        if self._entries is None:
+            await asyncio.to_thread(self._load)
+        for url in dict.fromkeys(urls):
+            if not is_redirect_link(url) or is_opaque_article_id(url):
+                continue
+            hit, target = self.cached(url)
+            metrics.cache_requests.inc(cache="resolver", result="hit" if hit else "miss")
+            if hit:
+                if target:
+                    resolved[url] = target
+            else:
+                pending.append(url)
+        if not pending:
+            return resolved
+
+        slots = asyncio.Semaphore(max(1, self.concurrency))
+        async with httpx.AsyncClient(transport=self.transport, follow_redirects=True, timeout=self.timeout_s,
+                                     headers={"User-Agent": "Mozilla/5.0 (compatible; AI-Desk/2.0)"}) as client:
+
+            async def follow(url: str):
+                async with slots:
+                    return url, await self._follow(client, url)
+
+            results = await asyncio.gather(*(follow(url) for url in pending))
+
+        entries = self._load()
+        now = time.time()
+        for url, target in results:
+            entries[url] = [target, now]
+            if target:
+                resolved[url] = target
+        snapshot = dict(entries)
+        merged = await asyncio.to_thread(self.save, snapshot)
+        if merged is not None:
+            # Adopt other workers' entries, keeping what was added here while the file was written
+            self._entries = {**merged, **{url: entry for url, entry in self._entries.items()
+                                          if snapshot.get(url) is not entry}}
+        return resolved
+
+    async def resolve_items(self, items: list) -> int:
+        """Point items' `link` at the publisher URL, keeping the original as `redirect_link`. Returns the count."""
+        resolved = await self.resolve_many(item.get("link", "") for item in items)
+        for item in items:
+            target = resolved.get(item.get("link", ""))
+            if target:
+                item["redirect_link"] = item["link"]
+                item["link"] = target
+        return sum(1 for item in items if "redirect_link" in item)
+
+    def clear(self):
+        """Forget cached results (the file is left alone)."""
+        self._entries = {}
+
+
+url_resolver = RedirectResolver()
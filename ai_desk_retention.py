@@ -0,0 +1,168 @@
+"""
+Retention limits for the article store, and pinned articles.
+
+The ArticleCache keeps articles across editions. After each edition it
+drops articles no source has carried for ARTICLE_MAX_AGE_S, then the least
+recently seen ones until it is within ARTICLE_MAX_COUNT articles and
+ARTICLE_MAX_BYTES of serialized JSON (which also bounds the edition
+snapshot on disk). Pinned articles (bookmarked or hero items) are never
+evicted; pins live in a small JSON file next to the edition store so every
+worker sees them, capped at ARTICLE_PIN_LIMIT with the oldest pins dropped.
+Every change re-reads the file under an exclusive lock on a sidecar lock
+file, so concurrent pins from different workers are not lost.
+"""
+import os
+import json
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from ai_desk_store import EDITION_STORE_DIR
+from ai_desk_tracing import logger
+
+# Articles kept across editions (0 = no limit)
+ARTICLE_MAX_COUNT = int(os.getenv("ARTICLE_MAX_COUNT", "200"))
+# Seconds since a source last carried an article before it is dropped (0 = no limit)
+ARTICLE_MAX_AGE_S = float(os.getenv("ARTICLE_MAX_AGE_S", str(72 * 3600)))
+# Serialized size of all kept articles (0 = no limit)
+ARTICLE_MAX_BYTES = int(os.getenv("ARTICLE_MAX_BYTES", str(8 * 1024 * 1024)))
+ARTICLE_PIN_LIMIT = int(os.getenv("ARTICLE_PIN_LIMIT", "100"))
+ARTICLE_PIN_FILE = os.getenv("ARTICLE_PIN_FILE", os.path.join(EDITION_STORE_DIR, "pins.json"))
+# Share of removed rows in the similarity index that triggers a compaction
+INDEX_COMPACT_RATIO = float(os.getenv("INDEX_COMPACT_RATIO", "0.25"))
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    max_count: int = ARTICLE_MAX_COUNT
+    max_age_s: float = ARTICLE_MAX_AGE_S
+    max_bytes: int = ARTICLE_MAX_BYTES
+    compact_ratio: float = INDEX_COMPACT_RATIO
+
+    def evictions(self, entries, total_bytes: int, pinned=frozenset(), now: float = None) -> list:
+        """
+        Keys to evict from `entries`, (key, last seen, bytes) least recently
+        seen first: every unpinned entry past the age limit, then the oldest
+        unpinned ones until the count and byte limits hold.
+        """
+        now = time.time() if now is None else now
+        entries = list(entries)
+        count = len(entries)
+        evicted = []
+        for key, last_seen, size in entries:
+            too_old = bool(self.max_age_s) and now - last_seen > self.max_age_s
+            over = (bool(self.max_count and count > self.max_count)
+                    or bool(self.max_bytes and total_bytes > self.max_bytes))
+            if not (too_old or over):
+                break  # entries are in last-seen order, so no later one is older
+            if key in pinned:
+                continue
+            evicted.append(key)
+            count -= 1
+            total_bytes -= size
+        return evicted
+
+
+class PinStore:
+    """Article IDs that must not be evicted, in a JSON file shared by all workers."""
+
+    def __init__(self, path: str | None = None, limit: int = None):
+        self.path = ARTICLE_PIN_FILE if path is None else path
+        self.limit = ARTICLE_PIN_LIMIT if limit is None else limit
+        self._cached = (None, {})  # (file signature, {article id: pinned at})
+        self._lock = threading.Lock()
+
+    def _read(self, fresh: bool = False) -> dict:
+        if not self.path:
+            return self._cached[1]
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return {}
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if fresh or self._cached[0] != signature:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._cached = (signature, json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning("Unreadable pin file, ignoring pins: %s", e)
+                return {}
+        return self._cached[1]
+
+    def _write(self, pins: dict):
+        if not self.path:
+            self._cached = (None, pins)
+            return
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".pins-", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(pins, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @contextmanager
+    def _locked(self):
+        """Hold the pin file against other threads and other workers (an exclusive lock on `<path>.lock`)."""
+        with self._lock:
+            if not self.path:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                    else:
+                        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
+
+    def ids(self) -> frozenset:
+        return frozenset(self._read())
+
+    def pin(self, article_id: str) -> bool:
+        """Pin an article; beyond the limit the oldest pins are released. Returns False if already pinned."""
+        with self._locked():
+            pins = dict(self._read(fresh=True))
+            if article_id in pins:
+                return False
+            pins[article_id] = time.time()
+            if len(pins) > self.limit:
+                pins = dict(sorted(pins.items(), key=lambda pin: pin[1])[-self.limit:])
+            self._write(pins)
+            return True
+
+    def unpin(self, article_id: str) -> bool:
+        with self._locked():
+            pins = dict(self._read(fresh=True))
+            if pins.pop(article_id, None) is None:
+                return False
+            self._write(pins)
+            return True
+
+    def clear(self):
+        with self._locked():
+            self._write({})
+
+
+pin_store = PinStore()
@@ -0,0 +1,193 @@
+"""
+Adaptive per-source polling.
+
+Each source has a next-due time, checked when an edition reaches the
+source: a source that is not due is skipped. After a poll the
+scheduler looks at the entries' publish timestamps to estimate how often
+the source publishes, and polls again after a fraction of that gap: fast
+movers every few minutes, weekly blogs rarely. A poll that brings nothing
+new, or fails, doubles the interval up to the maximum. Editions between
+polls reuse the source's last articles, so fetch and Writer volume follow
+the news flow rather than /news traffic.
+"""
+import os
+import time
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+POLL_MIN_INTERVAL_S = float(os.getenv("POLL_MIN_INTERVAL_S", "60"))
+POLL_MAX_INTERVAL_S = float(os.getenv("POLL_MAX_INTERVAL_S", str(6 * 3600)))
+# Poll again after this fraction of the observed gap between entries
+POLL_GAP_FRACTION = float(os.getenv("POLL_GAP_FRACTION", "0.5"))
+POLL_BACKOFF = float(os.getenv("POLL_BACKOFF", "2"))
+# Weight of the newest publish-gap observation in the moving average
+_GAP_SMOOTHING = 0.3
+# Remembered entry IDs per source, to tell new entries from repeats
+_SEEN_LIMIT = 500
+
+
+def parse_timestamp(value: str) -> float | None:
+    """Epoch seconds from an RFC 822 (RSS) or ISO 8601 (Atom, YouTube) date."""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class _SourceSchedule:
+    __slots__ = ("name", "base_interval_s", "interval_s", "next_due", "mean_gap_s", "empty_streak",
+                 "seen", "last_polled", "last_new")
+
+    def __init__(self, name: str, interval_s: float):
+        self.name = name
+        self.base_interval_s = interval_s
+        self.interval_s = interval_s
+        self.next_due = 0.0  # never polled: due now
+        self.mean_gap_s = None
+        self.empty_streak = 0
+        self.seen = {}  # entry id -> None, insertion ordered
+        self.last_polled = None
+        self.last_new = 0
+
+
+class PollScheduler:
+    """Next-due time per source, with intervals learned from publish rates."""
+
+    def __init__(self, min_interval_s: float = None, max_interval_s: float = None,
+                 gap_fraction: float = None, backoff: float = None):
+        self.min_interval_s = POLL_MIN_INTERVAL_S if min_interval_s is None else min_interval_s
+        self.max_interval_s = POLL_MAX_INTERVAL_S if max_interval_s is None else max_interval_s
+        self.gap_fraction = POLL_GAP_FRACTION if gap_fraction is None else gap_fraction
+        self.backoff = POLL_BACKOFF if backoff is None else backoff
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """Picklable state (shared between workers), without the lock."""
+        with self._lock:
+            state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _clamp(self, interval_s: float) -> float:
+        return min(self.max_interval_s, max(self.min_interval_s, interval_s))
+
+    def _schedule(self, state: _SourceSchedule, now: float):
+        state.next_due = now + state.interval_s
+
+    def register(self, name: str, interval_s: float, now: float = None):
+        """
+        Add a source (due immediately) or update its configured interval. A
+        changed interval replaces what was learned, counting from the last poll.
+        """
+        with self._lock:
+            state = self._sources.get(name)
+            if state is None:
+                self._sources[name] = _SourceSchedule(name, self._clamp(interval_s))
+            elif state.base_interval_s != self._clamp(interval_s):
+                state.base_interval_s = state.interval_s = self._clamp(interval_s)
+                state.mean_gap_s = None
+                state.empty_streak = 0
+                if state.last_polled is not None:
+                    now = time.time() if now is None else now
+                    self._schedule(state, min(state.last_polled, now))
+
+    def is_due(self, name: str, now: float = None) -> bool:
+        """Unknown sources are always due."""
+        state = self._sources.get(name)
+        return state is None or (time.time() if now is None else now) >= state.next_due
+
+    def due(self, now: float = None) -> list:
+        """Names of all sources due now, earliest first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            states = sorted(self._sources.values(), key=lambda state: state.next_due)
+            return [state.name for state in states if state.next_due <= now]
+
+    def next_due(self) -> tuple | None:
+        """(name, due time) of the source polled next."""
+        with self._lock:
+            if not self._sources:
+                return None
+            state = min(self._sources.values(), key=lambda state: state.next_due)
+            return state.name, state.next_due
+
+    def record_poll(self, name: str, items: list, item_id, now: float = None) -> float:
+        """
+        Learn from a successful poll and schedule the next one. `item_id(item)`
+        gives a stable ID per entry. Returns the new interval in seconds.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._sources.get(name)
+            if state is None:
+                return 0.0
+            ids = [item_id(item) for item in items]
+            new = [entry for entry in ids if entry not in state.seen]
+            for entry in new:
+                state.seen[entry] = None
+            while len(state.seen) > _SEEN_LIMIT:
+                del state.seen[next(iter(state.seen))]
+
+            timestamps = sorted(t for t in (parse_timestamp(item.get("published", "")) for item in items) if t)
+            if len(timestamps) >= 2 and timestamps[-1] > timestamps[0]:
+                gap = (timestamps[-1] - timestamps[0]) / (len(timestamps) - 1)
+                state.mean_gap_s = gap if state.mean_gap_s is None else (
+                    _GAP_SMOOTHING * gap + (1 - _GAP_SMOOTHING) * state.mean_gap_s)
+
+            learned = state.mean_gap_s * self.gap_fraction if state.mean_gap_s else state.base_interval_s
+            if new or state.last_polled is None:
+                state.empty_streak = 0
+            else:
+                state.empty_streak += 1
+            state.interval_s = self._clamp(learned * self.backoff ** state.empty_streak)
+            state.last_polled = now
+            state.last_new = len(new)
+            self._schedule(state, now)
+            return state.interval_s
+
+    def record_failure(self, name: str, now: float = None) -> float:
+        """Back off after a failed poll."""
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._sources.get(name)
+            if state is None:
+                return 0.0
+            state.empty_streak += 1
+            state.interval_s = self._clamp(state.interval_s * self.backoff)
+            self._schedule(state, now)
+            return state.interval_s
+
+    def snapshot(self, now: float = None) -> dict:
+        """Polling state per source, for /health."""
+        now = time.time() if now is None else now
+        return {
+            name: {
+                "interval_s": round(state.interval_s),
+                "due_in_s": max(0, round(state.next_due - now)),
+                "mean_publish_gap_s": round(state.mean_gap_s) if state.mean_gap_s else None,
+                "new_last_poll": state.last_new,
+                "empty_streak": state.empty_streak,
+            }
+            for name, state in self._sources.items()
+        }
+
+    def reset(self):
+        with self._lock:
+            self._sources.clear()
+
+
+poll_scheduler = PollScheduler()
@@ -0,0 +1,291 @@
+"""
+Local TF-IDF similarity for story deduplication.
+
+Articles are turned into hashed TF-IDF vectors over their title (weighted
+up), description and summary: stemmed words plus character trigrams, so
+reworded and re-inflected headlines about one event still overlap. The
+index keeps an inverted posting list per feature; a batch of new articles
+is scored against every stored article in one sparse product. With NumPy
+installed that product is a handful of array operations, otherwise the
+same postings are walked in Python. No model or network is involved.
+"""
+import os
+import re
+import math
+import zlib
+from array import array
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # scored in pure Python
+    np = None
+
+# Cosine similarity at which two articles count as the same story
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.35"))
+# Hashed feature space; collisions are negligible at this size
+SIMILARITY_FEATURES = 1 << 20
+# Relative weight of each text field, in the order fields are passed
+FIELD_WEIGHTS = (2.0, 1.0, 1.0)
+# Weight of a character trigram relative to a whole word
+TRIGRAM_WEIGHT = 0.2
+
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'of', 'and', 'or', 'is', 'are', 'was', 'were',
+    'be', 'been', 'by', 'with', 'as', 'from', 'its', 'it', 'this', 'that', 'these', 'their', 'what',
+    'how', 'why', 'new', 'after', 'over', 'into', 'about', 'will', 'has', 'have', 'than', 'more',
+    'says', 'said', 'report', 'reports', 'means', 'just', 'now', 'up', 'out', 'you', 'your', 'we',
+})
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+# " - Publisher" / " | Publisher" appended to feed titles
+_PUBLISHER_SUFFIX_RE = re.compile(r'\s+[-–—|]\s+([^-–—|]+)$')
+
+
+def strip_publisher(title: str) -> str:
+    """Drop a trailing ' - Publisher' of at most four words."""
+    match = _PUBLISHER_SUFFIX_RE.search(title or "")
+    if match and len(match.group(1).split()) <= 4:
+        return title[:match.start()]
+    return title or ""
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4:
+        for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("s", "")):
+            if word.endswith(suffix):
+                word = word[:-len(suffix)] + replacement
+                break
+        if len(word) > 4 and word.endswith("e"):
+            word = word[:-1]
+    return word
+
+
+def _hash(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) & (SIMILARITY_FEATURES - 1)
+
+
+def term_counts(fields) -> Counter:
+    """Weighted counts of hashed word and trigram features over the text fields."""
+    counts = Counter()
+    for position, text in enumerate(fields):
+        if not text:
+            continue
+        weight = FIELD_WEIGHTS[position] if position < len(FIELD_WEIGHTS) else 1.0
+        if position == 0:
+            text = strip_publisher(text)
+        for token in _TOKEN_RE.findall(text.lower()):
+            if token in STOP_WORDS:
+                continue
+            stem = _stem(token)
+            counts[_hash("w:" + stem)] += weight
+            padded = f" {stem} "
+            for start in range(len(padded) - 2):
+                counts[_hash("c:" + padded[start:start + 3])] += weight * TRIGRAM_WEIGHT
+    return counts
+
+
+def weigh(counts: Counter, idf) -> tuple:
+    """L2-normalized TF-IDF vector, as (features, weights), of term counts and an `idf(feature)` function."""
+    # Sublinear term frequency; trigram counts below one are kept as they are
+    weighted = {feature: (1.0 + math.log(count) if count > 1 else count) * idf(feature)
+                for feature, count in counts.items()}
+    norm = math.sqrt(sum(value * value for value in weighted.values())) or 1.0
+    features = tuple(weighted)
+    return features, tuple(weighted[feature] / norm for feature in features)
+
+
+class SimilarityIndex:
+    """
+    Hashed TF-IDF vectors of the stored articles, searchable by cosine
+    similarity. Document frequencies are updated as articles are added and
+    removed; a stored vector keeps the IDF weights it was added with.
+    """
+
+    # Postings of recent rows kept unsorted before they are merged into the sorted arrays
+    TAIL_LIMIT = 1 << 15
+
+    def __init__(self):
+        self._df = Counter()
+        self._keys = []        # row -> key, None once removed
+        self._rows = {}        # key -> row
+        self._features = []    # row -> array of its features, to update document frequencies on removal
+        self._removed = set()  # rows removed since the last compaction
+        self._postings = {}    # feature -> [(row, weight)], for the pure-Python path
+        # NumPy path: postings sorted by feature, plus an unsorted tail of recent rows
+        self._main = None
+        self._tail = (array("i"), array("i"), array("f"))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key) -> bool:
+        return key in self._rows
+
+    def _idf(self, feature: int) -> float:
+        return math.log((1 + len(self._rows)) / (1 + self._df.get(feature, 0))) + 1.0
+
+    def vectorize(self, fields) -> tuple:
+        """L2-normalized TF-IDF vector of the fields, as (features, weights)."""
+        return weigh(term_counts(fields), self._idf)
+
+    def add(self, key, fields):
+        """Index an article's text fields under `key` (re-adding a key replaces it)."""
+        if key in self._rows:
+            self.remove(key)
+        features = array("i", term_counts(fields))
+        self._df.update(features)
+        row = len(self._keys)
+        self._keys.append(key)
+        self._rows[key] = row
+        self._features.append(features)
+        vector = self.vectorize(fields)
+        if np is None:
+            for feature, weight in zip(*vector):
+                self._postings.setdefault(feature, []).append((row, weight))
+            return
+        tail_features, tail_rows, tail_weights = self._tail
+        tail_features.extend(vector[0])
+        tail_rows.extend([row] * len(vector[0]))
+        tail_weights.extend(vector[1])
+        if len(tail_features) > self.TAIL_LIMIT:
+            self._compact()
+
+    def remove(self, key):
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        self._keys[row] = None
+        self._removed.add(row)
+        self._df.subtract(self._features[row])
+        for feature in self._features[row]:
+            if self._df[feature] <= 0:
+                del self._df[feature]
+            if np is None:
+                postings = [(other, weight) for other, weight in self._postings.get(feature, ()) if other != row]
+                if postings:
+                    self._postings[feature] = postings
+                else:
+                    self._postings.pop(feature, None)
+        self._features[row] = array("i")
+
+    def clear(self):
+        self.__init__()
+
+    @property
+    def removed_ratio(self) -> float:
+        """Share of rows that belong to removed articles and still take up space."""
+        return (len(self._keys) - len(self._rows)) / len(self._keys) if self._keys else 0.0
+
+    def compact(self):
+        """Renumber the rows of the remaining articles densely, releasing everything held for removed ones."""
+        live = [row for row, key in enumerate(self._keys) if key is not None]
+        if np is None:
+            remap = {row: new for new, row in enumerate(live)}
+            self._postings = {feature: [(remap[row], weight) for row, weight in postings]
+                              for feature, postings in self._postings.items()}
+        else:
+            self._compact()
+            if self._main is not None:
+                remap = np.full(len(self._keys), -1, dtype=np.int32)
+                remap[live] = np.arange(len(live), dtype=np.int32)
+                features, rows, weights = self._main
+                self._main = (features, remap[rows], weights)
+        self._keys = [self._keys[row] for row in live]
+        self._features = [self._features[row] for row in live]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._removed = set()
+
+    def _compact(self):
+        """Merge the tail into the sorted postings, dropping removed rows."""
+        tail = tuple(np.frombuffer(column, dtype=dtype) for column, dtype in
+                     zip(self._tail, (np.int32, np.int32, np.float32)))
+        parts = [tail] if self._main is None else [self._main, tail]
+        features, rows, weights = (np.concatenate(column) for column in zip(*parts))
+        if self._removed:
+            keep = ~np.isin(rows, np.fromiter(self._removed, dtype=np.int32))
+            features, rows, weights = features[keep], rows[keep], weights[keep]
+            self._removed = set()
+        order = np.argsort(features, kind="stable")
+        self._main = (features[order], rows[order], weights[order])
+        self._tail = (array("i"), array("i"), array("f"))
+
+    @staticmethod
+    def _product(postings, query_features, query_rows, query_weights, n_queries: int, n_rows: int):
+        """Dense (queries x rows) scores of the query vectors against sorted postings."""
+        features, rows, weights = postings
+        lo = np.searchsorted(features, query_features, side="left")
+        hi = np.searchsorted(features, query_features, side="right")
+        counts = hi - lo
+        total = int(counts.sum())
+        if not total:
+            return 0.0
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        hits = starts + np.arange(total)
+        cells = np.repeat(query_rows, counts) * n_rows + rows[hits]
+        scores = np.bincount(cells, weights=weights[hits] * np.repeat(query_weights, counts),
+                             minlength=n_queries * n_rows)
+        return scores.reshape(n_queries, n_rows)
+
+    def _matrix(self, vectors: list):
+        """(queries x rows) cosine similarities, zero for removed rows."""
+        query_features = np.fromiter((f for features, _ in vectors for f in features), dtype=np.int32)
+        query_weights = np.fromiter((w for _, weights in vectors for w in weights), dtype=np.float64)
+        query_rows = np.repeat(np.arange(len(vectors)), [len(features) for features, _ in vectors])
+        n_rows = len(self._keys)
+        scores = np.zeros((len(vectors), n_rows))
+        if self._main is not None:
+            scores += self._product(self._main, query_features, query_rows, query_weights, len(vectors), n_rows)
+        if self._tail[0]:
+            tail = tuple(np.frombuffer(column, dtype=dtype) for column, dtype in
+                         zip(self._tail, (np.int32, np.int32, np.float32)))
+            order = np.argsort(tail[0], kind="stable")
+            scores += self._product(tuple(column[order] for column in tail), query_features, query_rows,
+                                    query_weights, len(vectors), n_rows)
+        if self._removed:
+            scores[:, list(self._removed)] = 0.0
+        return scores
+
+    def _python_scores(self, features, weights) -> dict:
+        totals = {}
+        for feature, weight in zip(features, weights):
+            for row, stored in self._postings.get(feature, ()):
+                totals[row] = totals.get(row, 0.0) + weight * stored
+        return totals
+
+    def score(self, vectors: list) -> list:
+        """
+        Cosine similarity of each query vector (from `vectorize`) to every
+        stored article, as one {key: score} dict of non-zero scores per query.
+        """
+        if not vectors or not self._rows:
+            return [{} for _ in vectors]
+        if np is None:
+            return [{self._keys[row]: value for row, value in self._python_scores(*vector).items()}
+                    for vector in vectors]
+        return [{self._keys[row]: float(query_scores[row]) for row in np.flatnonzero(query_scores)}
+                for query_scores in self._matrix(vectors)]
+
+    def best_matches(self, vectors: list, threshold: float = None) -> list:
+        """(key, score) of the most similar stored article per query, or (None, best score) below `threshold`."""
+        threshold = SIMILARITY_THRESHOLD if threshold is None else threshold
+        if not vectors or not self._rows:
+            return [(None, 0.0) for _ in vectors]
+        if np is None:
+            best = []
+            for vector in vectors:
+                totals = self._python_scores(*vector)
+                row = max(totals, key=totals.get, default=None)
+                best.append((row, totals[row] if row is not None else 0.0))
+        else:
+            scores = self._matrix(vectors)
+            rows = scores.argmax(axis=1)
+            best = [(int(row), float(scores[query, row])) for query, row in enumerate(rows)]
+        return [(self._keys[row], value) if row is not None and value > 0 and value >= threshold else (None, value)
+                for row, value in best]
+
+
+def cosine(a: tuple, b: tuple) -> float:
+    """Cosine similarity of two vectors from `SimilarityIndex.vectorize`."""
+    weights = dict(zip(*a))
+    return sum(weights.get(feature, 0.0) * weight for feature, weight in zip(*b))
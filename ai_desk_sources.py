@@ -0,0 +1,80 @@
+"""
+Config-driven source registry.
+
+Sources are listed in a JSON file (AI_DESK_SOURCES_FILE, default
+sources.json next to this module) instead of code. Each entry names an
+adapter type (rss, youtube, wikipedia) and its parameters; adding a feed
+is a config change. Without the file the built-in default sources are used.
+"""
+import os
+import json
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, model_validator
+
+SOURCES_FILE = os.getenv(
+    "AI_DESK_SOURCES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "sources.json"),
+)
+
+
+class SourceConfig(BaseModel):
+    """One source: which adapter to use, what to ask it for and how to schedule it."""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+    name: str = Field(min_length=1)
+    type: Literal["rss", "youtube", "wikipedia"]
+    url: str = ""            # rss
+    query: str = ""          # youtube
+    topic: str = ""          # wikipedia
+    max_items: int = Field(3, ge=1)
+    poll_interval_s: float = Field(900, gt=0)
+    priority: int = 100      # lower runs first
+    concurrency: int = Field(1, ge=1)  # items of this source written in parallel
+    enabled: bool = True
+
+    @model_validator(mode="after")
+    def _check_adapter_fields(self):
+        required = {"rss": "url", "youtube": "query", "wikipedia": "topic"}[self.type]
+        if not getattr(self, required):
+            raise ValueError(f"{self.type} source '{self.name}' needs '{required}'")
+        return self
+
+
+DEFAULT_SOURCES = [
+    SourceConfig(name="YouTube", type="youtube", query="AI news", max_items=2, priority=10),
+    SourceConfig(name="Google", type="rss", url="https://news.google.com/rss/search?q=AI&hl=en-US&gl=US&ceid=US:en",
+                 max_items=3, priority=10),
+    SourceConfig(name="Forbes", type="rss", url="https://www.forbes.com/ai/feed2/", max_items=2, priority=20),
+    SourceConfig(name="Wikipedia", type="wikipedia", topic="Artificial intelligence", max_items=1,
+                 poll_interval_s=3600, priority=30),
+]
+
+
+def load_sources(path: str = None) -> list[SourceConfig]:
+    """
+    Read and validate the source list. Raises ValueError naming the file
+    and entry when the config is invalid or two sources share a name.
+    """
+    path = path or SOURCES_FILE
+    if not os.path.exists(path):
+        return list(DEFAULT_SOURCES)
+    with open(path, encoding="utf-8") as f:
+        try:
+            entries = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path}: invalid JSON: {e}") from e
+    if isinstance(entries, dict):
+        entries = entries.get("sources", [])
+
+    sources = []
+    for idx, entry in enumerate(entries):
+        try:
+            sources.append(SourceConfig(**entry))
+        except (TypeError, ValidationError) as e:
+            raise ValueError(f"{path}: source #{idx} is invalid: {e}") from e
+    names = [source.name for source in sources]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"{path}: duplicate source names: {', '.join(duplicates)}")
+    return sources
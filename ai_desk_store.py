@@ -0,0 +1,171 @@
+"""
+Cross-process edition store, so several uvicorn workers share one edition.
+
+The latest edition is a JSON snapshot file replaced atomically (write to a
+temp file, fsync, os.replace), so readers in any worker always see a whole
+edition. Generating is guarded by an exclusive, non-blocking file lock: the
+worker that gets it is the leader and runs the pipeline, while every other
+request, in this process or another, polls for the leader's snapshot and
+serves it. Upstream and LLM load stays that of one worker however many
+run on the host. With the retained articles a snapshot runs to megabytes,
+so it is read, written and fsynced in a worker thread, off the event loop.
+"""
+import os
+import json
+import time
+import asyncio
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from ai_desk_tracing import logger
+
+# Directory shared by all workers on the host
+EDITION_STORE_DIR = os.getenv("EDITION_STORE_DIR", os.path.join(tempfile.gettempdir(), "ai_desk"))
+# A stored edition younger than this is served without generating; 0 = only
+# share editions that finished while the request was waiting
+EDITION_MAX_AGE_S = float(os.getenv("EDITION_MAX_AGE_S", "0"))
+# How long a follower waits for the leader before serving whatever is stored
+EDITION_WAIT_S = float(os.getenv("EDITION_WAIT_S", "300"))
+
+
+class EditionUnavailable(Exception):
+    """No edition is stored yet and the leader generating the first one is still busy."""
+
+
+class EditionStore:
+    """Latest edition on disk plus the lock that elects its single generator."""
+
+    SNAPSHOT = "edition.json"
+    LOCK = "edition.lock"
+
+    def __init__(self, directory: str = None, max_age_s: float = None, wait_s: float = None,
+                 poll_s: float = 0.1):
+        self.directory = directory or EDITION_STORE_DIR
+        self.max_age_s = EDITION_MAX_AGE_S if max_age_s is None else max_age_s
+        self.wait_s = EDITION_WAIT_S if wait_s is None else wait_s
+        self.poll_s = poll_s
+        self._cached = (None, None)  # (file signature, parsed edition)
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, self.SNAPSHOT)
+
+    @property
+    def lock_path(self) -> str:
+        return os.path.join(self.directory, self.LOCK)
+
+    def read(self) -> dict | None:
+        """The stored edition, re-parsed only when the file has been swapped."""
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if self._cached[0] == signature:
+            return self._cached[1]
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                edition = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Unreadable edition snapshot: %s", e)
+            return None
+        self._cached = (signature, edition)
+        return edition
+
+    def write(self, edition: dict):
+        """Atomically replace the stored edition."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".edition-", suffix=".json", dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(edition, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _try_lock(self) -> int | None:
+        """Take the generator lock without blocking; returns the fd, or None if held elsewhere."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _unlock(self, fd: int):
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def _fresh(self, edition: dict | None, requested_at: float) -> bool:
+        return edition is not None and edition.get("generated_at", 0) >= requested_at - self.max_age_s
+
+    async def get_or_generate(self, generate, wait_s: float = None) -> dict:
+        """
+        Serve a fresh stored edition, or become the leader and store the one
+        `generate()` returns, or wait for the current leader's. A follower
+        that waits longer than `wait_s` gets the last stored edition; if
+        nothing was ever stored it raises EditionUnavailable rather than
+        generating a second edition next to the leader's.
+        """
+        wait_s = self.wait_s if wait_s is None else wait_s
+        requested_at = time.time()
+        while True:
+            edition = await asyncio.to_thread(self.read)
+            if self._fresh(edition, requested_at):
+                return edition
+
+            fd = self._try_lock()
+            if fd is not None:
+                try:
+                    # Another leader may have finished between the read and the lock
+                    edition = await asyncio.to_thread(self.read)
+                    if self._fresh(edition, requested_at):
+                        return edition
+                    edition = await generate()
+                    edition["generated_at"] = time.time()
+                    edition["generated_by"] = os.getpid()
+                    await asyncio.to_thread(self.write, edition)
+                    return edition
+                finally:
+                    self._unlock(fd)
+
+            if time.time() - requested_at > wait_s:
+                if edition is not None:
+                    logger.warning("Edition leader still busy after %.0fs, serving stored edition", wait_s)
+                    return edition
+                raise EditionUnavailable(f"First edition still being generated after {wait_s:.0f}s")
+            await asyncio.sleep(self.poll_s)
+
+    def status(self) -> dict:
+        """Age and origin of the stored edition, for /health."""
+        edition = self.read()
+        if edition is None:
+            return {"stored": False}
+        return {
+            "stored": True,
+            "generated_at": edition.get("generated_at"),
+            "age_s": round(time.time() - edition.get("generated_at", 0), 1),
+            "generated_by": edition.get("generated_by"),
+        }
+
+
+edition_store = EditionStore()
@@ -0,0 +1,290 @@
+"""
+Story threads: online clustering of source items across editions.
+
+Every item the pipeline is about to hand to the Writer is compared with
+the stories seen within the last STORY_WINDOW_S. A story's centroid is the
+running sum of its items' TF-IDF vectors, kept in an inverted index and
+updated in place as items join, so matching an item costs one pass over
+its own features whatever the number of stories. An item that reports a
+known story from a new publisher (very similar, link not yet cited) is
+merged into the story's article as another source link instead of being
+written again; a less similar item is written as a new development of the
+same story. Articles carry the `story_id` of their thread.
+"""
+import os
+import copy
+import math
+import time
+import uuid
+import threading
+from collections import Counter, OrderedDict
+
+from ai_desk_cpu import clean_text
+from ai_desk_scheduler import parse_timestamp
+from ai_desk_similarity import SIMILARITY_THRESHOLD, term_counts, weigh
+from ai_desk_urls import canonical_url
+
+# Stories with no new item for this long are closed
+STORY_WINDOW_S = float(os.getenv("STORY_WINDOW_S", str(48 * 3600)))
+# Cosine similarity to a story's centroid at which an item joins the story
+STORY_JOIN_THRESHOLD = float(os.getenv("STORY_JOIN_THRESHOLD", str(SIMILARITY_THRESHOLD)))
+# Above this, an item from a publisher the story does not cite yet is merged without the Writer
+STORY_MERGE_THRESHOLD = float(os.getenv("STORY_MERGE_THRESHOLD", "0.5"))
+# Updates listed per story thread, newest kept
+STORY_MAX_UPDATES = 50
+
+
+def item_url(item: dict) -> str:
+    return item.get('url') or item.get('link') or ""
+
+
+class Story:
+    """One event thread: its centroid, the links it cites and its latest article."""
+    __slots__ = ("id", "title", "first_seen", "last_seen", "sums", "norm_sq", "counts", "size",
+                 "urls", "sources", "updates", "article", "aliases")
+
+    def __init__(self, title: str, now: float):
+        self.id = str(uuid.uuid4())
+        self.title = title
+        self.first_seen = now
+        self.last_seen = now
+        self.sums = {}       # feature -> summed weight of the members' vectors
+        self.norm_sq = 0.0   # squared norm of `sums`
+        self.counts = Counter()  # feature -> members containing it, for document frequencies
+        self.size = 0
+        self.urls = set()    # canonical URLs of the members
+        self.sources = {}    # source name -> None, in first-seen order
+        self.updates = []
+        self.article = None  # newest article of the story, the base of link merges
+        self.aliases = []    # ids of stories combined into this one
+
+    def to_dict(self) -> dict:
+        return {
+            "story_id": self.id,
+            "title": self.title,
+            "first_seen": _iso(self.first_seen),
+            "last_seen": _iso(self.last_seen),
+            "sources": list(self.sources),
+            "updates": [{key: value for key, value in update.items() if key != "_at"} for update in self.updates],
+        }
+
+
+def _update_time(update: dict) -> float:
+    """Publish time of an update (RSS or ISO date), else when it was assigned."""
+    return parse_timestamp(update["published"]) or update["_at"]
+
+
+def _iso(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+class StoryClusters:
+    """Stories of the sliding window, searchable by centroid similarity."""
+
+    def __init__(self, window_s: float = None, join_threshold: float = None, merge_threshold: float = None):
+        self.window_s = STORY_WINDOW_S if window_s is None else window_s
+        self.join_threshold = STORY_JOIN_THRESHOLD if join_threshold is None else join_threshold
+        self.merge_threshold = STORY_MERGE_THRESHOLD if merge_threshold is None else merge_threshold
+        self._stories = OrderedDict()  # id -> Story, least recently updated first
+        self._postings = {}  # feature -> {story id: summed weight}
+        self._df = Counter()
+        self._items = 0
+        self._aliases = {}  # id of a combined story -> id of the story it went into
+        self._lock = threading.RLock()
+
+    def __getstate__(self) -> dict:
+        """Picklable state (shared between workers), without the lock."""
+        with self._lock:
+            state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._stories)
+
+    def resolve(self, story_id: str) -> str:
+        """The current id of a story, following combines."""
+        return self._aliases.get(story_id, story_id)
+
+    def get(self, story_id: str) -> Story | None:
+        return self._stories.get(self.resolve(story_id))
+
+    def _idf(self, feature: int) -> float:
+        return math.log((1 + self._items) / (1 + self._df.get(feature, 0))) + 1.0
+
+    @staticmethod
+    def _counts(item: dict) -> Counter:
+        return term_counts((clean_text(item.get('title', '')),
+                            clean_text(item.get('summary', item.get('description', ''))) or ""))
+
+    def vectorize(self, item: dict) -> tuple:
+        return weigh(self._counts(item), self._idf)
+
+    def expire(self, now: float = None):
+        """Close the stories that had no new item within the window."""
+        cutoff = (time.time() if now is None else now) - self.window_s
+        with self._lock:
+            while self._stories:
+                story = next(iter(self._stories.values()))
+                if story.last_seen >= cutoff:
+                    break
+                self._drop(story)
+
+    def _drop(self, story: Story):
+        del self._stories[story.id]
+        for feature in story.sums:
+            postings = self._postings.get(feature)
+            if postings is not None:
+                postings.pop(story.id, None)
+                if not postings:
+                    del self._postings[feature]
+        for alias in story.aliases:
+            self._aliases.pop(alias, None)
+        self._df.subtract(story.counts)
+        self._df = +self._df
+        self._items -= story.size
+
+    def match(self, item: dict, now: float = None) -> tuple:
+        """(story or None, cosine similarity to its centroid) for the closest open story."""
+        self.expire(now)
+        with self._lock:
+            totals = {}
+            for feature, weight in zip(*self.vectorize(item)):
+                for story_id, summed in self._postings.get(feature, {}).items():
+                    totals[story_id] = totals.get(story_id, 0.0) + weight * summed
+            best, score = None, 0.0
+            for story_id, total in totals.items():
+                similarity = total / math.sqrt(self._stories[story_id].norm_sq or 1.0)
+                if similarity > score:
+                    best, score = self._stories[story_id], similarity
+            return best, score
+
+    def merge_target(self, item: dict, now: float = None) -> Story | None:
+        """
+        The story this item only adds a source to: one with an article, close
+        enough to merge into, that does not cite the item's link yet. A changed
+        version of a page the story already cites is not a new source.
+        """
+        story, score = self.match(item, now)
+        if story is None or story.article is None or score < self.merge_threshold:
+            return None
+        url = item_url(item)
+        if url and canonical_url(url) in story.urls:
+            return None
+        return story
+
+    def assign(self, source_name: str, item: dict, article: dict = None, merged: bool = False,
+               story: Story = None, now: float = None) -> Story:
+        """
+        Add an item to `story`, else to the closest story above the join
+        threshold, else to a new one, updating the centroid in place.
+        `article` (written for the item, or merged into the story) becomes the
+        story's article and is tagged with its `story_id`.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            score = None
+            if story is None:
+                story, score = self.match(item, now)
+            if story is None or (score is not None and score < self.join_threshold):
+                story = Story(clean_text(item.get('title', '')), now)
+                self._stories[story.id] = story
+            counts = self._counts(item)
+            self._df.update(counts.keys())
+            self._items += 1
+            story.counts.update(counts.keys())
+            for feature, weight in zip(*weigh(counts, self._idf)):
+                summed = story.sums.get(feature, 0.0)
+                story.norm_sq += 2 * summed * weight + weight * weight
+                story.sums[feature] = summed + weight
+                self._postings.setdefault(feature, {})[story.id] = summed + weight
+            story.size += 1
+            story.last_seen = now
+            self._stories.move_to_end(story.id)
+
+            url = item_url(item)
+            if url:
+                story.urls.add(canonical_url(url))
+            story.sources.setdefault(source_name)
+            story.updates.append({
+                "title": clean_text(item.get('title', '')),
+                "url": url,
+                "source": source_name,
+                "published": item.get('published', ''),
+                "action": "merged" if merged else "written",
+                "_at": now,  # when the item was assigned, for ordering updates without a date
+            })
+            del story.updates[:-STORY_MAX_UPDATES]
+            if article is not None:
+                article["story_id"] = story.id
+                story.article = copy.deepcopy(article)
+            return story
+
+    def combine(self, story_id: str, other_id: str) -> str | None:
+        """
+        Fold two stories into one, e.g. when their articles turned out to be
+        duplicates after all. Both ids keep resolving to the combined story.
+        Returns the combined story's id, None if either story is closed.
+        """
+        with self._lock:
+            story, other = self.get(story_id), self.get(other_id)
+            if story is None or other is None:
+                return None
+            if story is other:
+                return story.id
+            # Keep the more recently updated story, so the expiry order stays sorted
+            if other.last_seen > story.last_seen:
+                story, other = other, story
+            for feature, weight in other.sums.items():
+                story.sums[feature] = story.sums.get(feature, 0.0) + weight
+                postings = self._postings[feature]
+                del postings[other.id]
+                postings[story.id] = story.sums[feature]
+            story.norm_sq = sum(weight * weight for weight in story.sums.values())
+            story.counts.update(other.counts)
+            story.size += other.size
+            story.urls |= other.urls
+            for source in other.sources:
+                story.sources.setdefault(source)
+            story.updates = sorted(story.updates + other.updates, key=_update_time)
+            del story.updates[:-STORY_MAX_UPDATES]
+            story.first_seen = min(story.first_seen, other.first_seen)
+            if story.article is None:
+                story.article = other.article
+            del self._stories[other.id]
+            for alias in (other.id, *other.aliases):
+                self._aliases[alias] = story.id
+                story.aliases.append(alias)
+            return story.id
+
+    def threads(self, story_ids=None) -> list:
+        """Story threads, most recently updated first; only `story_ids` if given."""
+        with self._lock:
+            if story_ids is not None:
+                story_ids = {self.resolve(story_id) for story_id in story_ids}
+            stories = reversed(self._stories.values())
+            return [story.to_dict() for story in stories if story_ids is None or story.id in story_ids]
+
+    def snapshot(self) -> dict:
+        """Window state, for /health."""
+        with self._lock:
+            return {
+                "open": len(self._stories),
+                "items": self._items,
+                "window_s": self.window_s,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stories.clear()
+            self._postings.clear()
+            self._df.clear()
+            self._aliases.clear()
+            self._items = 0
+
+
+story_clusters = StoryClusters()
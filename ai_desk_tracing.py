@@ -0,0 +1,261 @@
+"""
+Structured, non-blocking logging and lightweight trace spans for AI Desk.
+
+Log records and finished spans go through a queue to a background listener
+thread, so coroutines never block on console or file I/O. Every record
+carries the current run ID, source and item ID (held in context variables),
+which lets an edition be rebuilt as a timeline from the JSON-lines trace
+file set by AI_DESK_TRACE_FILE. No outside collector is needed.
+"""
+import os
+import json
+import asyncio
+import time
+import uuid
+import queue
+import atexit
+import logging
+import logging.handlers
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from agents import TracingProcessor, set_trace_processors
+
+LOG_LEVEL = os.getenv("AI_DESK_LOG_LEVEL", "INFO")
+# "text" for humans, "json" for one JSON object per line
+LOG_FORMAT = os.getenv("AI_DESK_LOG_FORMAT", "text")
+# JSON-lines span exporter target; tracing is off when unset
+TRACE_FILE = os.getenv("AI_DESK_TRACE_FILE", "")
+
+run_id_var = contextvars.ContextVar("run_id", default=None)
+source_var = contextvars.ContextVar("source", default=None)
+item_id_var = contextvars.ContextVar("item_id", default=None)
+span_id_var = contextvars.ContextVar("span_id", default=None)
+
+CONTEXT_FIELDS = ("run_id", "source", "item_id")
+
+logger = logging.getLogger("ai_desk")
+span_logger = logging.getLogger("ai_desk.spans")
+
+_listener = None
+_span_handler = None
+
+
+def current_context() -> dict:
+    """Run, source and item IDs of the calling task, without empty values."""
+    values = {"run_id": run_id_var.get(), "source": source_var.get(), "item_id": item_id_var.get()}
+    return {key: value for key, value in values.items() if value}
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def item_id_for(item: dict) -> str:
+    """Short stable ID for a source item, from its link or title."""
+    key = item.get('url') or item.get('link') or item.get('title', '')
+    return uuid.uuid5(uuid.NAMESPACE_URL, key).hex[:10]
+
+
+@contextmanager
+def bind(**fields):
+    """Set run_id / source / item_id for the enclosed block (and tasks created in it)."""
+    variables = {"run_id": run_id_var, "source": source_var, "item_id": item_id_var}
+    tokens = [(variables[name], variables[name].set(value)) for name, value in fields.items()]
+    try:
+        yield
+    finally:
+        for variable, token in reversed(tokens):
+            variable.reset(token)
+
+
+# ================================================================================
+#                                   LOGGING
+# ================================================================================
+
+class _ContextFilter(logging.Filter):
+    """Stamp the caller's context onto the record before it crosses the queue."""
+
+    def filter(self, record):
+        for name, value in current_context().items():
+            if not hasattr(record, name):
+                setattr(record, name, value)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in CONTEXT_FIELDS:
+            if getattr(record, name, None):
+                payload[name] = getattr(record, name)
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        prefix = f"[{record.source}] " if getattr(record, "source", None) else ""
+        run = f" run={record.run_id}" if getattr(record, "run_id", None) else ""
+        line = f"{self.formatTime(record, '%H:%M:%S')} {record.levelname:<7}{run} {prefix}{record.getMessage()}"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class _SpanRecordFilter(logging.Filter):
+    def __init__(self, spans: bool):
+        super().__init__()
+        self.spans = spans
+
+    def filter(self, record):
+        return hasattr(record, "span") == self.spans
+
+
+class JsonlSpanHandler(logging.FileHandler):
+    """Writes each finished span as one JSON line."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        super().__init__(path, encoding="utf-8")
+        self.addFilter(_SpanRecordFilter(spans=True))
+
+    def format(self, record):
+        return json.dumps(record.span, default=str)
+
+
+def configure_logging(trace_file: str = None):
+    """
+    Route `ai_desk` logs through a queue to a background listener thread.
+    Safe to call again, e.g. to point the span exporter at another file.
+    """
+    global _listener, _span_handler
+    trace_file = TRACE_FILE if trace_file is None else trace_file
+    if _listener is not None:
+        _listener.stop()
+
+    console = logging.StreamHandler()
+    console.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    console.addFilter(_SpanRecordFilter(spans=False))
+    handlers = [console]
+    _span_handler = JsonlSpanHandler(trace_file) if trace_file else None
+    if _span_handler:
+        handlers.append(_span_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+    logger.handlers = [queue_handler]
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+    span_logger.setLevel(logging.INFO)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    # Capture the agents SDK's own spans locally instead of discarding them
+    set_trace_processors([SdkSpanForwarder()] if _span_handler else [])
+
+
+def flush_logging():
+    """Drain the queue (used at exit and by tests before reading the trace file)."""
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+        if _span_handler:
+            _span_handler.flush()
+
+
+def tracing_enabled() -> bool:
+    return _span_handler is not None
+
+
+atexit.register(lambda: _listener and _listener.stop())
+
+
+# ================================================================================
+#                                    SPANS
+# ================================================================================
+
+def _export_span(span: dict):
+    span_logger.info(span["name"], extra={"span": span})
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time the enclosed block as a span of the current run. The span is exported
+    with its parent span, run/source/item IDs, duration and error status.
+    """
+    if not tracing_enabled():
+        yield attributes
+        return
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = span_id_var.get()
+    token = span_id_var.set(span_id)
+    started_at = time.time()
+    started = time.perf_counter()
+    status, error = "ok", None
+    try:
+        yield attributes
+    except BaseException as e:
+        status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span_id_var.reset(token)
+        _export_span({
+            "type": "span",
+            "name": name,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            **current_context(),
+            "start": datetime.fromtimestamp(started_at, timezone.utc).isoformat(),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "status": status,
+            "error": error,
+            "attributes": attributes,
+        })
+
+
+class SdkSpanForwarder(TracingProcessor):
+    """Forwards finished agents-SDK spans (model calls, agent runs) to the local exporter."""
+
+    def on_trace_start(self, trace):
+        pass
+
+    def on_trace_end(self, trace):
+        pass
+
+    def on_span_start(self, span):
+        pass
+
+    def on_span_end(self, span):
+        exported = span.export() or {}
+        _export_span({
+            "type": "sdk_span",
+            "name": exported.get("span_data", {}).get("type", "sdk"),
+            "span_id": span.span_id,
+            "parent_id": span.parent_id or span_id_var.get(),
+            **current_context(),
+            "start": span.started_at,
+            "end": span.ended_at,
+            "status": "error" if span.error else "ok",
+            "error": span.error,
+            "attributes": exported.get("span_data", {}),
+        })
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self):
+        pass
@@ -0,0 +1,73 @@
+"""
+URL canonicalization, so the same page reached through different links
+(tracking parameters, http/https, www, trailing slash, YouTube short
+forms) is recognized as one link when articles are merged.
+"""
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "ocid", "cmpid",
+    "ref", "ref_src", "ref_url", "referrer", "si", "guccounter", "guce_referrer", "guce_referrer_sig",
+    "_ga", "_gl", "sr_share",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_", "oly_")
+
+YOUTUBE_HOSTS = frozenset({"youtube.com", "m.youtube.com", "music.youtube.com", "youtube-nocookie.com"})
+_YOUTUBE_PATH_RE = re.compile(r'^/(?:shorts|embed|live|v)/([\w-]{6,})')
+_SLASHES_RE = re.compile(r'/{2,}')
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def _youtube_id(host: str, path: str, query: list) -> str | None:
+    if host == "youtu.be":
+        return path.strip("/").split("/")[0] or None
+    if host in YOUTUBE_HOSTS:
+        match = _YOUTUBE_PATH_RE.match(path)
+        if match:
+            return match.group(1)
+        if path == "/watch":
+            return next((value for name, value in query if name == "v"), None)
+    return None
+
+
+@lru_cache(maxsize=8192)
+def canonical_url(url: str) -> str:
+    """
+    Comparison key for a URL: https, lowercase host without www. and default
+    port, no fragment, no tracking parameters, remaining parameters sorted,
+    no trailing slash, and YouTube videos as https://youtube.com/watch?v=ID.
+    Strings that are not absolute http(s) URLs are returned stripped.
+    """
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if parts.scheme.lower() not in ("http", "https") or not parts.hostname:
+        return url
+
+    host = parts.hostname.lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    if port in (80, 443):
+        port = None
+    query = parse_qsl(parts.query, keep_blank_values=True)
+
+    video_id = _youtube_id(host, parts.path, query)
+    if video_id:
+        return f"https://youtube.com/watch?v={video_id}"
+
+    path = _SLASHES_RE.sub("/", parts.path)
+    if path.endswith("/"):
+        path = path.rstrip("/")
+    query = sorted((name, value) for name, value in query if not _is_tracking(name))
+    netloc = f"{host}:{port}" if port else host
+    return urlunsplit(("https", netloc, path, urlencode(query), ""))
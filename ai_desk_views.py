@@ -0,0 +1,139 @@
+"""
+Projections of an edition's articles for list views.
+
+Lists (news feed, hero carousel, sidebar) need titles, descriptions,
+slugs, tags, the lead image, links and timestamps, not the article body.
+Only full articles are stored; each worker derives the `summary` view
+from them once per edition, and the JSON a given (view, fields) request
+returns is encoded once per edition and served as bytes from then on.
+The full body of a single article is looked up by id or slug.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+VIEWS = ("summary", "full")
+# Every top-level key an article can have, as accepted by `fields=`
+ARTICLE_KEYS = (
+    "id", "meta_title", "meta_description", "meta_image_prompt", "alt_text", "slug", "tags", "content",
+    "source_links", "video_links", "images", "published", "timestamp", "story_id",
+)
+# What list views read; `content` keeps only its headings and `images` only the lead image
+SUMMARY_KEYS = (
+    "id", "meta_title", "meta_description", "alt_text", "slug", "tags", "content",
+    "source_links", "video_links", "images", "published", "timestamp", "story_id",
+)
+# Encoded responses kept per worker, across editions and parameter combinations
+RESPONSE_CACHE_SIZE = 32
+
+
+def summarize(article: dict) -> dict:
+    """
+    An article without its body: section headings are kept (with empty
+    paragraphs, so the shape stays that of a full article) and only the lead image.
+    """
+    summary = {key: article[key] for key in SUMMARY_KEYS if key in article}
+    summary["content"] = [{"heading": section.get("heading", ""), "paragraphs": []}
+                          for section in article.get("content", []) if isinstance(section, dict)]
+    summary["images"] = article.get("images", [])[:1]
+    return summary
+
+
+def parse_fields(fields: str | None) -> tuple | None:
+    """Validated keys of a comma-separated `fields=` value. Raises ValueError on unknown keys."""
+    if not fields:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in ARTICLE_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown article fields: {', '.join(unknown)}")
+    return names
+
+
+def _project(article: dict, fields: tuple) -> dict:
+    return {key: article[key] for key in fields if key in article}
+
+
+class EditionViews:
+    """Encoded /news responses, summaries and an article lookup, memoized per stored edition."""
+
+    def __init__(self, size: int = RESPONSE_CACHE_SIZE):
+        self.size = size
+        self._responses = OrderedDict()  # (edition, view, fields) -> bytes
+        self._summaries = (None, [])  # (edition, summarized articles)
+        self._lookup = (None, {})  # (edition, {id or slug: article})
+        self._lock = threading.Lock()
+
+    def summaries(self, edition: dict) -> list:
+        """The edition's articles in the `summary` view."""
+        key = edition.get("generated_at")
+        with self._lock:
+            if key is not None and self._summaries[0] == key:
+                return self._summaries[1]
+        summaries = [summarize(article) for article in edition["articles"]]
+        if key is not None:
+            with self._lock:
+                self._summaries = (key, summaries)
+        return summaries
+
+    def cached(self, edition: dict, view: str = "full", fields: tuple = None) -> bytes | None:
+        """The memoized /news body, or None if it still has to be encoded."""
+        key = (edition.get("generated_at"), view, fields)
+        if key[0] is None:
+            return None
+        with self._lock:
+            body = self._responses.get(key)
+            if body is not None:
+                self._responses.move_to_end(key)
+            return body
+
+    def response(self, edition: dict, view: str = "full", fields: tuple = None) -> bytes:
+        """
+        The JSON body of /news for this edition, view and field selection.
+        Editions that were never stored (no `generated_at`) are not memoized.
+        Encoding a full edition takes milliseconds, so async callers run this
+        in a thread when `cached()` misses.
+        """
+        key = (edition.get("generated_at"), view, fields)
+        body = self.cached(edition, view, fields)
+        if body is not None:
+            return body
+        articles = edition["articles"]
+        if view == "summary":
+            articles = self.summaries(edition)
+        if fields:
+            articles = [_project(article, fields) for article in articles]
+        body = json.dumps({
+            "articles": articles,
+            "partial": edition["partial"],
+            "sources": edition["sources"],
+            "stories": edition.get("stories", []),
+        }).encode("utf-8")
+        if key[0] is not None:
+            with self._lock:
+                self._responses[key] = body
+                while len(self._responses) > self.size:
+                    self._responses.popitem(last=False)
+        return body
+
+    def article(self, edition: dict, article_id: str) -> dict | None:
+        """A full article of the edition by id or slug."""
+        key = edition.get("generated_at")
+        with self._lock:
+            if key is None or self._lookup[0] != key:
+                lookup = {}
+                for article in edition["articles"]:
+                    for name in ("slug", "id"):
+                        if article.get(name):
+                            lookup[article[name]] = article
+                self._lookup = (key, lookup)
+            return self._lookup[1].get(article_id)
+
+    def clear(self):
+        with self._lock:
+            self._responses.clear()
+            self._summaries = (None, [])
+            self._lookup = (None, {})
+
+
+edition_views = EditionViews()
@@ -0,0 +1,5 @@
+"""
+Benchmarks for AI Desk. Every scenario runs `ai_desk()` offline through
+the replay harness, so numbers are comparable between commits.
+Run them with `python run_benchmarks.py`.
+"""
@@ -0,0 +1,96 @@
+"""
+Memory of retained articles: Writer-shaped dicts against the compact
+`Article` records the ArticleCache keeps.
+
+Every article is decoded from its own JSON text, as Writer replies are, so
+no strings are shared between articles unless the representation interns
+them. Reported memory is what tracemalloc still sees allocated once all
+articles are built.
+
+    python -m benchmarks.articles --count 100000
+"""
+import gc
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+from ai_desk_articles import Article
+
+SOURCES = ("Google", "Forbes", "YouTube", "Wikipedia")
+TAGS = ("AI", "Machine Learning", "OpenAI", "Regulation", "Robotics", "Chips", "Startups", "Research")
+
+
+def article_json(n: int, rng: random.Random) -> str:
+    """One Writer-style article: three sections, two source links, a video and an image."""
+    source = rng.choice(SOURCES)
+    title = f"AI story number {n} shakes up the industry"
+    return json.dumps({
+        "meta_title": title,
+        "meta_description": f"What story {n} means for the AI industry and its customers.",
+        "meta_image_prompt": f"Editorial illustration for story {n}",
+        "alt_text": f"Illustration for story {n}",
+        "slug": f"ai-story-number-{n}",
+        "tags": rng.sample(TAGS, 4),
+        "content": [
+            {"heading": heading, "paragraphs": [f"{heading} paragraph {p} of story {n}. " * 3 for p in range(2)]}
+            for heading in ("Overview", "Details", "Outlook")
+        ],
+        "source_links": [{"title": title, "url": f"https://news.example.com/{source.lower()}/{n}/{k}",
+                          "source": rng.choice(SOURCES)} for k in range(2)],
+        "video_links": [{"title": title, "url": f"https://www.youtube.com/watch?v=vid{n:07d}",
+                         "source": "YouTube", "published": "2025-12-15T18:00:00Z"}],
+        "images": [{"url": f"https://images.example.com/{n}.jpg", "alt": title, "source": source, "generated": False}],
+        "id": f"{n:08x}-0000-4000-8000-000000000000",
+        "timestamp": "2025-12-15T18:00:00+00:00",
+        "published": "2025-12-15T18:00:00+00:00",
+    })
+
+
+def measure(count: int, build, seed: int = 0) -> dict:
+    """Traced memory held by `count` articles built by `build(json_text)`."""
+    rng = random.Random(seed)
+    texts = [article_json(n, rng) for n in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    retained = [build(text) for text in texts]
+    elapsed = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del retained
+    return {
+        "count": count,
+        "memory_mb": round(memory / (1024 * 1024), 2),
+        "bytes_per_article": round(memory / count),
+        "build_s": round(elapsed, 3),
+    }
+
+
+def run(count: int = 100_000, seed: int = 0) -> dict:
+    dicts = measure(count, json.loads, seed)
+    compact = measure(count, lambda text: Article.from_dict(json.loads(text)), seed)
+    return {
+        "dict": dicts,
+        "article": compact,
+        "saving": round(1 - compact["memory_mb"] / dicts["memory_mb"], 3) if dicts["memory_mb"] else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retained article memory benchmark")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also save the report as JSON")
+    args = parser.parse_args()
+
+    result = run(args.count, args.seed)
+    print(f"{'representation':<16} {'memory_mb':>10} {'bytes/article':>14} {'build_s':>8}")
+    for name in ("dict", "article"):
+        row = result[name]
+        print(f"{name:<16} {row['memory_mb']:>10.2f} {row['bytes_per_article']:>14} {row['build_s']:>8.3f}")
+    print(f"saving: {result['saving']:.1%}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
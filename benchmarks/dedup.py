@@ -0,0 +1,192 @@
+"""
+Dedup quality and speed benchmark for `ArticleCache`.
+
+Quality: for every labeled headline pair, a one-article cache holding
+headline `a` is asked `find_similar(b, threshold)`; a match on a duplicate
+pair is a true positive. Precision, recall and F1 are reported per
+threshold, overall and per pair kind.
+
+Speed: the cache is filled to each size (1k, 10k, 100k articles) and then
+timed on `add_or_merge` calls for articles that match nothing (the common
+case, and the slowest, since every cached article is compared), so the
+numbers show how insert cost grows with the cache, and on one `add_batch`
+of such articles, as an edition merges a source. Memory is the traced
+allocation of the filled cache.
+
+Both engines are reported: `tfidf` is the ArticleCache as shipped,
+`jaccard` the earlier title-only Jaccard loop, kept as the baseline.
+
+    python -m benchmarks.dedup
+    python -m benchmarks.dedup --engines tfidf --sizes 1000 10000 --output dedup.json
+"""
+import gc
+import json
+import time
+import random
+import string
+import argparse
+import tracemalloc
+
+from ai_desk_agents import ArticleCache
+from ai_desk_articles import Article
+from benchmarks.dedup_corpus import load_corpus, headlines
+
+DEFAULT_THRESHOLDS = (0.2, 0.3, 0.35, 0.4, 0.5, 0.6, 0.7, 0.8)
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+class JaccardCache(ArticleCache):
+    """The pre-TF-IDF matcher: Jaccard over normalized title words, one cached article at a time."""
+
+    def _similarity(self, title1: str, title2: str) -> float:
+        set1 = set(self._normalize_title(title1).split())
+        set2 = set(self._normalize_title(title2).split())
+        if not set1 or not set2:
+            return 0.0
+        return len(set1 & set2) / len(set1 | set2)
+
+    def find_similar(self, title: str, threshold: float = None) -> str | None:
+        threshold = 0.5 if threshold is None else threshold
+        for key, article in self.articles.items():
+            if self._similarity(title, article.meta_title) >= threshold:
+                return key
+        return None
+
+    def add_batch(self, articles: list, threshold: float = None) -> list:
+        results = []
+        for article in articles:
+            record = article if isinstance(article, Article) else Article.from_dict(article)
+            key = self.find_by_url(record) or self.find_similar(record.meta_title, threshold)
+            results.append(self._merge(key, record) if key else self.articles[self._insert(record)])
+        return results
+
+    def _insert(self, article: Article) -> str:
+        key = self._normalize_title(article.meta_title)
+        self.articles[key] = article
+        return key
+
+
+ENGINES = {"tfidf": ArticleCache, "jaccard": JaccardCache}
+
+
+def _scores(tp: int, fp: int, fn: int) -> dict:
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": round(precision, 4), "recall": round(recall, 4), "f1": round(f1, 4),
+            "tp": tp, "fp": fp, "fn": fn}
+
+
+def evaluate_quality(corpus: list, thresholds=DEFAULT_THRESHOLDS, cache_factory=ArticleCache) -> list:
+    """Precision/recall/F1 of `find_similar` at each threshold."""
+    results = []
+    for threshold in thresholds:
+        counts = {}
+        for pair in corpus:
+            cache = cache_factory()
+            cache.add_or_merge({"meta_title": pair["a"]})
+            predicted = cache.find_similar(pair["b"], threshold) is not None
+            for group in {"all", pair.get("kind", "all")}:
+                tally = counts.setdefault(group, {"tp": 0, "fp": 0, "fn": 0})
+                if predicted and pair["duplicate"]:
+                    tally["tp"] += 1
+                elif predicted:
+                    tally["fp"] += 1
+                elif pair["duplicate"]:
+                    tally["fn"] += 1
+        row = {"threshold": threshold, **_scores(**counts.pop("all"))}
+        # Per kind, false positives are what matter for hard negatives, recall for duplicates
+        row["by_kind"] = {kind: _scores(**tally) for kind, tally in sorted(counts.items())}
+        results.append(row)
+    return results
+
+
+def _fill(cache: ArticleCache, titles: list):
+    """
+    Put `titles` straight into the cache. Going through add_or_merge would
+    cost O(n^2) similarity checks, which is exactly what the timed inserts measure.
+    """
+    for title in titles:
+        cache._insert(Article(meta_title=title))
+
+
+def _probe_titles(count: int, seed: int = 99) -> list:
+    """Headlines of made-up words, unrelated to the filler and to each other."""
+    rng = random.Random(seed)
+    return [" ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(8)) for _ in range(5))
+            for _ in range(count)]
+
+
+def measure_speed(sizes=DEFAULT_SIZES, inserts: int = 100, budget_s: float = 10.0,
+                  cache_factory=ArticleCache, batch: int = 20) -> list:
+    """Insert throughput, one batch merge and memory with the cache filled to each size."""
+    results = []
+    # Unrelated to every filler headline, so each insert scans the whole cache
+    probes = _probe_titles(inserts + batch)
+    probes, batch_probes = probes[:inserts], probes[inserts:]
+    for size in sizes:
+        gc.collect()
+        tracemalloc.start()
+        cache = cache_factory()
+        _fill(cache, headlines(size))
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        done = 0
+        started = time.perf_counter()
+        for title in probes:
+            cache.add_or_merge({"meta_title": title, "source_links": [], "tags": []})
+            done += 1
+            if time.perf_counter() - started > budget_s:
+                break
+        elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        cache.add_batch([{"meta_title": title} for title in batch_probes])
+        batch_s = time.perf_counter() - started
+        results.append({
+            "size": size,
+            "inserts": done,
+            "inserts_per_s": round(done / elapsed, 2),
+            "ms_per_insert": round(elapsed / done * 1000, 3),
+            "batch": len(batch_probes),
+            "batch_ms": round(batch_s * 1000, 3),
+            "memory_mb": round(memory / (1024 * 1024), 3),
+            "bytes_per_article": round(memory / size),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ArticleCache dedup quality and speed benchmark")
+    parser.add_argument("--thresholds", nargs="*", type=float, default=list(DEFAULT_THRESHOLDS))
+    parser.add_argument("--sizes", nargs="*", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--inserts", type=int, default=100, help="timed inserts per size")
+    parser.add_argument("--budget-s", type=float, default=10.0, help="time limit for the inserts at one size")
+    parser.add_argument("--engines", nargs="*", choices=sorted(ENGINES), default=["tfidf", "jaccard"])
+    parser.add_argument("--output", help="also save the report as JSON")
+    args = parser.parse_args()
+
+    report = {}
+    for engine in args.engines:
+        cache_factory = ENGINES[engine]
+        quality = evaluate_quality(load_corpus(), args.thresholds, cache_factory)
+        print(f"[{engine}]")
+        print(f"{'threshold':>9} {'precision':>10} {'recall':>8} {'f1':>7} {'hard-neg fp':>12}")
+        for row in quality:
+            hard = row["by_kind"].get("hard_negative", {})
+            print(f"{row['threshold']:>9.2f} {row['precision']:>10.3f} {row['recall']:>8.3f} "
+                  f"{row['f1']:>7.3f} {hard.get('fp', 0):>12}")
+
+        speed = measure_speed(args.sizes, args.inserts, args.budget_s, cache_factory)
+        print()
+        print(f"{'size':>8} {'inserts/s':>10} {'ms/insert':>10} {'batch ms':>10} {'memory MB':>10} {'B/article':>10}")
+        for row in speed:
+            print(f"{row['size']:>8} {row['inserts_per_s']:>10.1f} {row['ms_per_insert']:>10.3f} "
+                  f"{row['batch_ms']:>10.1f} {row['memory_mb']:>10.2f} {row['bytes_per_article']:>10}")
+        print()
+        report[engine] = {"quality": quality, "speed": speed}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
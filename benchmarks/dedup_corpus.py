@@ -0,0 +1,119 @@
+"""
+Synthesized, labeled corpus of AI-news headline pairs for dedup benchmarks.
+
+Each pair is two headlines plus `duplicate`: true when both describe the
+same event. Duplicates are the same event written up by different outlets
+(wire style with a publisher suffix, magazine title case, synonyms,
+reordered clauses); distinct pairs include hard negatives that share the
+company or product but report a different event. The corpus is seeded, so
+`python -m benchmarks.dedup_corpus` regenerates the checked-in file exactly.
+"""
+import os
+import json
+import random
+import argparse
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "fixtures", "dedup", "headline_pairs.jsonl")
+
+ACTORS = ["OpenAI", "Google DeepMind", "Anthropic", "Meta", "Microsoft", "Nvidia", "Apple", "Amazon",
+          "Mistral", "xAI", "IBM", "Samsung", "Baidu", "Alibaba", "Cohere", "Hugging Face"]
+PRODUCTS = ["GPT-5.2", "Gemini 3 Flash", "Claude Opus", "Llama 4", "Copilot", "Blackwell chips", "Siri",
+            "Alexa+", "Le Chat", "Grok 3", "Watsonx", "Galaxy AI", "Ernie Bot", "Qwen 3", "Command R",
+            "open model hub", "AI agents", "coding assistant", "image generator", "voice mode"]
+# (present tense, synonyms used by other outlets)
+EVENTS = [
+    ("releases", ["launches", "rolls out", "debuts", "ships"]),
+    ("delays", ["postpones", "pushes back", "holds off on"]),
+    ("cuts prices of", ["slashes prices for", "lowers the cost of", "discounts"]),
+    ("open-sources", ["releases the weights of", "opens up", "publishes the code for"]),
+    ("faces lawsuit over", ["is sued over", "hit with lawsuit over", "faces legal challenge over"]),
+    ("expands", ["broadens", "widens access to", "scales up"]),
+    ("pauses", ["suspends", "halts", "temporarily stops"]),
+    ("brings", ["adds", "integrates", "introduces"]),
+]
+DETAILS = ["for enterprise customers", "in Europe", "to developers", "after safety review",
+           "with faster reasoning", "for free users", "on mobile devices", "in India",
+           "amid regulatory scrutiny", "to banks", "for schools", "with longer context"]
+PUBLISHERS = ["Reuters", "The Verge", "Bloomberg", "TechCrunch", "CNBC", "Financial Times", "Wired",
+              "Engadget", "Politico Europe", "The Information", "Axios", "Ars Technica"]
+MAGAZINE_TAILS = ["What It Means For Business", "Here's What Changes", "Why It Matters",
+                  "What You Need To Know", "The Details", "Winners And Losers"]
+
+
+def _event(rng: random.Random) -> tuple:
+    return (rng.choice(ACTORS), rng.randrange(len(EVENTS)), rng.choice(PRODUCTS), rng.choice(DETAILS))
+
+
+def render(event: tuple, rng: random.Random) -> str:
+    """One outlet's headline for an event."""
+    actor, verb_idx, product, detail = event
+    verb, synonyms = EVENTS[verb_idx]
+    verb = rng.choice([verb] + synonyms)
+    style = rng.randrange(4)
+    if style == 0:
+        return f"{actor} {verb} {product} {detail} - {rng.choice(PUBLISHERS)}"
+    if style == 1:
+        return f"{actor} {verb} {product}: {rng.choice(MAGAZINE_TAILS)}".title()
+    if style == 2:
+        return f"{product}: {actor} {verb} it {detail}"
+    return f"{actor} {verb} {product} {detail}"
+
+
+def hard_negative(event: tuple, rng: random.Random) -> tuple:
+    """Same company or product, different event."""
+    actor, verb_idx, product, detail = event
+    change = rng.randrange(3)
+    if change == 0:
+        other = rng.choice([idx for idx in range(len(EVENTS)) if idx != verb_idx])
+        return (actor, other, product, rng.choice(DETAILS))
+    if change == 1:
+        return (actor, verb_idx, rng.choice([p for p in PRODUCTS if p != product]), detail)
+    return (rng.choice([a for a in ACTORS if a != actor]), verb_idx, product, detail)
+
+
+def generate(pairs: int = 600, seed: int = 7) -> list:
+    """Balanced corpus: half duplicates, a quarter hard negatives, a quarter random pairs."""
+    rng = random.Random(seed)
+    corpus = []
+    for idx in range(pairs):
+        event = _event(rng)
+        kind = ("duplicate", "duplicate", "hard_negative", "random")[idx % 4]
+        if kind == "duplicate":
+            other = event
+        elif kind == "hard_negative":
+            other = hard_negative(event, rng)
+        else:
+            other = _event(rng)
+        duplicate = other == event
+        corpus.append({"a": render(event, rng), "b": render(other, rng), "duplicate": duplicate, "kind": kind})
+    return corpus
+
+
+def headlines(count: int, seed: int = 11) -> list:
+    """`count` distinct headlines, for filling a cache to a given size."""
+    rng = random.Random(seed)
+    titles = []
+    for idx in range(count):
+        title = render(_event(rng), rng)
+        titles.append(f"{title} #{idx}")
+    return titles
+
+
+def load_corpus(path: str = CORPUS_PATH) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate the labeled headline-pair corpus")
+    parser.add_argument("--pairs", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=CORPUS_PATH)
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        for pair in generate(args.pairs, args.seed):
+            f.write(json.dumps(pair) + "\n")
+    print(f"Wrote {args.pairs} pairs to {args.output}")
@@ -0,0 +1,62 @@
+"""
+Feed parsing benchmark: feedparser over the whole feed against the
+streaming fast path that stops after `max_items` entries.
+
+    python -m benchmarks.feeds --items 500 --max-items 3
+"""
+import time
+import argparse
+import tracemalloc
+
+from ai_desk_cpu import parse_feed, parse_feed_streaming
+
+
+def synthesize_feed(items: int) -> bytes:
+    """An RSS feed shaped like Google News: HTML descriptions, RFC 822 dates."""
+    entries = "".join(
+        f"<item><title>AI story number {n} - Publisher</title>"
+        f"<link>https://news.example.com/articles/{n}</link>"
+        f"<description>&lt;a href=&quot;https://news.example.com/articles/{n}&quot;&gt;AI story number {n}"
+        f"&lt;/a&gt;&amp;nbsp;&amp;nbsp;&lt;font color=&quot;#6f6f6f&quot;&gt;Publisher&lt;/font&gt;</description>"
+        f"<pubDate>Mon, 15 Dec 2025 18:00:00 GMT</pubDate></item>"
+        for n in range(items)
+    )
+    return (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f'<title>Feed</title>{entries}</channel></rss>').encode("utf-8")
+
+
+def measure(parse, data: bytes, max_items: int, rounds: int = 5) -> dict:
+    """Best-of-`rounds` wall time and the traced peak memory of one parse."""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        parse(data, max_items)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    parse(data, max_items)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": round(best * 1000, 3), "peak_kb": round(peak / 1024, 1)}
+
+
+def run(items: int = 500, max_items: int = 3) -> dict:
+    data = synthesize_feed(items)
+    return {
+        "feed_kb": round(len(data) / 1024, 1),
+        "items": items,
+        "max_items": max_items,
+        "feedparser": measure(parse_feed, data, max_items),
+        "streaming": measure(parse_feed_streaming, data, max_items),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feed parsing benchmark")
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--max-items", type=int, default=3)
+    args = parser.parse_args()
+
+    result = run(args.items, args.max_items)
+    print(f"feed: {result['items']} items, {result['feed_kb']} KB, keeping {result['max_items']}")
+    for name in ("feedparser", "streaming"):
+        print(f"  {name:<11} {result[name]['ms']:>10.3f} ms {result[name]['peak_kb']:>10.1f} KB peak")
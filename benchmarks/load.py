@@ -0,0 +1,154 @@
+"""
+Load test for the FastAPI service. N concurrent clients hit each endpoint
+at the same time, by default in-process over ASGI with the pipeline
+running offline through the replay harness. Reports p50/p95/p99 latency
+and requests per second per endpoint, plus event-loop lag: a coroutine
+that should wake every few milliseconds records how late it is, so any
+blocking call on the loop (a synchronous fetch, heavy CPU work) shows up
+as lag and as slow `/health` responses.
+
+    python -m benchmarks.load --clients 8 --requests 10
+    python -m benchmarks.load --url http://127.0.0.1:8000 --endpoint /health
+"""
+import json
+import time
+import asyncio
+import argparse
+
+import httpx
+
+from ai_desk_replay import ReplayConfig, replay_session
+from benchmarks.scenarios import SCENARIOS, scaled_latency
+
+DEFAULT_ENDPOINTS = ("/news", "/health")
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a periodic sleeper."""
+
+    def __init__(self, interval_s: float = 0.005):
+        self.interval_s = interval_s
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            self.lags.append(max(0.0, loop.time() - expected))
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    def report(self) -> dict:
+        lags = self.lags or [0.0]
+        return {
+            "samples": len(self.lags),
+            "max_ms": round(max(lags) * 1000, 2),
+            "p99_ms": round(_percentile(lags, 99) * 1000, 2),
+        }
+
+
+async def _client(http: httpx.AsyncClient, endpoint: str, requests: int, samples: list, errors: list):
+    for _ in range(requests):
+        started = time.perf_counter()
+        try:
+            response = await http.get(endpoint)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        samples.append(time.perf_counter() - started)
+
+
+async def run_load(app=None, base_url: str = None, endpoints=DEFAULT_ENDPOINTS, clients: int = 4,
+                   requests: int = 5, timeout_s: float = 120) -> dict:
+    """
+    Hit every endpoint with `clients` concurrent clients, each sending
+    `requests` sequential requests, all endpoints at once. Pass `app` for an
+    in-process run (loop lag is then measured on the server's loop) or
+    `base_url` for a running server.
+    """
+    if app is not None:
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://loadtest"
+    else:
+        transport = None
+    samples = {endpoint: [] for endpoint in endpoints}
+    errors = {endpoint: [] for endpoint in endpoints}
+    finished = {}
+
+    async def endpoint_clients(http, endpoint):
+        await asyncio.gather(*(_client(http, endpoint, requests, samples[endpoint], errors[endpoint])
+                               for _ in range(clients)))
+        finished[endpoint] = time.perf_counter()
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=timeout_s) as http:
+        async with LoopLagMonitor() as monitor:
+            started = time.perf_counter()
+            await asyncio.gather(*(endpoint_clients(http, endpoint) for endpoint in endpoints))
+            elapsed = time.perf_counter() - started
+
+    report = {"clients": clients, "requests_per_client": requests, "elapsed_s": round(elapsed, 3),
+              "endpoints": {}, "loop_lag": monitor.report() if app is not None else None}
+    for endpoint in endpoints:
+        latencies = samples[endpoint]
+        report["endpoints"][endpoint] = {
+            "requests": len(latencies),
+            "errors": len(errors[endpoint]),
+            "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+            "rps": round(len(latencies) / (finished[endpoint] - started), 2),
+        }
+    return report
+
+
+def run_offline_load(scenario: str = "baseline", latency_scale: float = 1.0, **kwargs) -> dict:
+    """`run_load` against FAST_API:app in-process, with the pipeline replayed offline."""
+    from FAST_API import app
+    settings = SCENARIOS[scenario]
+    replay = ReplayConfig(latency=scaled_latency(settings["latency"], latency_scale), errors=settings["errors"])
+    with replay_session(replay):
+        return asyncio.run(run_load(app=app, **kwargs))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI Desk API load test")
+    parser.add_argument("--url", help="running server to test; default is in-process with replayed upstreams")
+    parser.add_argument("--endpoint", nargs="*", default=list(DEFAULT_ENDPOINTS))
+    parser.add_argument("--clients", type=int, default=4, help="concurrent clients per endpoint")
+    parser.add_argument("--requests", type=int, default=5, help="sequential requests per client")
+    parser.add_argument("--scenario", default="baseline", choices=sorted(SCENARIOS))
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--output", help="also save the report as JSON")
+    args = parser.parse_args()
+
+    if args.url:
+        result = asyncio.run(run_load(base_url=args.url, endpoints=args.endpoint,
+                                      clients=args.clients, requests=args.requests))
+    else:
+        result = run_offline_load(args.scenario, args.latency_scale, endpoints=args.endpoint,
+                                  clients=args.clients, requests=args.requests)
+
+    print(f"{'endpoint':<12} {'reqs':>5} {'errs':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rps':>8}")
+    for endpoint, row in result["endpoints"].items():
+        print(f"{endpoint:<12} {row['requests']:>5} {row['errors']:>5} {row['p50_ms']:>9.1f} "
+              f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['rps']:>8.1f}")
+    if result["loop_lag"]:
+        print(f"event loop lag: max {result['loop_lag']['max_ms']}ms, p99 {result['loop_lag']['p99_ms']}ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,114 @@
+"""
+End-to-end edition benchmark. Runs `ai_desk()` under the replay harness
+for one scenario at one concurrency level (editions in flight at once) and
+prints the result as JSON. `run_benchmarks.py` starts one process per
+scenario and level so peak RSS is measured in isolation.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import statistics
+from unittest.mock import patch
+
+from ai_desk_replay import ReplayConfig, replay_session, reset_pipeline_state
+import ai_desk_agents
+import ai_desk_cpu
+
+from benchmarks.scenarios import SCENARIOS, scaled_latency
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def _timed_edition(replay: ReplayConfig) -> dict:
+    """One edition, with the time the first article came out of the Writer."""
+    first_article = []
+    attach_images = ai_desk_agents._attach_images
+    llm_calls = replay.calls["llm"]
+
+    def record_first(article, item, source_name):
+        if not first_article:
+            first_article.append(time.perf_counter())
+        return attach_images(article, item, source_name)
+
+    status = {}
+    started = time.perf_counter()
+    with patch.object(ai_desk_agents, "_attach_images", record_first):
+        articles = await ai_desk_agents.ai_desk(status=status)
+    wall = time.perf_counter() - started
+    return {
+        "wall_s": wall,
+        "first_article_s": first_article[0] - started if first_article else None,
+        "writer_calls": replay.calls["llm"] - llm_calls,
+        "articles": len(articles),
+        "partial": status.get("partial", False),
+    }
+
+
+async def _run(replay: ReplayConfig, concurrency: int, repeat: int) -> tuple:
+    editions = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        reset_pipeline_state()
+        editions.extend(await asyncio.gather(*(_timed_edition(replay) for _ in range(concurrency))))
+    return editions, time.perf_counter() - started
+
+
+def run_scenario(name: str, concurrency: int = 1, repeat: int = 3, latency_scale: float = 1.0,
+                 seed: int = 0) -> dict:
+    """Benchmark one scenario; returns summary statistics plus every edition."""
+    scenario = SCENARIOS[name]
+    replay = ReplayConfig(
+        latency=scaled_latency(scenario["latency"], latency_scale),
+        errors=scenario["errors"],
+        seed=seed,
+    )
+    ai_desk_cpu.warm_up()
+    with replay_session(replay), \
+         patch.object(ai_desk_agents, "WRITER_BATCH_SIZE", scenario["batch_size"]):
+        editions, elapsed = asyncio.run(_run(replay, concurrency, repeat))
+
+    walls = [e["wall_s"] for e in editions]
+    firsts = [e["first_article_s"] for e in editions if e["first_article_s"] is not None]
+    total_articles = sum(e["articles"] for e in editions)
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "repeat": repeat,
+        "latency_scale": latency_scale,
+        "editions": len(editions),
+        "wall_s_p50": round(statistics.median(walls), 4),
+        "wall_s_p95": round(_percentile(walls, 95), 4),
+        "first_article_s_p50": round(statistics.median(firsts), 4) if firsts else None,
+        "writer_calls_per_edition": round(sum(e["writer_calls"] for e in editions) / len(editions), 2),
+        "articles_per_edition": round(total_articles / len(editions), 2),
+        "editions_per_s": round(len(editions) / elapsed, 4),
+        "articles_per_s": round(total_articles / elapsed, 4),
+        "peak_rss_mb": peak_rss_mb(),
+        "runs": editions,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark one AI Desk scenario")
+    parser.add_argument("--scenario", default="baseline", choices=sorted(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = run_scenario(args.scenario, args.concurrency, args.repeat, args.latency_scale, args.seed)
+    print(json.dumps(result))
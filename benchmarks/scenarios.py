@@ -0,0 +1,43 @@
+"""
+Benchmark scenarios: simulated upstream latency (seconds, or a (low, high)
+range), injected failure rates and pipeline knobs for each named setup.
+"""
+
+# Roughly what the live services take from a laptop
+REALISTIC_LATENCY = {
+    "google": 0.3,
+    "forbes": 0.4,
+    "youtube": 0.25,
+    "wikipedia": 0.15,
+    "unsplash": 0.2,
+    "llm": (0.8, 1.6),
+}
+
+SCENARIOS = {
+    "baseline": {
+        "latency": REALISTIC_LATENCY,
+        "errors": {},
+        "batch_size": 1,
+    },
+    "batched": {
+        "latency": REALISTIC_LATENCY,
+        "errors": {},
+        "batch_size": 3,
+    },
+    "flaky": {
+        "latency": REALISTIC_LATENCY,
+        "errors": {"llm": 0.1, "forbes": 0.3},
+        "batch_size": 1,
+    },
+}
+
+
+def scaled_latency(latency: dict, scale: float) -> dict:
+    """Shrink or stretch every simulated latency, e.g. scale=0.1 for a quick run."""
+    scaled = {}
+    for upstream, value in latency.items():
+        if isinstance(value, (tuple, list)):
+            scaled[upstream] = tuple(bound * scale for bound in value)
+        else:
+            scaled[upstream] = value * scale
+    return scaled
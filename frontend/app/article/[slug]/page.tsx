@@ -1,7 +1,10 @@
 'use client';
 
+import { useEffect, useState } from 'react';
 import { useParams } from 'next/navigation';
 import { useNews } from '@/contexts/NewsContext';
+import { fetchArticle } from '@/lib/api';
+import { NewsArticle } from '@/lib/types';
 import Header from '@/components/Header';
 import Footer from '@/components/Footer';
 import { extractYouTubeId, formatDate, getUniqueAgents, getAgentColor, getRelativeTime } from '@/lib/utils';
@@ -12,7 +15,21 @@ export default function ArticlePage() {
     const { articles } = useNews();
     const slug = params.slug as string;
 
-    const article = articles.find(a => a.slug === slug);
+    const listed = articles.find(a => a.slug === slug);
+    const [full, setFull] = useState<NewsArticle | null>(null);
+
+    // The feed only carries summaries; load the full content for this page
+    useEffect(() => {
+        let cancelled = false;
+        fetchArticle(listed?.id || slug).then(result => {
+            if (!cancelled && result) setFull(result);
+        });
+        return () => {
+            cancelled = true;
+        };
+    }, [listed?.id, slug]);
+
+    const article = full ?? listed;
 
     if (!article) {
         return (
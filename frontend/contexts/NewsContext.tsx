@@ -1,8 +1,8 @@
 'use client';
 
-import React, { createContext, useContext, useEffect, useState, useCallback } from 'react';
+import React, { createContext, useContext, useEffect, useState, useCallback, useRef } from 'react';
 import { NewsArticle, FilterOptions } from '@/lib/types';
-import { getCachedArticles, fetchAndCacheNews } from '@/lib/api';
+import { getCachedArticles, fetchAndCacheNews, setArticlePinned } from '@/lib/api';
 import { searchArticles, filterByContentType, filterBySource, filterByTopic, sortArticles } from '@/lib/search';
 
 interface NewsContextType {
@@ -30,6 +30,8 @@ export function NewsProvider({ children }: { children: React.ReactNode }) {
         sortBy: 'recent',
     });
     const [bookmarks, setBookmarks] = useState<string[]>([]);
+    // Latest bookmarks, so toggles in quick succession (before a re-render) see each other
+    const bookmarksRef = useRef<string[]>([]);
     const [isLoading, setIsLoading] = useState(false);
 
     // Load cached articles on mount
@@ -45,7 +47,8 @@ export function NewsProvider({ children }: { children: React.ReactNode }) {
                 // Load bookmarks
                 const storedBookmarks = localStorage.getItem('bookmarks');
                 if (storedBookmarks) {
-                    setBookmarks(JSON.parse(storedBookmarks));
+                    bookmarksRef.current = JSON.parse(storedBookmarks);
+                    setBookmarks(bookmarksRef.current);
                 }
 
                 // Fetch fresh news in background
@@ -94,13 +97,15 @@ export function NewsProvider({ children }: { children: React.ReactNode }) {
     }, []);
 
     const toggleBookmark = useCallback((articleId: string) => {
-        setBookmarks(prev => {
-            const updated = prev.includes(articleId)
-                ? prev.filter(id => id !== articleId)
-                : [...prev, articleId];
-            localStorage.setItem('bookmarks', JSON.stringify(updated));
-            return updated;
-        });
+        const pinned = !bookmarksRef.current.includes(articleId);
+        const updated = pinned
+            ? [...bookmarksRef.current, articleId]
+            : bookmarksRef.current.filter(id => id !== articleId);
+        bookmarksRef.current = updated;
+        setBookmarks(updated);
+        localStorage.setItem('bookmarks', JSON.stringify(updated));
+        // Bookmarked articles are pinned so the backend keeps them
+        setArticlePinned(articleId, pinned);
     }, []);
 
     const refreshNews = useCallback(async () => {
@@ -1,4 +1,4 @@
-import { NewsArticle } from './types';
+import { NewsArticle, StoryThread } from './types';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 const CACHE_KEY = 'ai_desk_articles';
@@ -7,11 +7,13 @@ const CACHE_DURATION = 5 * 60 * 1000; // 5 minutes
 
 interface ApiResponse {
     articles: NewsArticle[];
+    stories?: StoryThread[];
 }
 
 export async function fetchNews(): Promise<NewsArticle[]> {
     try {
-        const response = await fetch(`${API_URL}/news`, {
+        // List views only need summaries; full content is fetched per article
+        const response = await fetch(`${API_URL}/news?view=summary`, {
             method: 'GET',
             headers: {
                 'Content-Type': 'application/json',
@@ -30,6 +32,30 @@ export async function fetchNews(): Promise<NewsArticle[]> {
     }
 }
 
+export async function fetchArticle(idOrSlug: string): Promise<NewsArticle | null> {
+    try {
+        const response = await fetch(`${API_URL}/articles/${encodeURIComponent(idOrSlug)}`);
+        if (!response.ok) {
+            return null;
+        }
+        return await response.json();
+    } catch (error) {
+        console.error('Error fetching article:', error);
+        return null;
+    }
+}
+
+export async function setArticlePinned(articleId: string, pinned: boolean): Promise<void> {
+    // Pinned articles are kept by the backend's retention policy
+    try {
+        await fetch(`${API_URL}/articles/${encodeURIComponent(articleId)}/pin`, {
+            method: pinned ? 'PUT' : 'DELETE',
+        });
+    } catch (error) {
+        console.error('Error updating pin:', error);
+    }
+}
+
 export function getCachedArticles(): NewsArticle[] {
     if (typeof window === 'undefined') return [];
 
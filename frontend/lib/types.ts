@@ -15,6 +15,24 @@ export interface NewsArticle {
     published?: string;
     timestamp?: number | string;
     fetched_by?: AgentType[];  // Track which agents contributed
+    story_id?: string;  // Story thread the article belongs to
+}
+
+export interface StoryUpdate {
+    title: string;
+    url: string;
+    source: AgentType | string;
+    published: string;
+    action: 'written' | 'merged';
+}
+
+export interface StoryThread {
+    story_id: string;
+    title: string;
+    first_seen: string;
+    last_seen: string;
+    sources: string[];
+    updates: StoryUpdate[];
 }
 
 export interface ImageLink {
@@ -0,0 +1,164 @@
+"""
+Benchmark Runner Script for AI Desk
+Runs the offline pipeline benchmarks and the API load check, and saves the results as JSON
+"""
+
+import subprocess
+import argparse
+import json
+import sys
+import os
+from datetime import datetime
+
+from benchmarks.scenarios import SCENARIOS
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+# Fields diffed by --compare and which direction is an improvement
+COMPARED_FIELDS = {
+    "wall_s_p50": "lower",
+    "wall_s_p95": "lower",
+    "first_article_s_p50": "lower",
+    "writer_calls_per_edition": "lower",
+    "peak_rss_mb": "lower",
+    "articles_per_s": "higher",
+}
+
+# API load check: limits a run must stay within (in-process, replayed upstreams)
+LOAD_LIMITS = {
+    "/health p99_ms": 150,
+    "loop_lag max_ms": 200,
+}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_one(scenario: str, concurrency: int, repeat: int, latency_scale: float) -> dict:
+    """Run one scenario in a fresh interpreter so peak RSS is not shared between runs."""
+    cmd = [
+        sys.executable, "-m", "benchmarks.pipeline",
+        "--scenario", scenario,
+        "--concurrency", str(concurrency),
+        "--repeat", str(repeat),
+        "--latency-scale", str(latency_scale),
+    ]
+    env = {**os.environ, "AI_DESK_LOG_LEVEL": "WARNING"}
+    result = subprocess.run(cmd, capture_output=True, text=True, env=env, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"{scenario} x{concurrency} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_load_check(latency_scale: float) -> dict:
+    """Run the API load test in a fresh interpreter and check it against LOAD_LIMITS."""
+    output = os.path.join(RESULTS_DIR, ".load.json")
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    cmd = [sys.executable, "-m", "benchmarks.load", "--latency-scale", str(latency_scale), "--output", output]
+    env = {**os.environ, "AI_DESK_LOG_LEVEL": "WARNING"}
+    result = subprocess.run(cmd, capture_output=True, text=True, env=env, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"load check failed:\n{result.stderr}")
+    with open(output, encoding="utf-8") as f:
+        load = json.load(f)
+    os.unlink(output)
+    measured = {
+        "/health p99_ms": load["endpoints"]["/health"]["p99_ms"],
+        "loop_lag max_ms": load["loop_lag"]["max_ms"],
+    }
+    errors = sum(row["errors"] for row in load["endpoints"].values())
+    load["violations"] = [f"{name} {value} > {LOAD_LIMITS[name]}" for name, value in measured.items()
+                          if value > LOAD_LIMITS[name]]
+    if errors:
+        load["violations"].append(f"{errors} failed requests")
+    return load
+
+
+def compare(previous: dict, current: dict):
+    """Print the change of every compared field against an earlier results file."""
+    before = {(r["scenario"], r["concurrency"]): r for r in previous["results"]}
+    print(f"Compared with {previous['revision']} ({previous['timestamp']}):")
+    for row in current["results"]:
+        old = before.get((row["scenario"], row["concurrency"]))
+        if old is None:
+            continue
+        for field, better in COMPARED_FIELDS.items():
+            if not old.get(field) or row.get(field) is None:
+                continue
+            change = (row[field] - old[field]) / old[field] * 100
+            worse = change > 5 if better == "lower" else change < -5
+            flag = "  <-- regression" if worse else ""
+            print(f"  {row['scenario']:<10} x{row['concurrency']:<3} {field:<26} "
+                  f"{old[field]:>10} -> {row[field]:>10} ({change:+.1f}%){flag}")
+
+
+def run_benchmarks():
+    """Run every requested scenario at every concurrency level"""
+    parser = argparse.ArgumentParser(description="AI Desk pipeline benchmarks")
+    parser.add_argument("--scenario", nargs="*", default=sorted(SCENARIOS), choices=sorted(SCENARIOS))
+    parser.add_argument("--concurrency", nargs="*", type=int, default=[1, 2, 4],
+                        help="editions in flight at once")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="multiply every simulated latency, e.g. 0.1 for a quick run")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>-<rev>.json)")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    parser.add_argument("--skip-load", action="store_true", help="skip the API load check")
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    print("=" * 80)
+    print("AI DESK PIPELINE BENCHMARKS")
+    print("=" * 80)
+    started = datetime.now()
+    report = {
+        "revision": git_revision(),
+        "timestamp": started.isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "results": [],
+    }
+
+    print(f"{'scenario':<10} {'conc':>4} {'wall p50':>9} {'wall p95':>9} {'1st art':>8} "
+          f"{'calls':>6} {'art/s':>7} {'rss MB':>7}")
+    print("-" * 80)
+    for scenario in args.scenario:
+        for concurrency in args.concurrency:
+            row = run_one(scenario, concurrency, args.repeat, args.latency_scale)
+            report["results"].append(row)
+            first = row["first_article_s_p50"]
+            print(f"{scenario:<10} {concurrency:>4} {row['wall_s_p50']:>9.3f} {row['wall_s_p95']:>9.3f} "
+                  f"{first if first is not None else float('nan'):>8.3f} {row['writer_calls_per_edition']:>6.1f} "
+                  f"{row['articles_per_s']:>7.2f} {row['peak_rss_mb']:>7.1f}")
+
+    failed = False
+    if not args.skip_load:
+        load = report["load"] = run_load_check(args.latency_scale)
+        print("-" * 80)
+        print(f"API load: /health p99 {load['endpoints']['/health']['p99_ms']}ms, "
+              f"loop lag max {load['loop_lag']['max_ms']}ms")
+        for violation in load["violations"]:
+            print(f"  <-- over limit: {violation}")
+        failed = bool(load["violations"])
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{started.strftime('%Y%m%d-%H%M%S')}-{report['revision']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("-" * 80)
+    print(f"Saved: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_benchmarks())
@@ -6,10 +6,13 @@ Tests all 10 critical scenarios as specified.
 import pytest
 import asyncio
 import json
+import os
+import copy
 import time
 from datetime import datetime, timezone
 from unittest.mock import Mock, patch, MagicMock
 import httpx
+import openai
 from fastapi.testclient import TestClient
 
 # Import modules to test
@@ -26,6 +29,32 @@ from ai_desk_agents import (
 from FAST_API import app
 
 
+@pytest.fixture(autouse=True)
+def reset_source_breakers():
+    """Keep circuit breaker, polling, story and article state from leaking between tests"""
+    import ai_desk_agents
+    ai_desk_agents.source_breakers.clear()
+    ai_desk_agents._last_good_articles.clear()
+    ai_desk_agents.poll_scheduler.reset()
+    ai_desk_agents.story_clusters.reset()
+    ai_desk_agents.article_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def isolated_edition_store(tmp_path, monkeypatch):
+    """Give every test its own shared-edition directory, resolver cache, pins and desk state"""
+    import ai_desk_agents
+    from ai_desk_store import edition_store
+    from ai_desk_resolver import url_resolver
+    from ai_desk_retention import pin_store
+    monkeypatch.setattr(edition_store, "directory", str(tmp_path / "store"))
+    monkeypatch.setattr(pin_store, "path", str(tmp_path / "store" / "pins.json"))
+    monkeypatch.setattr(url_resolver, "path", str(tmp_path / "store" / "resolved_urls.json"))
+    monkeypatch.setattr(url_resolver, "_entries", None)
+    monkeypatch.setattr(ai_desk_agents.desk_state, "path", str(tmp_path / "store" / "desk_state.pickle"))
+    monkeypatch.setattr(ai_desk_agents.desk_state, "_signature", None)
+
+
 # ================================================================================
 # TEST 1: Fetching News From Multiple Sources
 # ================================================================================
@@ -724,5 +753,1635 @@ class TestIntegration:
             pytest.fail(f"Full pipeline test failed: {str(e)}")
 
 
+# ================================================================================
+# WIKIPEDIA REVISION CACHE
+# ================================================================================
+
+class TestWikipediaRevisionCache:
+    """Wikipedia is only re-fetched and re-written when its revision changes"""
+
+    @staticmethod
+    def _fake_wikipedia(revisions):
+        calls = []
+
+        def fake_get(url, params=None, **kwargs):
+            calls.append(params["prop"])
+            page = {"pageid": 1164, "title": "Artificial intelligence", "lastrevid": revisions[0]}
+            if "extracts" in params["prop"]:
+                page.update({
+                    "extract": "Artificial intelligence is ...",
+                    "fullurl": "https://en.wikipedia.org/wiki/Artificial_intelligence",
+                    "thumbnail": {"source": "https://upload.wikimedia.org/ai.png"},
+                })
+            response = Mock(status_code=200)
+            response.json.return_value = {"query": {"pages": [page]}}
+            return response
+
+        return fake_get, calls
+
+    def test_unchanged_revision_served_from_cache(self):
+        import ai_desk_agents
+        ai_desk_agents._wikipedia_cache.clear()
+        revisions = [100]
+        fake_get, calls = self._fake_wikipedia(revisions)
+
+        with patch.object(ai_desk_agents.httpx, "get", side_effect=fake_get):
+            first = _fetch_wikipedia_ai_content()
+            second = _fetch_wikipedia_ai_content()
+            revisions[0] = 101
+            third = _fetch_wikipedia_ai_content()
+
+        assert first == second
+        assert first["images"] == ["https://upload.wikimedia.org/ai.png"]
+        assert third["revision_id"] == 101
+        # Revision check every run, full fetch only for new revisions
+        assert calls == ["info", "extracts|pageimages|info", "info", "info", "extracts|pageimages|info"]
+
+    @pytest.mark.asyncio
+    async def test_fetch_errors_reach_the_breaker(self):
+        import ai_desk_agents
+        ai_desk_agents._wikipedia_cache.clear()
+        fake_get, _ = self._fake_wikipedia([100])
+        with patch.object(ai_desk_agents.httpx, "get", side_effect=fake_get):
+            assert "error" not in _fetch_wikipedia_ai_content()
+
+        breaker = ai_desk_agents.get_breaker("Wikipedia")
+        with patch.object(ai_desk_agents.httpx, "get", side_effect=httpx.ConnectError("down")):
+            assert "error" in _fetch_wikipedia_ai_content()
+            for _ in range(ai_desk_agents.SOURCE_BREAKER_MIN_CALLS):
+                await process_source_to_article("Wikipedia", _fetch_wikipedia_ai_content, max_items=1)
+
+        assert breaker.state == breaker.OPEN
+
+    @pytest.mark.asyncio
+    async def test_unchanged_item_skips_writer(self):
+        import ai_desk_agents
+        ai_desk_agents._written_articles.clear()
+        item = {"title": "AI", "summary": "text", "url": "https://en.wikipedia.org/wiki/AI",
+                "images": [], "cache_key": "wikipedia:1164:100"}
+        result = Mock(final_output=json.dumps({"meta_title": "AI Explained", "tags": ["AI"]}))
+
+        with patch.object(ai_desk_agents.Runner, "run", return_value=result) as run:
+            first = await process_source_to_article("Wikipedia", lambda: dict(item), max_items=1)
+            second = await process_source_to_article("Wikipedia", lambda: dict(item), max_items=1)
+
+        assert run.call_count == 1
+        assert first == second
+
+
+# ================================================================================
+# WRITER INPUT PREPROCESSING
+# ================================================================================
+
+class TestWriterInputPreprocessing:
+    """Raw feed HTML is cleaned and budgeted before it reaches the Writer"""
+
+    def test_html_is_stripped(self):
+        from ai_desk_agents import clean_text
+        raw = '<a href="https://news.example.com/x">OpenAI&nbsp;ships</a>\n<font color="#6f6f6f">Reuters</font><script>x()</script>'
+        assert clean_text(raw) == "OpenAI ships Reuters"
+
+    def test_prompt_respects_token_budget(self):
+        from ai_desk_agents import build_writer_prompt, estimate_tokens
+        item = {"title": "<b>AI</b> news", "summary": "<p>" + "word " * 2000 + "</p>",
+                "link": "https://example.com/a", "published": "2025-12-10"}
+        short = build_writer_prompt("Google", item, token_budget=50)
+        full = build_writer_prompt("Google", item, token_budget=5000)
+
+        assert "<p>" not in short and "Title: AI news" in short
+        assert estimate_tokens(short) < 120
+        assert estimate_tokens(full) > 2000
+
+
+# ================================================================================
+# BATCHED WRITER MODE
+# ================================================================================
+
+class TestBatchedWriter:
+    """Several items can share one Writer call, with per-item fallback"""
+
+    ITEMS = [
+        {"title": f"AI story {i}", "summary": "text", "link": f"https://example.com/{i}", "published": "2025-12-10"}
+        for i in range(3)
+    ]
+
+    @pytest.mark.asyncio
+    async def test_batch_uses_single_writer_call(self):
+        import ai_desk_agents
+        batch = [{"meta_title": f"Story {i}", "tags": ["AI"]} for i in range(3)]
+        result = Mock(final_output=json.dumps(batch))
+
+        with patch.object(ai_desk_agents.Runner, "run", return_value=result) as run:
+            articles = await process_source_to_article("Google", lambda: list(self.ITEMS), max_items=3, batch_size=3)
+
+        assert run.call_count == 1
+        assert [a["meta_title"] for a in articles] == ["Story 0", "Story 1", "Story 2"]
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_falls_back_to_per_item(self):
+        import ai_desk_agents
+        replies = [Mock(final_output="not json")] + [
+            Mock(final_output=json.dumps({"meta_title": f"Story {i}"})) for i in range(2)
+        ]
+
+        with patch.object(ai_desk_agents.Runner, "run", side_effect=replies) as run:
+            articles = await process_source_to_article("Google", lambda: list(self.ITEMS), max_items=2, batch_size=2)
+
+        assert run.call_count == 3
+        assert [a["meta_title"] for a in articles] == ["Story 0", "Story 1"]
+
+    @pytest.mark.asyncio
+    async def test_partial_batch_retries_only_missing_items(self):
+        import ai_desk_agents
+        replies = [
+            Mock(final_output=json.dumps([{"meta_title": "Story 0"}])),
+            Mock(final_output=json.dumps({"meta_title": "Story 1"})),
+        ]
+
+        with patch.object(ai_desk_agents.Runner, "run", side_effect=replies) as run:
+            articles = await process_source_to_article("Google", lambda: list(self.ITEMS), max_items=2, batch_size=2)
+
+        assert run.call_count == 2
+        assert [a["meta_title"] for a in articles] == ["Story 0", "Story 1"]
+
+
+# ================================================================================
+# WRITER OUTPUT VALIDATION & SALVAGE
+# ================================================================================
+
+class TestWriterOutputSalvage:
+    """Malformed Writer replies are repaired or retried instead of dropped"""
+
+    def test_repair_truncated_json(self):
+        from ai_desk_agents import repair_json
+        truncated = '{"meta_title": "GPT-5 Lands", "tags": ["AI", "LLM"], "content": [{"heading": "What happened", "paragraphs": ["OpenAI rel'
+        repaired = repair_json(truncated)
+
+        assert repaired["meta_title"] == "GPT-5 Lands"
+        assert repaired["tags"] == ["AI", "LLM"]
+
+    def test_repair_skips_prose_and_trailing_text(self):
+        from ai_desk_agents import repair_json
+        assert repair_json('Sure! Here it is: {"meta_title": "X"} Hope this helps') == {"meta_title": "X"}
+        assert repair_json("no json at all") is None
+
+    @pytest.mark.asyncio
+    async def test_truncated_reply_is_salvaged_without_retry(self):
+        import ai_desk_agents
+        reply = Mock(final_output='```json\n{"meta_title": "Salvaged", "tags": ["AI"], "content": [{"heading": "Why')
+        before = dict(ai_desk_agents.writer_parse_stats)
+
+        with patch.object(ai_desk_agents.Runner, "run", return_value=reply) as run:
+            articles = await process_source_to_article("Google", lambda: [{"title": "t", "link": "https://e.com"}], max_items=1)
+
+        assert run.call_count == 1
+        assert articles[0]["meta_title"] == "Salvaged"
+        assert ai_desk_agents.writer_parse_stats["salvaged"] == before["salvaged"] + 1
+
+    @pytest.mark.asyncio
+    async def test_invalid_reply_gets_targeted_retry(self):
+        import ai_desk_agents
+        replies = [Mock(final_output='{"tags": ["AI"]}'), Mock(final_output='{"meta_title": "Second try"}')]
+        before = ai_desk_agents.writer_parse_report()
+
+        with patch.object(ai_desk_agents.Runner, "run", side_effect=replies) as run:
+            articles = await process_source_to_article("Google", lambda: [{"title": "t", "link": "https://e.com"}], max_items=1)
+
+        assert run.call_count == 2
+        assert articles[0]["meta_title"] == "Second try"
+        report = ai_desk_agents.writer_parse_report()
+        assert report["parse_failures"] == before["parse_failures"] + 1
+        assert report["retries"] == before["retries"] + 1
+
+
+# ================================================================================
+# WRITER TIMEOUTS, RETRIES & HEDGING
+# ================================================================================
+
+class TestWriterResilience:
+    """Writer calls are bounded by a deadline, retried, and optionally hedged"""
+
+    @pytest.mark.asyncio
+    async def test_hung_call_times_out_and_retries(self):
+        import ai_desk_agents
+        calls = []
+
+        async def fake_run(agent, prompt, run_config=None):
+            calls.append(prompt)
+            if len(calls) == 1:
+                await asyncio.sleep(10)
+            return Mock(final_output="ok")
+
+        with patch.object(ai_desk_agents.Runner, "run", side_effect=fake_run), \
+             patch.object(ai_desk_agents, "WRITER_TIMEOUT_S", 0.05), \
+             patch.object(ai_desk_agents, "WRITER_BACKOFF_BASE_S", 0.01):
+            result = await ai_desk_agents.run_writer(ai_desk_agents.writer, "prompt")
+
+        assert result.final_output == "ok"
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_non_retryable_error_is_raised(self):
+        import ai_desk_agents
+
+        with patch.object(ai_desk_agents.Runner, "run", side_effect=ValueError("bad request")) as run:
+            with pytest.raises(ValueError):
+                await ai_desk_agents.run_writer(ai_desk_agents.writer, "prompt")
+        assert run.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_hedged_request_wins_and_cancels_slow_one(self):
+        import ai_desk_agents
+        cancelled = []
+
+        async def fake_run(agent, prompt, run_config=None):
+            first = fake_run.started == 0
+            fake_run.started += 1
+            try:
+                await asyncio.sleep(5 if first else 0.01)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return Mock(final_output="primary" if first else "hedge")
+        fake_run.started = 0
+
+        with patch.object(ai_desk_agents.Runner, "run", side_effect=fake_run), \
+             patch.object(ai_desk_agents, "WRITER_HEDGE", True), \
+             patch.object(ai_desk_agents, "WRITER_HEDGE_DEFAULT_DELAY_S", 0.02):
+            result = await ai_desk_agents.run_writer(ai_desk_agents.writer, "prompt")
+            await asyncio.sleep(0)
+
+        assert result.final_output == "hedge"
+        assert cancelled == [True]
+
+    @staticmethod
+    def _rate_limited(retry_after: str):
+        response = httpx.Response(429, headers={"retry-after": retry_after},
+                                  request=httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions"))
+        return openai.RateLimitError("rate limited", response=response, body=None)
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_waits_for_retry_after(self):
+        import ai_desk_agents
+        sleeps = []
+
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+
+        with patch.object(ai_desk_agents.Runner, "run",
+                          side_effect=[self._rate_limited("3"), Mock(final_output="ok")]) as run, \
+             patch.object(ai_desk_agents.asyncio, "sleep", side_effect=fake_sleep):
+            result = await ai_desk_agents.run_writer(ai_desk_agents.writer, "prompt")
+
+        assert result.final_output == "ok" and run.call_count == 2
+        assert sleeps == [3.0]
+        assert ai_desk_agents.external_client.max_retries == 0
+
+    @pytest.mark.asyncio
+    async def test_long_retry_after_is_not_retried(self):
+        import ai_desk_agents
+
+        with patch.object(ai_desk_agents.Runner, "run", side_effect=self._rate_limited("600")) as run:
+            with pytest.raises(openai.RateLimitError):
+                await ai_desk_agents.run_writer(ai_desk_agents.writer, "prompt")
+        assert run.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_hedge_needs_a_free_writer_permit(self):
+        import ai_desk_agents
+        started = []
+
+        async def fake_run(agent, prompt, run_config=None):
+            started.append(prompt)
+            await asyncio.sleep(0.1)
+            return Mock(final_output="primary")
+
+        with patch.object(ai_desk_agents.Runner, "run", side_effect=fake_run), \
+             patch.object(ai_desk_agents, "WRITER_HEDGE", True), \
+             patch.object(ai_desk_agents, "WRITER_HEDGE_DEFAULT_DELAY_S", 0.02), \
+             patch.object(ai_desk_agents, "WRITER_CONCURRENCY", 1):
+            ai_desk_agents._limiters.pop(asyncio.get_running_loop(), None)
+            try:
+                result = await ai_desk_agents.run_writer(ai_desk_agents.writer, "prompt")
+            finally:
+                ai_desk_agents._limiters.pop(asyncio.get_running_loop(), None)
+
+        assert result.final_output == "primary"
+        assert len(started) == 1
+
+
+# ================================================================================
+# DEADLINE-BOUNDED EDITIONS
+# ================================================================================
+
+class TestEditionDeadline:
+    """A deadline returns the finished articles and flags the edition as partial"""
+
+    @pytest.mark.asyncio
+    async def test_deadline_returns_partial_edition(self):
+        import ai_desk_agents
+
+        async def fake_run(agent, prompt, run_config=None):
+            if "Slow story" in prompt:
+                await asyncio.sleep(10)
+            return Mock(final_output=json.dumps({"meta_title": "Fast story written", "tags": ["AI"]}))
+
+        sources = [
+            ("Fast", lambda: [{"title": "Fast story", "link": "https://e.com/fast"}], 1),
+            ("Slow", lambda: [{"title": "Slow story", "link": "https://e.com/slow"}], 1),
+        ]
+        status = {}
+        with patch.object(ai_desk_agents, "EDITION_SOURCES", sources), \
+             patch.object(ai_desk_agents.Runner, "run", side_effect=fake_run):
+            started = time.time()
+            articles = await ai_desk(deadline_ms=300, status=status)
+
+        assert time.time() - started < 2
+        assert [a["meta_title"] for a in articles] == ["Fast story written"]
+        assert status["partial"] is True
+        assert status["sources"]["Fast"] == {"status": "ok", "articles": 1}
+        assert status["sources"]["Slow"] == {"status": "timeout", "articles": 0}
+
+    def test_news_endpoint_reports_partial(self):
+        import FAST_API
+
+        async def fake_ai_desk(deadline_ms=None, status=None):
+            status.update({"partial": True, "elapsed_ms": deadline_ms, "sources": {"Slow": {"status": "timeout", "articles": 0}}})
+            return []
+
+        with patch.object(FAST_API, "ai_desk", side_effect=fake_ai_desk):
+            response = TestClient(app).get("/news", params={"deadline_ms": 8000})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["partial"] is True
+        assert data["sources"]["Slow"]["status"] == "timeout"
+
+
+# ================================================================================
+# SOURCE CIRCUIT BREAKERS
+# ================================================================================
+
+class TestSourceCircuitBreaker:
+    """Failing sources are skipped instantly and serve their last good articles"""
+
+    def test_breaker_state_transitions(self):
+        from ai_desk_agents import CircuitBreaker
+        breaker = CircuitBreaker("Test", failure_rate=0.5, window=4, min_calls=2, slow_call_s=1, cooldown_s=0.05)
+
+        breaker.record_success(0.1)
+        breaker.record_failure("boom")
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow() is False
+
+        time.sleep(0.06)
+        assert breaker.allow() is True
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow() is False  # only one trial at a time
+
+        breaker.record_success(0.1)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_slow_fetch_counts_as_failure(self):
+        from ai_desk_agents import CircuitBreaker
+        breaker = CircuitBreaker("Test", failure_rate=0.5, window=4, min_calls=1, slow_call_s=1, cooldown_s=60)
+        breaker.record_success(5.0)
+        assert breaker.state == CircuitBreaker.OPEN
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_serves_last_good_articles(self):
+        import ai_desk_agents
+        reply = Mock(final_output=json.dumps({"meta_title": "Cached story", "tags": ["AI"]}))
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) > 1:
+                raise ConnectionError("feed timed out")
+            return [{"title": "Story", "link": "https://e.com/1"}]
+
+        with patch.object(ai_desk_agents.Runner, "run", return_value=reply):
+            await process_source_to_article("Flaky", flaky, max_items=1)
+            for _ in range(3):
+                await process_source_to_article("Flaky", flaky, max_items=1)
+            served = await process_source_to_article("Flaky", flaky, max_items=1)
+
+        assert ai_desk_agents.source_breakers["Flaky"].state == "open"
+        assert len(calls) == 3  # fetch skipped once the circuit opened
+        assert [a["meta_title"] for a in served] == ["Cached story"]
+
+        response = TestClient(app).get("/health")
+        assert response.json()["sources"]["Flaky"]["state"] == "open"
+
+
+# ================================================================================
+# METRICS
+# ================================================================================
+
+class TestMetrics:
+    """Pipeline stages are instrumented and exposed at /metrics"""
+
+    def test_histogram_renders_cumulative_buckets(self):
+        from ai_desk_metrics import Histogram, _registry
+        histogram = Histogram("test_latency_seconds", "Test histogram.", ("stage",), buckets=(0.1, 1))
+        _registry.remove(histogram)
+        histogram.observe(0.05, stage="fetch")
+        histogram.observe(0.5, stage="fetch")
+        text = histogram.render()
+
+        assert 'test_latency_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+        assert 'test_latency_seconds_bucket{stage="fetch",le="1"} 2' in text
+        assert 'test_latency_seconds_bucket{stage="fetch",le="+Inf"} 2' in text
+        assert 'test_latency_seconds_count{stage="fetch"} 2' in text
+
+    @pytest.mark.asyncio
+    async def test_pipeline_stages_are_recorded(self):
+        import ai_desk_agents
+        import ai_desk_metrics as metrics
+        reply = Mock(final_output=json.dumps({"meta_title": "Metered story"}))
+        reply.context_wrapper.usage.input_tokens = 120
+        reply.context_wrapper.usage.output_tokens = 300
+        before = metrics.writer_tokens.get(source="Metered", direction="output")
+
+        with patch.object(ai_desk_agents.Runner, "run", return_value=reply):
+            await process_source_to_article("Metered", lambda: [{"title": "t", "link": "https://e.com"}], max_items=1)
+
+        assert metrics.writer_tokens.get(source="Metered", direction="output") == before + 300
+        for stage in ("fetch", "writer", "parse"):
+            assert metrics.stage_seconds.get(source="Metered", stage=stage)["count"] >= 1
+
+        response = TestClient(app).get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'ai_desk_stage_seconds_count{source="Metered",stage="writer"}' in response.text
+        assert "# TYPE ai_desk_in_flight gauge" in response.text
+
+
+# ================================================================================
+# STRUCTURED LOGGING & TRACE SPANS
+# ================================================================================
+
+class TestTracing:
+    """Each edition can be rebuilt as a span timeline from the JSONL exporter"""
+
+    @pytest.mark.asyncio
+    async def test_edition_spans_written_to_jsonl(self, tmp_path):
+        import ai_desk_agents
+        import ai_desk_tracing
+        trace_file = tmp_path / "spans.jsonl"
+        reply = Mock(final_output=json.dumps({"meta_title": "Traced story"}))
+        sources = [("Traced", lambda: [{"title": "Story", "link": "https://e.com/traced"}], 1)]
+
+        ai_desk_tracing.configure_logging(trace_file=str(trace_file))
+        try:
+            with patch.object(ai_desk_agents, "EDITION_SOURCES", sources), \
+                 patch.object(ai_desk_agents.Runner, "run", return_value=reply):
+                await ai_desk()
+            ai_desk_tracing.flush_logging()
+        finally:
+            ai_desk_tracing.configure_logging(trace_file="")
+
+        spans = [json.loads(line) for line in trace_file.read_text().splitlines()]
+        by_name = {s["name"]: s for s in spans}
+        assert {"edition", "source", "fetch", "write_article", "writer_call", "merge"} <= set(by_name)
+        assert len({s["run_id"] for s in spans}) == 1
+        assert by_name["source"]["parent_id"] == by_name["edition"]["span_id"]
+        assert by_name["writer_call"]["parent_id"] == by_name["write_article"]["span_id"]
+        assert by_name["write_article"]["source"] == "Traced"
+        assert by_name["write_article"]["item_id"] == ai_desk_tracing.item_id_for({"link": "https://e.com/traced"})
+
+    def test_json_log_records_carry_context(self):
+        import logging
+        from ai_desk_tracing import JsonFormatter, bind, _ContextFilter
+        record = logging.LogRecord("ai_desk", logging.INFO, __file__, 1, "Fetching %s", ("news",), None)
+        with bind(run_id="run1", source="Google"):
+            _ContextFilter().filter(record)
+        payload = json.loads(JsonFormatter().format(record))
+
+        assert payload["message"] == "Fetching news"
+        assert payload["run_id"] == "run1" and payload["source"] == "Google"
+
+
+# ================================================================================
+# OFFLINE REPLAY
+# ================================================================================
+
+class TestReplayHarness:
+    """The whole pipeline runs against fixtures and the local Writer stand-in"""
+
+    @pytest.mark.asyncio
+    async def test_edition_runs_offline(self):
+        from ai_desk_replay import replay_session
+        status = {}
+        with replay_session() as replay:
+            articles = await ai_desk(status=status)
+
+        assert articles and not status["partial"]
+        assert all(s["status"] == "ok" for s in status["sources"].values())
+        assert replay.calls["llm"] >= len(articles)
+        assert all(a["meta_title"] and a["source_links"] for a in articles)
+
+    @pytest.mark.asyncio
+    async def test_injected_source_failure(self):
+        from ai_desk_replay import replay_session
+        status = {}
+        with replay_session(errors={"forbes": 1.0}):
+            articles = await ai_desk(status=status)
+
+        assert status["sources"]["Forbes"]["articles"] == 0
+        assert status["sources"]["Google"]["status"] == "ok"
+        assert not any(link["source"] == "Forbes" for a in articles for link in a["source_links"])
+
+    def test_synthesized_batch_reply_matches_item_count(self):
+        from ai_desk_replay import synthesize_reply
+        from ai_desk_agents import build_writer_prompt
+        items = [{"title": f"Story {n}", "link": f"https://e.com/{n}"} for n in range(3)]
+        prompt = "\n\n".join(f"### Item {idx}\n{build_writer_prompt('Google', item)}" for idx, item in enumerate(items, 1))
+        reply = json.loads(synthesize_reply([{"role": "user", "content": prompt}]))
+
+        assert [a["source_links"][0]["url"] for a in reply] == [item["link"] for item in items]
+
+
+# ================================================================================
+# BENCHMARKS
+# ================================================================================
+
+class TestBenchmarks:
+    """The offline benchmark produces comparable, complete results"""
+
+    def test_scenario_result_fields(self):
+        from benchmarks.pipeline import run_scenario
+        result = run_scenario("baseline", concurrency=2, repeat=1, latency_scale=0.01)
+
+        assert result["editions"] == 2 and len(result["runs"]) == 2
+        assert result["writer_calls_per_edition"] >= result["articles_per_edition"] > 0
+        assert 0 < result["first_article_s_p50"] <= result["wall_s_p50"]
+        assert result["articles_per_s"] > 0 and result["peak_rss_mb"] > 0
+
+    def test_batched_scenario_uses_fewer_writer_calls(self):
+        from benchmarks.pipeline import run_scenario
+        single = run_scenario("baseline", repeat=1, latency_scale=0)
+        batched = run_scenario("batched", repeat=1, latency_scale=0)
+
+        assert batched["writer_calls_per_edition"] < single["writer_calls_per_edition"]
+
+
+# ================================================================================
+# API LOAD TEST
+# ================================================================================
+
+class TestLoadHarness:
+    """Concurrent API load must not block the event loop"""
+
+    @pytest.mark.asyncio
+    async def test_load_report_covers_every_endpoint(self):
+        from ai_desk_replay import replay_session
+        from benchmarks.load import run_load
+        latency = {"google": 0.3, "forbes": 0.3, "youtube": 0.3, "wikipedia": 0.15, "llm": 0.05}
+        with replay_session(latency=latency):
+            report = await run_load(app=app, endpoints=("/news", "/health"), clients=3, requests=2)
+
+        # Latency limits are checked by run_benchmarks.py, not on shared test runners
+        assert set(report["endpoints"]) == {"/news", "/health"}
+        assert all(row["requests"] == 3 * 2 and row["errors"] == 0 for row in report["endpoints"].values())
+        assert {"p50_ms", "p95_ms", "p99_ms", "rps"} <= set(report["endpoints"]["/health"])
+        assert report["loop_lag"]["samples"] > 0 and {"max_ms", "p99_ms"} <= set(report["loop_lag"])
+
+    @pytest.mark.asyncio
+    async def test_blocking_fetch_is_detected(self):
+        import ai_desk_agents
+        from ai_desk_replay import replay_session
+        from benchmarks.load import run_load
+
+        async def inline(func, *args, **kwargs):
+            return func(*args, **kwargs)
+
+        # Running the fetchers on the loop (as before they moved to threads) must show up as lag
+        with replay_session(latency={"google": 0.3, "forbes": 0.3}), \
+             patch.object(ai_desk_agents, "_run_fetch", inline):
+            report = await run_load(app=app, endpoints=("/news", "/health"), clients=1, requests=1)
+
+        assert report["loop_lag"]["max_ms"] >= 250
+
+
+# ================================================================================
+# DEDUP BENCHMARK
+# ================================================================================
+
+class TestDedupBenchmark:
+    """Dedup quality is scored against the labeled headline corpus"""
+
+    def test_corpus_is_balanced_and_labeled(self):
+        from benchmarks.dedup_corpus import load_corpus
+        corpus = load_corpus()
+        duplicates = sum(pair["duplicate"] for pair in corpus)
+
+        assert len(corpus) >= 500
+        assert 0.4 < duplicates / len(corpus) < 0.6
+        assert {"duplicate", "hard_negative", "random"} <= {pair["kind"] for pair in corpus}
+
+    def test_precision_recall_counts(self):
+        from benchmarks.dedup import evaluate_quality
+        corpus = [
+            {"a": "OpenAI releases GPT-5", "b": "OpenAI releases GPT-5 - Reuters", "duplicate": True},
+            {"a": "Nvidia posts record revenue", "b": "Nvidia record revenue posted", "duplicate": True},
+            {"a": "Meta delays Llama", "b": "Apple ships Siri update", "duplicate": False},
+            {"a": "OpenAI releases GPT-5", "b": "OpenAI delays GPT-5", "duplicate": False},
+        ]
+        [row] = evaluate_quality(corpus, thresholds=(0.5,))
+
+        assert (row["tp"], row["fp"], row["fn"]) == (2, 1, 0)
+        assert row["precision"] == round(2 / 3, 4) and row["recall"] == 1.0
+
+    def test_speed_reports_each_size(self):
+        from benchmarks.dedup import measure_speed
+        results = measure_speed(sizes=(10, 100), inserts=5)
+
+        assert [r["size"] for r in results] == [10, 100]
+        assert all(r["inserts"] == 5 and r["inserts_per_s"] > 0 and r["memory_mb"] > 0 for r in results)
+
+
+# ================================================================================
+# SHARED EDITION STORE
+# ================================================================================
+
+class TestEditionStore:
+    """Only one generator at a time, and every worker reads its edition"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_generation(self, tmp_path):
+        from ai_desk_store import EditionStore
+        store = EditionStore(str(tmp_path), poll_s=0.01)
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.2)
+            return {"articles": [{"meta_title": "Shared"}], "partial": False, "sources": {}}
+
+        editions = await asyncio.gather(*(store.get_or_generate(generate) for _ in range(5)))
+
+        assert len(calls) == 1
+        assert {e["generated_at"] for e in editions} == {editions[0]["generated_at"]}
+
+    def test_workers_elect_a_single_leader(self, tmp_path):
+        import subprocess
+        import sys
+        worker = (
+            "import asyncio, json, os, sys\n"
+            "from ai_desk_store import EditionStore\n"
+            "store = EditionStore(sys.argv[1], poll_s=0.01)\n"
+            "async def generate():\n"
+            "    with open(os.path.join(sys.argv[1], 'runs'), 'a') as f: f.write('x')\n"
+            "    await asyncio.sleep(1)\n"
+            "    return {'articles': [], 'partial': False, 'sources': {}}\n"
+            "print(asyncio.run(store.get_or_generate(generate))['generated_by'])\n"
+        )
+        tmp_path.mkdir(exist_ok=True)
+        env = {**os.environ, "GROQ_API_KEY": "dummy", "PYTHONPATH": os.path.dirname(os.path.abspath(__file__))}
+        procs = [subprocess.Popen([sys.executable, "-c", worker, str(tmp_path)], stdout=subprocess.PIPE,
+                                  text=True, env=env) for _ in range(3)]
+        leaders = {p.communicate(timeout=60)[0].strip() for p in procs}
+
+        assert (tmp_path / "runs").read_text() == "x"
+        assert len(leaders) == 1
+
+    @pytest.mark.asyncio
+    async def test_recent_edition_served_without_generating(self, tmp_path):
+        from ai_desk_store import EditionStore
+        store = EditionStore(str(tmp_path), max_age_s=60)
+        store.write({"articles": [], "partial": False, "sources": {}, "generated_at": time.time() - 5})
+        generate = Mock(side_effect=AssertionError("should not generate"))
+
+        edition = await store.get_or_generate(generate)
+
+        assert edition["articles"] == [] and not generate.called
+        assert store.status()["stored"] is True
+
+    @pytest.mark.asyncio
+    async def test_follower_falls_back_to_stored_edition(self, tmp_path):
+        from ai_desk_store import EditionStore
+        store = EditionStore(str(tmp_path), poll_s=0.01)
+        store.write({"articles": [{"meta_title": "Old"}], "partial": False, "sources": {}, "generated_at": 1})
+        fd = store._try_lock()  # a leader that never finishes
+        try:
+            edition = await store.get_or_generate(Mock(), wait_s=0.05)
+        finally:
+            store._unlock(fd)
+
+        assert edition["articles"][0]["meta_title"] == "Old"
+
+    @pytest.mark.asyncio
+    async def test_follower_does_not_generate_next_to_the_leader(self, tmp_path):
+        from ai_desk_store import EditionStore, EditionUnavailable
+        store = EditionStore(str(tmp_path), poll_s=0.01)
+        generate = Mock(side_effect=AssertionError("should not generate"))
+        fd = store._try_lock()  # the first edition's leader, still running
+        try:
+            with pytest.raises(EditionUnavailable):
+                await store.get_or_generate(generate, wait_s=0.05)
+            with patch("FAST_API.edition_store", store):
+                response = TestClient(app).get("/news", params={"deadline_ms": 50})
+        finally:
+            store._unlock(fd)
+
+        assert not generate.called
+        assert response.status_code == 503 and response.headers["retry-after"] == "5"
+
+    @pytest.mark.asyncio
+    async def test_snapshot_io_runs_off_the_event_loop(self, tmp_path):
+        import threading
+        from ai_desk_store import EditionStore
+        store = EditionStore(str(tmp_path))
+        threads = []
+        read, write = store.read, store.write
+        store.read = lambda: threads.append(threading.current_thread()) or read()
+        store.write = lambda edition: threads.append(threading.current_thread()) or write(edition)
+
+        async def generate():
+            return {"articles": [], "partial": False, "sources": {}}
+
+        await store.get_or_generate(generate)
+
+        assert len(threads) == 3
+        assert threading.main_thread() not in threads
+
+
+# ================================================================================
+# CPU PROCESS POOL
+# ================================================================================
+
+class TestCpuPool:
+    """Feed parsing runs in worker processes and returns compact records"""
+
+    def test_parse_feed_returns_clean_records(self):
+        from ai_desk_cpu import parse_feed
+        with open(os.path.join(os.path.dirname(__file__), "fixtures", "replay", "google_news.xml"), "rb") as f:
+            records = parse_feed(f.read(), max_items=3)
+
+        assert len(records) == 3
+        assert set(records[0]) == {"title", "link", "summary", "published"}
+        assert "<" not in records[0]["summary"] and "Reuters" in records[0]["summary"]
+
+    @pytest.mark.asyncio
+    async def test_big_feed_parse_does_not_block_loop(self):
+        import ai_desk_cpu
+        from benchmarks.load import LoopLagMonitor
+        items = "".join(
+            f"<item><title>Story {n}</title><link>https://e.com/{n}</link>"
+            f"<description>&lt;p&gt;Body &lt;b&gt;{n}&lt;/b&gt; with &amp;nbsp; markup&lt;/p&gt;</description>"
+            f"<pubDate>Mon, 15 Dec 2025 18:00:00 GMT</pubDate></item>"
+            for n in range(3000)
+        )
+        data = f'<?xml version="1.0"?><rss version="2.0"><channel><title>Big</title>{items}</channel></rss>'.encode()
+        await asyncio.to_thread(ai_desk_cpu.warm_up)
+
+        async with LoopLagMonitor() as monitor:
+            results = await asyncio.gather(*(ai_desk_cpu.run_cpu_async(ai_desk_cpu.parse_feed, data, 5000)
+                                             for _ in range(2)))
+
+        assert [len(r) for r in results] == [3000, 3000]
+        assert results[0][7]["summary"] == "Body 7 with markup"
+        assert monitor.report()["max_ms"] < 100
+
+    def test_pool_can_be_disabled(self, monkeypatch):
+        import ai_desk_cpu
+        monkeypatch.setattr(ai_desk_cpu, "CPU_POOL_WORKERS", 0)
+        assert ai_desk_cpu.run_cpu(os.getpid) == os.getpid()
+
+
+# ================================================================================
+# STREAMING FEED PARSER
+# ================================================================================
+
+class TestStreamingFeedParser:
+    """Well-formed feeds are parsed incrementally, malformed ones by feedparser"""
+
+    def test_matches_feedparser_on_recorded_feeds(self):
+        from ai_desk_cpu import parse_feed, parse_feed_streaming
+        for name in ("google_news.xml", "forbes.xml"):
+            with open(os.path.join(os.path.dirname(__file__), "fixtures", "replay", name), "rb") as f:
+                data = f.read()
+            assert parse_feed_streaming(data, 10) == parse_feed(data, 10)
+
+    def test_stops_after_max_items(self):
+        from ai_desk_cpu import FeedStreamParser
+        head = b'<rss><channel>' + b''.join(
+            f'<item><title>Story {n}</title><link>https://e.com/{n}</link></item>'.encode() for n in range(3))
+        parser = FeedStreamParser(max_items=2)
+
+        # The broken tail is never parsed because the parser is already done
+        assert parser.feed(head) is True
+        assert parser.feed(b'<item><title>broken &nbsp; </rss>') is True
+        assert not parser.failed
+        assert [r["link"] for r in parser.records] == ["https://e.com/0", "https://e.com/1"]
+
+    def test_atom_entries(self):
+        from ai_desk_cpu import parse_feed_streaming
+        atom = (b'<feed xmlns="http://www.w3.org/2005/Atom"><entry><title>A &amp; B</title>'
+                b'<link rel="alternate" href="https://e.com/a"/><summary>&lt;p&gt;Hi&lt;/p&gt;</summary>'
+                b'<published>2025-12-15T18:00:00Z</published></entry></feed>')
+        assert parse_feed_streaming(atom) == [
+            {"title": "A & B", "link": "https://e.com/a", "summary": "Hi", "published": "2025-12-15T18:00:00Z"}]
+
+    def test_malformed_feed_falls_back_to_feedparser(self, tmp_path):
+        import shutil
+        import ai_desk_agents
+        from ai_desk_metrics import feed_parses
+        from ai_desk_replay import FakeHttpx, ReplayConfig
+        shutil.copytree(os.path.join(os.path.dirname(__file__), "fixtures", "replay"), tmp_path, dirs_exist_ok=True)
+        (tmp_path / "forbes.xml").write_text(
+            '<rss><channel><item><title>Bits & Bytes</title><link>https://e.com/b</link></item></channel></rss>')
+        before = feed_parses.get(parser="feedparser")
+
+        with patch.object(ai_desk_agents, "httpx", FakeHttpx(ReplayConfig(fixtures_dir=str(tmp_path)))):
+            records = ai_desk_agents._fetch_forbes_ai_news(max_items=2)
+
+        assert records[0]["title"] == "Bits & Bytes"
+        assert feed_parses.get(parser="feedparser") == before + 1
+
+
+# ================================================================================
+# SOURCE REGISTRY
+# ================================================================================
+
+class TestSourceRegistry:
+    """Sources come from config and fan out under global limits"""
+
+    def test_config_file_matches_default_sources(self):
+        from ai_desk_sources import load_sources, DEFAULT_SOURCES
+        assert load_sources() == DEFAULT_SOURCES
+
+    def test_invalid_config_names_the_entry(self, tmp_path):
+        from ai_desk_sources import load_sources
+        path = tmp_path / "sources.json"
+        path.write_text(json.dumps({"sources": [{"name": "Blog", "type": "rss"}]}))
+        with pytest.raises(ValueError, match="source #0"):
+            load_sources(str(path))
+
+        path.write_text(json.dumps([{"name": "A", "type": "wikipedia", "topic": "AI"}] * 2))
+        with pytest.raises(ValueError, match="duplicate source names: A"):
+            load_sources(str(path))
+
+    def test_edition_sources_built_by_priority(self):
+        from ai_desk_agents import build_edition_sources
+        from ai_desk_sources import SourceConfig
+        sources = build_edition_sources([
+            SourceConfig(name="Late", type="rss", url="https://e.com/late.xml", priority=50),
+            SourceConfig(name="Off", type="rss", url="https://e.com/off.xml", enabled=False),
+            SourceConfig(name="First", type="youtube", query="robotics", max_items=4, priority=1, concurrency=2),
+        ])
+
+        assert [s.name for s in sources] == ["First", "Late"]
+        assert sources[0].fetch.args == ("robotics",) and sources[0].max_items == 4
+        assert sources[1].fetch.args == ("https://e.com/late.xml",)
+
+    @pytest.mark.asyncio
+    async def test_hundreds_of_sources_respect_fetch_limit(self):
+        import threading
+        import ai_desk_agents
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def fetch():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return []
+
+        sources = [(f"Feed{n}", fetch, 1) for n in range(200)]
+        started = time.perf_counter()
+        with patch.object(ai_desk_agents, "EDITION_SOURCES", sources), \
+             patch.object(ai_desk_agents, "SOURCE_FETCH_CONCURRENCY", 10):
+            status = {}
+            await ai_desk(status=status)
+
+        assert len(status["sources"]) == 200
+        assert peak[0] <= 10
+        # 200 fetches of 50ms, 10 at a time: ~1s, not 10s
+        assert time.perf_counter() - started < 5
+
+    @pytest.mark.asyncio
+    async def test_source_concurrency_writes_items_in_parallel(self):
+        import ai_desk_agents
+        items = [{"title": f"Story {n}", "link": f"https://e.com/{n}"} for n in range(4)]
+
+        async def slow_reply(*args, **kwargs):
+            await asyncio.sleep(0.2)
+            return Mock(final_output=json.dumps({"meta_title": "Parallel story"}))
+
+        with patch.object(ai_desk_agents.Runner, "run", side_effect=slow_reply):
+            started = time.perf_counter()
+            articles = await process_source_to_article("Blog", lambda: items, max_items=4, concurrency=4)
+
+        assert len(articles) == 4
+        assert time.perf_counter() - started < 0.6
+
+
+# ================================================================================
+#                           ADAPTIVE POLLING TESTS
+# ================================================================================
+
+class TestPollScheduler:
+    """Sources are polled at their publish rate, not at request rate"""
+
+    @staticmethod
+    def _items(start: float, gap_s: float, count: int, prefix: str = "Story"):
+        from email.utils import formatdate
+        return [{"title": f"{prefix} {n}", "link": f"https://e.com/{prefix}/{n}",
+                 "published": formatdate(start - n * gap_s)} for n in range(count)]
+
+    def test_interval_follows_publish_rate(self):
+        from ai_desk_scheduler import PollScheduler
+        scheduler = PollScheduler(min_interval_s=60, max_interval_s=86400, gap_fraction=0.5)
+        scheduler.register("Fast", 900)
+        scheduler.register("Slow", 900)
+        now = 1_700_000_000
+
+        fast = scheduler.record_poll("Fast", self._items(now, 600, 5), lambda i: i["link"], now=now)
+        slow = scheduler.record_poll("Slow", self._items(now, 86400, 5, "Weekly"), lambda i: i["link"], now=now)
+
+        assert fast == 300
+        assert slow == 43200
+        assert scheduler.next_due() == ("Fast", now + 300)
+        assert scheduler.due(now + 301) == ["Fast"]
+
+    def test_backs_off_when_nothing_is_new(self):
+        from ai_desk_scheduler import PollScheduler
+        scheduler = PollScheduler(min_interval_s=60, max_interval_s=1000, gap_fraction=0.5)
+        scheduler.register("Blog", 900)
+        items = self._items(1_700_000_000, 200, 3)
+
+        intervals = [scheduler.record_poll("Blog", items, lambda i: i["link"], now=t) for t in range(4)]
+        assert intervals == [100, 200, 400, 800]
+        assert scheduler.record_poll("Blog", items, lambda i: i["link"], now=5) == 1000
+
+        fresh = self._items(1_700_000_200, 200, 1, "Breaking")
+        assert scheduler.record_poll("Blog", fresh + items, lambda i: i["link"], now=6) == 100
+        assert scheduler.record_failure("Blog", now=7) == 200
+
+    def test_changed_interval_replaces_learned_one(self):
+        from ai_desk_scheduler import PollScheduler
+        scheduler = PollScheduler(min_interval_s=60, max_interval_s=86400, gap_fraction=0.5)
+        scheduler.register("Fast", 900)
+        scheduler.record_poll("Fast", self._items(1_700_000_000, 600, 5), lambda i: i["link"], now=1000)
+
+        scheduler.register("Fast", 3600, now=1100)
+        assert scheduler.snapshot(now=1100)["Fast"]["interval_s"] == 3600
+        assert scheduler._sources["Fast"].next_due == 1000 + 3600
+        assert scheduler.record_poll("Fast", [], lambda i: i["link"], now=4600) == 3600 * 2
+
+    @pytest.mark.asyncio
+    async def test_skipped_poll_leaves_the_breaker_trial(self):
+        import ai_desk_agents
+        items = [{"title": "Trial story", "link": "https://e.com/trial"}]
+        with patch.object(ai_desk_agents.Runner, "run",
+                          return_value=Mock(final_output=json.dumps({"meta_title": "Trial story"}))):
+            await process_source_to_article("Trial", lambda: items, max_items=1, poll_interval_s=900)
+            breaker = ai_desk_agents.get_breaker("Trial")
+            breaker.state, breaker.opened_at = breaker.OPEN, time.monotonic() - breaker.cooldown_s - 1
+
+            # Not due: served from the last poll without taking the half-open trial
+            await process_source_to_article("Trial", lambda: items, max_items=1, poll_interval_s=900)
+            assert breaker.state == breaker.OPEN
+
+            ai_desk_agents.poll_scheduler._sources["Trial"].next_due = 0
+            await process_source_to_article("Trial", lambda: items, max_items=1, poll_interval_s=900)
+            assert breaker.state == breaker.CLOSED
+
+    def test_parses_rss_and_iso_dates(self):
+        from ai_desk_scheduler import parse_timestamp
+        assert parse_timestamp("Mon, 01 Jan 2024 00:00:00 GMT") == 1704067200
+        assert parse_timestamp("2024-01-01T00:00:00Z") == 1704067200
+        assert parse_timestamp("not a date") is None
+
+    @pytest.mark.asyncio
+    async def test_source_is_not_fetched_until_due(self):
+        import ai_desk_agents
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return [{"title": "Only story", "link": "https://e.com/only"}]
+
+        with patch.object(ai_desk_agents.Runner, "run",
+                          return_value=Mock(final_output=json.dumps({"meta_title": "Only story"}))) as writer:
+            first = await process_source_to_article("Blog", fetch, max_items=1, poll_interval_s=900)
+            second = await process_source_to_article("Blog", fetch, max_items=1, poll_interval_s=900)
+
+            assert len(calls) == 1 and writer.call_count == 1
+            assert second == first
+            assert ai_desk_agents.poll_scheduler.snapshot()["Blog"]["interval_s"] == 900
+
+            # Due again but unchanged: fetched, yet the Writer is not called again
+            ai_desk_agents.poll_scheduler._sources["Blog"].next_due = 0
+            third = await process_source_to_article("Blog", fetch, max_items=1, poll_interval_s=900)
+            assert len(calls) == 2 and writer.call_count == 1
+            assert third == first
+
+
+# ================================================================================
+#                           COMPACT ARTICLE TESTS
+# ================================================================================
+
+class TestCompactArticles:
+    """The cache keeps slotted records and hands out the usual JSON shape"""
+
+    WRITER_ARTICLE = {
+        "meta_title": "OpenAI Releases GPT-5 Model",
+        "meta_description": "New AI model announced",
+        "meta_image_prompt": "", "alt_text": "", "slug": "openai-gpt5",
+        "tags": ["AI", "OpenAI"],
+        "content": [{"heading": "Overview", "paragraphs": ["First.", "Second."]}],
+        "source_links": [{"title": "GPT-5", "url": "http://example.com/1", "source": "Google"}],
+        "video_links": [{"title": "Launch", "url": "https://youtu.be/x", "source": "YouTube", "published": "2025-01-01"}],
+        "images": [{"url": "http://img/1.jpg", "alt": "GPT-5", "source": "Google", "generated": False}],
+        "category": "Research",
+    }
+
+    def test_round_trip_keeps_json_shape(self):
+        from ai_desk_articles import Article
+        article = Article.from_dict(copy.deepcopy(self.WRITER_ARTICLE))
+        assert not hasattr(article, "__dict__")
+        assert article.to_dict() == self.WRITER_ARTICLE
+
+    def test_source_names_and_tags_are_interned(self):
+        from ai_desk_articles import Article
+        a = Article.from_dict(json.loads(json.dumps(self.WRITER_ARTICLE)))
+        b = Article.from_dict(json.loads(json.dumps(self.WRITER_ARTICLE)))
+        assert a.source_links[0].source is b.source_links[0].source
+        assert a.tags[1] is b.tags[1]
+
+    def test_cache_stores_records_and_returns_dicts(self):
+        from ai_desk_articles import Article
+        cache = ArticleCache()
+        cache.add_or_merge(copy.deepcopy(self.WRITER_ARTICLE))
+        duplicate = copy.deepcopy(self.WRITER_ARTICLE)
+        duplicate["source_links"] = [{"title": "GPT-5", "url": "http://example.com/2", "source": "Forbes"}]
+        duplicate["tags"] = ["GPT", "AI"]
+        cache.add_or_merge(duplicate)
+
+        assert all(isinstance(a, Article) for a in cache.articles.values())
+        [merged] = cache.get_all()
+        assert [s["source"] for s in merged["source_links"]] == ["Google", "Forbes"]
+        assert merged["tags"] == ["AI", "OpenAI", "GPT"]
+        assert merged["id"] and merged["published"] == merged["timestamp"]
+        json.dumps(merged)
+
+    def test_memory_benchmark_reports_saving(self):
+        from benchmarks.articles import run
+        result = run(count=200)
+        assert result["article"]["memory_mb"] < result["dict"]["memory_mb"]
+        assert result["saving"] > 0
+
+
+# ================================================================================
+#                           CANONICAL URL MERGING TESTS
+# ================================================================================
+
+class TestCanonicalUrlMerging:
+    """Links that point at the same page merge into one"""
+
+    @pytest.mark.parametrize("url, expected", [
+        ("http://WWW.Forbes.com/sites/ai/story/?utm_source=rss&utm_medium=feed#top", "https://forbes.com/sites/ai/story"),
+        ("https://e.com:443//a//b/?b=2&a=1&fbclid=xyz", "https://e.com/a/b?a=1&b=2"),
+        ("https://youtu.be/dQw4w9WgXcQ?si=share", "https://youtube.com/watch?v=dQw4w9WgXcQ"),
+        ("https://m.youtube.com/shorts/dQw4w9WgXcQ", "https://youtube.com/watch?v=dQw4w9WgXcQ"),
+        ("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=30", "https://youtube.com/watch?v=dQw4w9WgXcQ"),
+        ("https://e.com:8080/page?id=7", "https://e.com:8080/page?id=7"),
+        ("  not a url ", "not a url"),
+    ])
+    def test_canonical_url(self, url, expected):
+        from ai_desk_urls import canonical_url
+        assert canonical_url(url) == expected
+
+    def test_syndicated_story_keeps_one_link_per_page(self):
+        cache = ArticleCache()
+        variants = ["https://forbes.com/story", "http://www.forbes.com/story/", "https://forbes.com/story?utm_source=x"]
+        for n, url in enumerate(variants):
+            cache.add_or_merge({
+                "meta_title": "OpenAI Releases GPT-5 Model",
+                "source_links": [{"title": f"Copy {n}", "url": url, "source": "Forbes"},
+                                 {"title": "Other", "url": f"https://other{n}.com/gpt5", "source": "Google"}],
+                "video_links": [{"url": "https://youtu.be/abcdefghijk"},
+                                {"url": "https://www.youtube.com/watch?v=abcdefghijk"}],
+            })
+
+        [article] = cache.get_all()
+        assert [link["url"] for link in article["source_links"]] == [
+            "https://forbes.com/story", "https://other0.com/gpt5", "https://other1.com/gpt5", "https://other2.com/gpt5"]
+        assert article["source_links"][0]["title"] == "Copy 0"
+        assert len(article["video_links"]) == 1
+
+    def test_merge_is_linear(self):
+        from ai_desk_articles import Article, Link
+        cache = ArticleCache()
+        links = tuple(Link(f"https://e.com/{n}?utm_source=feed") for n in range(20000))
+        cache.add_or_merge(Article(meta_title="Big syndicated story", source_links=links))
+        started = time.perf_counter()
+        cache.add_or_merge(Article(meta_title="Big syndicated story", source_links=links))
+        assert time.perf_counter() - started < 1.0
+        assert len(cache.get_all()[0]["source_links"]) == 20000
+
+
+# ================================================================================
+#                        GOOGLE NEWS REDIRECT RESOLUTION TESTS
+# ================================================================================
+
+class TestRedirectResolver:
+    """Google News links are resolved once, concurrently, and remembered"""
+
+    @staticmethod
+    def _transport(hits: list, active: list = None, fail: set = ()):
+        async def handler(request):
+            if request.url.host == "news.google.com":
+                hits.append(str(request.url))
+                if active is not None:
+                    active[0] += 1
+                    active[1] = max(active[1], active[0])
+                    await asyncio.sleep(0.02)
+                    active[0] -= 1
+                article_id = request.url.path.rsplit("/", 1)[-1]
+                if article_id in fail:
+                    return httpx.Response(404, request=request)
+                return httpx.Response(301, headers={"location": f"https://publisher.com/{article_id}"}, request=request)
+            return httpx.Response(200, request=request)
+        return httpx.MockTransport(handler)
+
+    @pytest.mark.asyncio
+    async def test_resolves_concurrently_under_limit_and_persists(self, tmp_path):
+        from ai_desk_resolver import RedirectResolver
+        hits, active = [], [0, 0]
+        path = str(tmp_path / "resolved.json")
+        resolver = RedirectResolver(path=path, concurrency=3, transport=self._transport(hits, active))
+        urls = [f"https://news.google.com/rss/articles/CBMiStory{n}?oc=5" for n in range(10)]
+
+        resolved = await resolver.resolve_many(urls + ["https://forbes.com/not-a-redirect"])
+        assert resolved[urls[4]] == "https://publisher.com/CBMiStory4"
+        assert len(resolved) == 10 and active[1] == 3
+
+        # A new worker reads the file instead of asking Google again
+        fresh = RedirectResolver(path=path, transport=self._transport(hits))
+        assert await fresh.resolve_many(urls) == resolved
+        assert len(hits) == 10
+
+    @pytest.mark.asyncio
+    async def test_failed_lookup_is_retried_after_negative_ttl(self, tmp_path):
+        from ai_desk_resolver import RedirectResolver
+        hits = []
+        resolver = RedirectResolver(path=str(tmp_path / "r.json"), negative_ttl_s=60,
+                                    transport=self._transport(hits, fail={"CBMiDead"}))
+        url = "https://news.google.com/rss/articles/CBMiDead"
+
+        assert await resolver.resolve_many([url]) == {}
+        assert await resolver.resolve_many([url]) == {}
+        assert len(hits) == 1
+
+        resolver._entries[url][1] -= 120
+        await resolver.resolve_many([url])
+        assert len(hits) == 2
+
+    def test_decodes_url_embedded_in_article_id(self):
+        import base64
+        from ai_desk_resolver import decode_google_news_url
+        url = "https://www.example.com/2025/01/ai-story?id=1"
+        article_id = base64.urlsafe_b64encode(b"\x08\x13\x22" + bytes([len(url)]) + url.encode() + b"\xd2\x01\x00")
+        assert decode_google_news_url(f"https://news.google.com/rss/articles/{article_id.decode().rstrip('=')}?oc=5") == url
+        assert decode_google_news_url("https://news.google.com/rss/articles/CBMiReplay00Article") is None
+
+    @pytest.mark.asyncio
+    async def test_save_works_on_a_copy_of_the_entries(self, tmp_path):
+        from ai_desk_resolver import RedirectResolver
+        resolver = RedirectResolver(path=str(tmp_path / "r.json"), transport=self._transport([]))
+        saving = resolver.save
+
+        def save(entries):
+            # The event loop adding entries while the file is written must not affect it
+            resolver._entries["https://news.google.com/rss/articles/CBMiLate"] = ["https://publisher.com/late", 0]
+            return saving(entries)
+
+        with patch.object(resolver, "save", side_effect=save):
+            await resolver.resolve_many(["https://news.google.com/rss/articles/CBMiFirst"])
+
+        assert set(json.loads((tmp_path / "r.json").read_text())) == {"https://news.google.com/rss/articles/CBMiFirst"}
+        assert len(resolver._entries) == 2
+
+    @pytest.mark.asyncio
+    async def test_current_article_ids_are_left_unresolved(self, tmp_path):
+        import base64
+        from ai_desk_resolver import RedirectResolver, is_opaque_article_id
+        token = b"AU_yqLNbxFq3c2pQ9o1Wd8X0zVtKjH7sRmYeL4gCiBuA"
+        opaque = base64.urlsafe_b64encode(b"\x08\x13\x22" + bytes([len(token)]) + token).decode().rstrip("=")
+        opaque_url = f"https://news.google.com/rss/articles/{opaque}?oc=5"
+        page_url = "https://news.google.com/rss/articles/CBMiScriptPage"
+        hits = []
+
+        async def handler(request):
+            hits.append(str(request.url))
+            # news.google.com serves a page that redirects in JavaScript, not over HTTP
+            return httpx.Response(200, html="<html><script>location.href=...</script></html>", request=request)
+
+        resolver = RedirectResolver(path=str(tmp_path / "r.json"), transport=httpx.MockTransport(handler))
+        items = [{"link": opaque_url}, {"link": page_url}]
+
+        assert is_opaque_article_id(opaque_url) and not is_opaque_article_id(page_url)
+        assert await resolver.resolve_items(items) == 0
+        assert [item["link"] for item in items] == [opaque_url, page_url]
+        assert hits == [page_url]
+        assert resolver.cached(page_url) == (True, None) and resolver.cached(opaque_url) == (False, None)
+
+    @pytest.mark.asyncio
+    async def test_pipeline_uses_publisher_urls(self):
+        import ai_desk_agents
+        hits = []
+        items = [{"title": "Chip story", "link": "https://news.google.com/rss/articles/CBMiChip"}]
+        prompts = []
+
+        async def reply(agent, prompt, **kwargs):
+            prompts.append(prompt)
+            return Mock(final_output=json.dumps({"meta_title": "Chip story"}))
+
+        with patch.object(ai_desk_agents.url_resolver, "transport", self._transport(hits)), \
+             patch.object(ai_desk_agents.Runner, "run", side_effect=reply):
+            await process_source_to_article("Google", lambda: items, max_items=1)
+
+        assert items[0]["link"] == "https://publisher.com/CBMiChip"
+        assert items[0]["redirect_link"] == "https://news.google.com/rss/articles/CBMiChip"
+        assert "https://publisher.com/CBMiChip" in prompts[0]
+
+    def test_dedup_short_circuits_on_shared_url(self):
+        cache = ArticleCache()
+        cache.add_or_merge({"meta_title": "Nvidia unveils new AI chip",
+                            "source_links": [{"url": "https://publisher.com/chip?utm_source=google", "source": "Google"}]})
+        with patch.object(cache, "find_similar", side_effect=AssertionError("title matching not needed")):
+            cache.add_or_merge({"meta_title": "Quarterly results beat expectations",
+                                "source_links": [{"url": "https://www.publisher.com/chip", "source": "Forbes"}]})
+        [article] = cache.get_all()
+        assert [link["source"] for link in article["source_links"]] == ["Google"]
+
+
+# ================================================================================
+#                           TF-IDF SIMILARITY TESTS
+# ================================================================================
+
+class TestSimilarityEngine:
+    """Stories are matched on TF-IDF vectors of title, description and summary"""
+
+    @pytest.fixture(params=["numpy", "python"])
+    def engine(self, request, monkeypatch):
+        import ai_desk_similarity
+        if request.param == "python":
+            monkeypatch.setattr(ai_desk_similarity, "np", None)
+        elif ai_desk_similarity.np is None:
+            pytest.skip("NumPy not installed")
+        return ai_desk_similarity
+
+    def test_reworded_headline_matches(self, engine):
+        index = engine.SimilarityIndex()
+        for key, title in enumerate(["OpenAI releases GPT-5 model", "Nvidia posts record quarterly revenue",
+                                     "Meta delays Llama 4 launch"]):
+            index.add(key, (title,))
+        queries = [index.vectorize(("OpenAI has released its GPT-5 models - Reuters",)),
+                   index.vectorize(("Apple opens new store in Tokyo",))]
+
+        [(match, score), (miss, _)] = index.best_matches(queries, threshold=0.35)
+        assert match == 0 and score > 0.6
+        assert miss is None
+
+    def test_removed_articles_are_not_matched(self, engine):
+        index = engine.SimilarityIndex()
+        index.add("a", ("Nvidia posts record revenue",))
+        index.add("b", ("Nvidia record revenue posted",))
+        index.remove("a")
+        assert len(index) == 1
+        assert [key for key, _ in index.best_matches([index.vectorize(("Nvidia posts record revenue",))])] == ["b"]
+
+    def test_publisher_suffix_is_ignored(self):
+        from ai_desk_similarity import strip_publisher
+        assert strip_publisher("Nvidia posts record revenue - The Wall Street Journal") == "Nvidia posts record revenue"
+        assert strip_publisher("GPT-5 - what it means for developers and the rest of us") == \
+            "GPT-5 - what it means for developers and the rest of us"
+
+    def test_batch_is_scored_in_one_pass(self):
+        cache = ArticleCache()
+        cache.add_or_merge({"meta_title": "Google unveils Gemini 3 for developers"})
+        batch = [
+            {"meta_title": "Gemini 3 unveiled by Google for developers", "source_links": [{"url": "https://a.com/1"}]},
+            {"meta_title": "Amazon invests in Anthropic", "source_links": [{"url": "https://b.com/1"}]},
+            {"meta_title": "Anthropic gets Amazon investment", "source_links": [{"url": "https://c.com/1"}]},
+        ]
+        with patch.object(cache.index, "best_matches", wraps=cache.index.best_matches) as scored:
+            merged = cache.add_batch(batch)
+
+        assert scored.call_count == 1
+        assert merged[2] is merged[1] and merged[0] is not merged[1]
+        assert len(cache.get_all()) == 2
+
+
+# ================================================================================
+#                           STORY THREAD TESTS
+# ================================================================================
+
+class TestStoryThreads:
+    """Items are clustered into story threads across editions"""
+
+    LAUNCH = {"title": "OpenAI releases GPT-5.2 with faster reasoning",
+              "description": "OpenAI released GPT-5.2, a model with faster reasoning for developers.",
+              "link": "https://forbes.com/gpt-5-2"}
+    LAUNCH_ELSEWHERE = {"title": "OpenAI releases GPT-5.2 with faster reasoning - Reuters",
+                        "description": "OpenAI has released GPT-5.2 with faster reasoning for developers.",
+                        "link": "https://reuters.com/tech/gpt-5-2"}
+    OTHER = {"title": "Nvidia posts record data center revenue",
+             "description": "Chip demand from cloud providers keeps growing.",
+             "link": "https://cnbc.com/nvidia"}
+
+    def test_centroid_is_updated_in_place(self):
+        from ai_desk_stories import StoryClusters
+        clusters = StoryClusters()
+        story = clusters.assign("Forbes", self.LAUNCH, now=0)
+        assert clusters.assign("Google", self.LAUNCH_ELSEWHERE, now=1) is story
+        assert clusters.assign("Google", self.OTHER, now=2) is not story
+        assert len(clusters) == 2 and story.size == 2
+        assert story.norm_sq == pytest.approx(sum(w * w for w in story.sums.values()))
+        assert clusters.match(self.LAUNCH_ELSEWHERE, now=3)[0] is story
+
+    def test_stories_close_after_the_window(self):
+        from ai_desk_stories import StoryClusters
+        clusters = StoryClusters(window_s=3600)
+        launch = clusters.assign("Forbes", self.LAUNCH, now=0)
+        other = clusters.assign("Google", self.OTHER, now=3000)
+        assert clusters.match(self.LAUNCH_ELSEWHERE, now=3500)[0] is launch
+        assert clusters.match(self.LAUNCH_ELSEWHERE, now=3700)[0] in (None, other)
+        assert len(clusters) == 1
+        assert all(postings.keys() == {other.id} for postings in clusters._postings.values())
+
+    def test_merge_needs_a_new_link(self):
+        from ai_desk_stories import StoryClusters
+        clusters = StoryClusters()
+        story = clusters.assign("Forbes", self.LAUNCH, article={"meta_title": "GPT-5.2"})
+        assert clusters.merge_target(self.LAUNCH_ELSEWHERE) is story
+        # A changed version of a cited page is written again
+        assert clusters.merge_target(dict(self.LAUNCH, description="Updated.")) is None
+        assert clusters.merge_target(self.OTHER) is None
+
+    def test_combined_stories_keep_both_ids(self):
+        from ai_desk_stories import StoryClusters
+        clusters = StoryClusters()
+        first = clusters.assign("Forbes", self.LAUNCH, now=0)
+        second = clusters.assign("Google", self.OTHER, now=1)
+        combined = clusters.combine(first.id, second.id)
+        assert combined == second.id and len(clusters) == 1
+        assert clusters.resolve(first.id) == combined
+        [thread] = clusters.threads({first.id})
+        assert thread["sources"] == ["Google", "Forbes"] and len(thread["updates"]) == 2
+
+    def test_combined_updates_are_ordered_by_publish_time(self, monkeypatch):
+        import ai_desk_stories
+        from ai_desk_stories import StoryClusters
+        monkeypatch.setattr(ai_desk_stories, "STORY_MAX_UPDATES", 3)
+        clusters = StoryClusters()
+        first = clusters.assign("Forbes", dict(self.LAUNCH, published="Wed, 17 Dec 2025 09:00:00 GMT"), now=0)
+        clusters.assign("Forbes", dict(self.LAUNCH, published="Mon, 15 Dec 2025 09:00:00 GMT"), story=first, now=1)
+        second = clusters.assign("Google", dict(self.OTHER, published="Tue, 16 Dec 2025 09:00:00 GMT"), now=2)
+        clusters.assign("YouTube", dict(self.OTHER, published="2025-12-18T09:00:00Z"), story=second, now=3)
+
+        clusters.combine(first.id, second.id)
+
+        [thread] = clusters.threads()
+        assert [update["published"][:3] for update in thread["updates"]] == ["Tue", "Wed", "202"]
+        assert "_at" not in thread["updates"][0]
+
+    @pytest.mark.asyncio
+    async def test_new_publisher_is_merged_without_the_writer(self):
+        import ai_desk_agents
+        reply = {"meta_title": "GPT-5.2 brings faster reasoning", "tags": ["AI"],
+                 "source_links": [{"title": "GPT-5.2", "url": self.LAUNCH["link"], "source": "Forbes"}]}
+        with patch.object(ai_desk_agents.Runner, "run", return_value=Mock(final_output=json.dumps(reply))) as writer:
+            [written] = await process_source_to_article("Forbes", lambda: [dict(self.LAUNCH)], max_items=1)
+            [merged] = await process_source_to_article("Google", lambda: [dict(self.LAUNCH_ELSEWHERE)], max_items=1)
+
+        assert writer.call_count == 1
+        assert merged["story_id"] == written["story_id"]
+        assert merged["meta_title"] == written["meta_title"]
+        assert [link["url"] for link in merged["source_links"]] == [self.LAUNCH["link"], self.LAUNCH_ELSEWHERE["link"]]
+        [thread] = ai_desk_agents.story_clusters.threads()
+        assert [update["action"] for update in thread["updates"]] == ["written", "merged"]
+
+
+# ================================================================================
+#                           RETENTION TESTS
+# ================================================================================
+
+class TestArticleRetention:
+    """The article store stays within its count, age and byte limits"""
+
+    @staticmethod
+    def _article(n: int) -> dict:
+        return {"meta_title": f"Zebra{n} quokka{n} story", "meta_description": f"Yak{n} vole{n}",
+                "source_links": [{"title": f"Story {n}", "url": f"https://e.com/{n}", "source": "Google"}]}
+
+    def _cache(self, **limits):
+        from ai_desk_retention import RetentionPolicy
+        policy = dict(max_count=0, max_age_s=0, max_bytes=0, compact_ratio=0.25)
+        policy.update(limits)
+        return ArticleCache(retention=RetentionPolicy(**policy))
+
+    def test_least_recently_seen_go_first(self):
+        cache = self._cache(max_count=3)
+        for n in range(4):
+            cache.add_or_merge(self._article(n))
+        cache.add_or_merge(self._article(0))  # seen again
+        from ai_desk_articles import Article
+        cache.evict(pinned=frozenset())
+        assert [a["meta_title"] for a in cache.get_all()] == [f"Zebra{n} quokka{n} story" for n in (0, 2, 3)]
+        assert cache.find_by_url(Article.from_dict(self._article(1))) is None
+        assert len(cache.index) == 3
+
+    def test_age_and_byte_limits(self):
+        cache = self._cache(max_age_s=60)
+        for n in range(3):
+            cache.add_or_merge(self._article(n))
+        assert cache.evict(pinned=frozenset(), now=time.time() + 30) == []
+        assert len(cache.evict(pinned=frozenset(), now=time.time() + 120)) == 3
+
+        cache = self._cache(max_bytes=1)
+        cache.add_or_merge(self._article(0))
+        cache.evict(pinned=frozenset())
+        assert cache.articles == {} and cache._bytes == 0
+
+    def test_pinned_articles_are_kept(self, tmp_path):
+        from ai_desk_retention import PinStore
+        pins = PinStore(str(tmp_path / "pins.json"), limit=2)
+        cache = self._cache(max_count=1)
+        first = cache.add_or_merge(self._article(0))
+        cache.add_or_merge(self._article(1))
+        assert pins.pin(first.id) and not pins.pin(first.id)
+        cache.evict(pinned=PinStore(pins.path).ids())
+        assert [a["id"] for a in cache.get_all()] == [first.id]
+        pins.pin("b"), pins.pin("c")
+        assert pins.ids() == {"b", "c"}
+        assert pins.unpin("b") and not pins.unpin("b")
+
+    @pytest.mark.asyncio
+    async def test_next_leader_continues_the_desk_state(self):
+        import ai_desk_agents
+        from FAST_API import _generate_edition
+        from ai_desk_agents import EditionSource
+        ai_desk_agents._written_articles.clear()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return [{"title": "Handoff story", "link": "https://e.com/handoff", "summary": "Text"}]
+
+        reply = {"meta_title": "Handoff story", "source_links": [{"title": "Handoff", "url": "https://e.com/handoff", "source": "Handoff"}]}
+        with patch.object(ai_desk_agents, "EDITION_SOURCES", [EditionSource("Handoff", fetch, 1)]), \
+             patch.object(ai_desk_agents.Runner, "run", return_value=Mock(final_output=json.dumps(reply))) as writer:
+            first = await _generate_edition(None)
+
+            # Another worker, with nothing of its own, becomes the next leader
+            ai_desk_agents.article_cache.clear()
+            ai_desk_agents.story_clusters.reset()
+            ai_desk_agents.poll_scheduler.reset()
+            ai_desk_agents._written_articles.clear()
+            ai_desk_agents._last_good_articles.clear()
+            ai_desk_agents.desk_state._signature = None
+            second = await _generate_edition(None)
+
+        assert len(calls) == 1 and writer.call_count == 1
+        assert [a["id"] for a in second["articles"]] == [a["id"] for a in first["articles"]]
+        assert second["stories"][0]["story_id"] == first["stories"][0]["story_id"]
+
+    def test_desk_state_from_another_user_is_ignored(self, tmp_path):
+        import ai_desk_agents
+        path = tmp_path / "shared" / "desk_state.pickle"
+        ai_desk_agents.DeskState(str(path)).save()
+        path.chmod(0o666)
+        assert ai_desk_agents.DeskState(str(path)).load() is False
+
+    def test_workers_do_not_lose_pins(self, tmp_path):
+        import subprocess
+        import sys
+        worker = (
+            "import sys\n"
+            "from ai_desk_retention import PinStore\n"
+            "pins = PinStore(sys.argv[1], limit=1000)\n"
+            "for n in range(25): pins.pin(f'{sys.argv[2]}-{n}')\n"
+        )
+        path = str(tmp_path / "pins.json")
+        env = {**os.environ, "GROQ_API_KEY": "dummy", "PYTHONPATH": os.path.dirname(os.path.abspath(__file__))}
+        procs = [subprocess.Popen([sys.executable, "-c", worker, path, f"w{w}"], env=env) for w in range(4)]
+        for proc in procs:
+            assert proc.wait(timeout=60) == 0
+
+        from ai_desk_retention import PinStore
+        assert len(PinStore(path).ids()) == 100
+
+    @pytest.mark.parametrize("engine", ["numpy", "python"])
+    def test_compaction_renumbers_rows(self, engine, monkeypatch):
+        import ai_desk_similarity
+        if engine == "python":
+            monkeypatch.setattr(ai_desk_similarity, "np", None)
+        elif ai_desk_similarity.np is None:
+            pytest.skip("numpy not installed")
+        cache = self._cache(max_count=2)
+        for n in range(6):
+            cache.add_or_merge(self._article(n))
+        cache.evict(pinned=frozenset())
+        assert cache.needs_compaction()
+        cache.compact()
+        assert not cache.needs_compaction() and len(cache.index._keys) == 2
+        key = cache.find_similar("Zebra5 quokka5 story")
+        assert cache.articles[key].meta_title == "Zebra5 quokka5 story"
+
+    def test_pin_endpoints(self):
+        from ai_desk_retention import pin_store
+        client = TestClient(app)
+        assert client.put("/articles/abc/pin").json() == {"article_id": "abc", "pinned": True}
+        assert "abc" in pin_store.ids()
+        assert client.delete("/articles/abc/pin").json()["pinned"] is False
+        assert "abc" not in pin_store.ids()
+
+    @pytest.mark.asyncio
+    async def test_articles_persist_across_editions(self):
+        import ai_desk_agents
+        from ai_desk_agents import EditionSource
+
+        def fetch():
+            return [{"title": "Only story", "link": "https://e.com/only"}]
+
+        reply = {"meta_title": "Only story", "source_links": [{"title": "Only", "url": "https://e.com/only", "source": "Blog"}]}
+        with patch.object(ai_desk_agents, "EDITION_SOURCES", [EditionSource("Blog", fetch, 1)]), \
+             patch.object(ai_desk_agents.Runner, "run", return_value=Mock(final_output=json.dumps(reply))):
+            [first] = await ai_desk()
+            [second] = await ai_desk()
+        assert second["id"] == first["id"]
+
+
+# ================================================================================
+#                           LIST VIEW PROJECTION TESTS
+# ================================================================================
+
+class TestArticleViews:
+    """/news can send summaries or selected fields; full articles come one at a time"""
+
+    ARTICLE = {
+        "id": "a1", "meta_title": "GPT-5.2 ships", "meta_description": "Faster reasoning",
+        "meta_image_prompt": "A chip", "alt_text": "Chip", "slug": "gpt-5-2-ships", "tags": ["AI"],
+        "content": [{"heading": "Overview", "paragraphs": ["Long body. " * 50]}],
+        "source_links": [{"title": "GPT-5.2", "url": "https://e.com/1", "source": "Google"}],
+        "video_links": [],
+        "images": [{"url": "https://img/1.jpg", "alt": "", "source": "Google", "generated": False},
+                   {"url": "https://img/2.jpg", "alt": "", "source": "Google", "generated": False}],
+        "published": "2025-12-15T18:00:00+00:00", "timestamp": "2025-12-15T18:00:00+00:00",
+    }
+
+    def _edition(self) -> dict:
+        return {"articles": [copy.deepcopy(self.ARTICLE)], "partial": False, "sources": {}, "stories": [],
+                "generated_at": time.time()}
+
+    def test_summary_drops_bodies(self):
+        from ai_desk_views import summarize
+        summary = summarize(self.ARTICLE)
+        assert summary["content"] == [{"heading": "Overview", "paragraphs": []}]
+        assert len(summary["images"]) == 1 and "meta_image_prompt" not in summary
+        assert len(json.dumps(summary)) < len(json.dumps(self.ARTICLE)) / 2
+
+    def test_response_is_encoded_once_per_edition(self):
+        from ai_desk_views import EditionViews, parse_fields
+        views, edition = EditionViews(), self._edition()
+        fields = parse_fields("slug, meta_title,slug")
+        assert fields == ("slug", "meta_title")
+        assert views.cached(edition, "summary", fields) is None
+        body = views.response(edition, "summary", fields)
+        assert views.cached(edition, "summary", fields) is body
+        assert views.response(edition, "summary", fields) is body
+        assert views.summaries(edition) is views.summaries(edition)
+        assert json.loads(body)["articles"] == [{"slug": "gpt-5-2-ships", "meta_title": "GPT-5.2 ships"}]
+        with pytest.raises(ValueError):
+            parse_fields("slug,body")
+
+    def test_news_views_and_article_lookup(self):
+        from ai_desk_store import edition_store
+        edition = self._edition()
+        with patch("FAST_API.edition_store.get_or_generate", return_value=edition):
+            client = TestClient(app)
+            full = client.get("/news")
+            summary = client.get("/news", params={"view": "summary"})
+            assert full.json()["articles"] == [self.ARTICLE]
+            assert summary.json()["articles"][0]["content"][0]["paragraphs"] == []
+            assert len(summary.content) < len(full.content)
+            assert client.get("/news", params={"view": "compact"}).status_code == 422
+            assert client.get("/news", params={"fields": "nope"}).status_code == 422
+
+        edition_store.write(edition)
+        client = TestClient(app)
+        assert client.get("/articles/gpt-5-2-ships").json() == self.ARTICLE
+        assert client.get("/articles/a1").json()["slug"] == "gpt-5-2-ships"
+        assert client.get("/articles/missing").status_code == 404
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])